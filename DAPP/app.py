@@ -1,18 +1,19 @@
 import streamlit as st
-from src.blockchain_utils.credentials import get_client, get_account_credentials, get_indexer
+import streamlit.components.v1 as components
+from src.blockchain_utils.credentials import get_client, get_project_root_path
 from src.services.game_engine_service import GameEngineService
+from src.services.game_worker import GameWorker
+from src.serial_utils.ingest_hub import SerialIngestHub
+from src.metrics_utils.metrics import METRICS
+from src.storage_utils.event_log import EventLog
 from playsound import playsound
-import algosdk
-import sys
-import glob
-import serial
-import time
+import threading
+import os
 import serial.tools.list_ports
 
 
 # methods to access blockchain
 client = get_client()
-indexer = get_indexer()
 
 # hardcode it for now, these are testnet accounts so we dont care
 
@@ -29,63 +30,52 @@ player_o_address = ' '
 # save a list of serial device
 devices = list()
 
+# the game runs in a worker that outlives the page reruns, one per server process
+# (st.cache_resource and st.fragment are only available on newer streamlit versions, the pinned 0.88 gets the
+# st.cache and page reload fallbacks)
+cache_resource = st.cache_resource if hasattr(st, "cache_resource") else st.cache(allow_output_mutation=True)
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+@cache_resource
+def get_game_worker(devices):
+    # the log of the table outlives crashes of the server, the game in it is resumed below
+    event_log = EventLog(get_project_root_path() / 'table_1.wal')
+
+    engine = GameEngineService(app_creator_pk=acc_pk,
+                               app_creator_address=acc_address,
+                               player_x_pk=player_x_pk,
+                               player_x_address=player_x_address,
+                               player_o_pk=player_o_pk,
+                               player_o_address=player_o_address,
+                               event_log=event_log)
+
+    # CORNHOLE_METRICS=1 exposes the per-stage latency histograms for Prometheus
+    if METRICS.enabled:
+        METRICS.serve(int(os.environ.get("CORNHOLE_METRICS_PORT", 9108)))
+
+    # keep every device open and read all of them at once for the whole session
+    worker = GameWorker(client,
+                        engine,
+                        SerialIngestHub(list(devices)),
+                        table_id="table_1",
+                        on_turn=lambda: playsound('turn.mp3'))
+    worker.restore()
+    return worker
+
+
+# find the CornHole devices
+list_ports = list(serial.tools.list_ports.comports())
+if len(list_ports) < 4:
+    for idx, item in enumerate(list_ports):
+        items = str(item).split()
+        devices.append(items[0])
 
-# Streamlit state variables defined here
-if "game_local_finished" not in st.session_state:
-    st.session_state.game_local_finished = False
-
-if "player_x_local_score" not in st.session_state:
-    st.session_state.player_x_local_score = 0
-    
-if "player_o_local_score" not in st.session_state:
-    st.session_state.player_o_local_score = 0    
-
-if "player_x_flag" not in st.session_state:
-    st.session_state.player_x_flag = False
-
-if "player_o_flag" not in st.session_state:
-    st.session_state.player_o_flag = False
-    
-if "players_reg_flag" not in st.session_state:
-    st.session_state.players_reg_flag = False
-
-if "local_log" not in st.session_state:
-    st.session_state.local_log = []
-
-if "submitted_transactions" not in st.session_state:
-    st.session_state.submitted_transactions = []
-
-if "player_turn" not in st.session_state:
-    st.session_state.player_turn = "X"
-
-if "game_state" not in st.session_state:
-    st.session_state.game_state = ['-'] * 9
-
-if "x_state" not in st.session_state:
-    st.session_state.x_state = 0
-
-if "o_state" not in st.session_state:
-    st.session_state.o_state = 0
-
-if "game_state" not in st.session_state:
-    st.session_state.game_state = ['-'] * 9
-    
-if "game_status" not in st.session_state:
-    st.session_state.game_status = 0
-
-if "is_app_deployed" not in st.session_state:
-    st.session_state.is_app_deployed = False
-
-if "is_game_started" not in st.session_state:
-    st.session_state.is_game_started = False
+game_worker = get_game_worker(tuple(devices))
 
-if "game_engine" not in st.session_state:
-    st.session_state.game_engine = GameEngineService(app_creator_pk=acc_pk,
-                                                    app_creator_address=acc_address,
-                                                    player_x_pk=player_x_pk,
-                                                    player_x_address=player_x_address,
-                                                    player_o_pk=player_o_pk,
-                                                    player_o_address=player_o_address)
+# Streamlit state variables defined here
+if "is_winner_announced" not in st.session_state:
+    st.session_state.is_winner_announced = False
 
 # display public accounts for both players
 st.title("Addresses")
@@ -94,22 +84,34 @@ st.write(f"player_x: {player_x_address}")
 st.write(f"player_o: {player_o_address}")
 st.write("You need to fund those accounts on the following link: https://bank.testnet.algorand.network/")
 
+# before the game is started, show what every player is missing to pay the bet, the balances are cached across reruns
+if game_worker.engine.escrow_fund_address is None:
+    try:
+        shortfalls = game_worker.engine.start_game_shortfalls(client)
+    except Exception as e:
+        st.warning(f"The balances of the players could not be checked: {e}")
+    else:
+        for player, address in (("player_x", player_x_address), ("player_o", player_o_address)):
+            if address in shortfalls:
+                st.error(f"{player} needs {shortfalls[address] / 1000000:.6f} more Algos to start the game, "
+                         f"fund it on https://bank.testnet.algorand.network/")
+
 # Step 1: App deployment ===
 st.title("Step 1: App deployment")
 st.write("In this step we deploy the CornHole Stateful Smart Contract to the Algorand TestNetwork")
 
 # deploy it if not, else doh it
 def deploy_application():
-    if st.session_state.is_app_deployed:
+    if game_worker.engine.app_id is not None:
         return
 
-    app_deployment_txn_log = st.session_state.game_engine.deploy_application(client)
-    st.session_state.submitted_transactions.append(app_deployment_txn_log)
-    st.session_state.is_app_deployed = True
+    app_deployment_txn_log = game_worker.engine.deploy_application(client)
+    game_worker.log_transaction(app_deployment_txn_log)
+    game_worker.application_deployed()
 
 # add button to deploy app
-if st.session_state.is_app_deployed:
-    st.success(f"The app is deployed on TestNet with the following app_id: {st.session_state.game_engine.app_id}")
+if game_worker.engine.app_id is not None:
+    st.success(f"The app is deployed on TestNet with the following app_id: {game_worker.engine.app_id}")
 else:
     st.error(f"The app is not deployed! Press the button below to deploy the application.")
     _ = st.button("Deploy App", on_click=deploy_application)
@@ -119,26 +121,28 @@ st.title("Step 2: Mark the start of the game")
 st.write("Ensure CornHole Devices are avaliable")
 
 #
-list_ports = list(serial.tools.list_ports.comports())
 if len(list_ports) < 4:
     st.write("Found All Devices")
-    for idx, item in enumerate(list_ports):
-        items = str(item).split()
-        devices.append(items[0])
-        st.write(items[0])
-        
+    for device in devices:
+        st.write(device)
+
+
 
 # start game logic method
 def start_game():
-    if st.session_state.is_game_started:
+    if game_worker.engine.escrow_fund_address is not None:
         return
 
-    start_game_txn_log = st.session_state.game_engine.start_game(client)
-    st.session_state.submitted_transactions.append(start_game_txn_log)
-    st.session_state.is_game_started = True
+    try:
+        start_game_txn_log = game_worker.engine.start_game(client)
+    except Exception as e:
+        # e.g. a player can not pay the bet or the node refused the group, the game has not started
+        game_worker.log_transaction(f"Rejected transaction. {e}")
+        return
+    game_worker.log_transaction(start_game_txn_log)
 
 # add start button
-if st.session_state.is_game_started:
+if game_worker.engine.escrow_fund_address is not None:
     st.success("The game has started")
 else:
     st.error(f"The game has not started! Press the button below to start the game.")
@@ -147,294 +151,79 @@ else:
 # Step 3: Execute game ===   
 st.title("Step 3: Execute game actions")
 
-# get game stat via algo indexer method
-def get_game_status(indexer, app_id):
-    response = indexer.search_applications(application_id=app_id)
-    game_status_key = "R2FtZVN0YXRl"
-
-    for global_variable in response['applications'][0]['params']['global-state']:
-        if global_variable['key'] == game_status_key:
-            return global_variable['value']['uint']
-
-
-# via game status on blockchain save to local status 
-def check_game_status():
-    if st.session_state.is_game_started:
-        game_status = get_game_status(indexer, app_id=st.session_state.game_engine.app_id)
-        st.session_state.game_status = game_status
-
-# TODO
-# Add support for QR Code scanning and player registration
+# the QR code stations are read by the game loop too, it records the first address every station scans
 def reg_action():
+    game_worker.start()
 
-    # get all serial devices on network
-    list_dev = list()
-    for dev in devices:
-        list_dev.append(serial.Serial(dev,\
-            baudrate=9600,\
-            parity=serial.PARITY_NONE,\
-            stopbits=serial.STOPBITS_ONE,\
-            bytesize=serial.EIGHTBITS,\
-            timeout=None))
-
-    # poll all devices specificall the QR code machines
-    flag_reg = True
-    while flag_reg:
-        
-        # loop thru devices
-        for _dev in list_dev:
-        
-             # if existing serial close it
-            if _dev.isOpen():
-                _dev.close()
-            
-            # open new serial
-            _dev.open()
-
-            # get response
-            resp = _dev.readline().decode("utf-8")
-
-            # parse response and register players
-            if resp:
-                resps = resp.split(',')
-                if len(resps) >= 3:
-                    try:  # needed to catch issues with some strings
-                        if len(resps[0]) > 0 and len(resps[1]) > 0 and len(resps[2]) > 0 and len(resps[3]) > 0:
-                            node_type = resps[0]
-                            player = resps[1]
-                            tick = resps[2]
-                            addr = resps[3]
-                            if 'QR' in node_type:
-                                if 'X' in player and not st.session_state.player_x_flag:
-                                    st.session_state.player_x_flag = True
-                                    st.session_state.local_log.append('Player X: ' + addr + ' Registered')
-                                    st.write('Player X: ' + addr + ' Registered')
-                                if 'O' in player and not st.session_state.player_o_flag:
-                                    st.session_state.player_o_flag = True
-                                    st.session_state.local_log.append('Player O: ' + addr + ' Registered')
-                                    st.write('Player O: ' + payload + ' Registered')
-
-                                #st.write(resp)
-                    except:
-                        pass
-                           
-            # if both player registered flag it                    
-            if st.session_state.player_x_flag and st.session_state.player_o_flag and not st.session_state.players_reg_flag:
-                st.session_state.players_reg_flag = True
-                st.session_state.local_log.append('Both Players Registered')
-                st.write('Both Players Registered')
-                flag_reg = False
-
-            _dev.close()
-
-
-# where all the action happens            
+# where all the action happens, the game loop runs in the background worker and the page only shows its state
 def play_action(action_idx):
-        
-        # get all serial devices on network
-        list_dev = list()
-        for dev in devices:
-            list_dev.append(serial.Serial(dev,\
-                baudrate=9600,\
-                parity=serial.PARITY_NONE,\
-                stopbits=serial.STOPBITS_ONE,\
-                bytesize=serial.EIGHTBITS,\
-                timeout=None))
-
-        # poll all devices specificall the QR code machines
-        flag_reg = True
-        while flag_reg:
-            
-            # loop thru devices
-            for _dev in list_dev:
-            
-                 # if existing serial close it
-                if _dev.isOpen():
-                    _dev.close()
-                
-                # open new serial
-                _dev.open()
-
-                # get response
-                resp = _dev.readline().decode("utf-8")
-                #st.write(resp)
-
-                # parse response and register players
-                if resp:
-                
-                    # split our csv string
-                    resps = resp.split(',')
-                    
-                    # ensure enough parameters?
-                    if len(resps) >= 3:
-                        try:  # needed to catch issues with some broken strings, so try?
-                            if len(resps[0]) > 0 and len(resps[1]) > 0 and len(resps[2]) > 0 and len(resps[3]) > 0:
-                                
-                                # string good so parse in info
-                                node_type = resps[0]
-                                player = resps[1]
-                                tick = resps[2]
-                                score = resps[3]
-                                
-                                # based on node type and player start play action
-                                instant_score = 0
-                                if 'BRD' in node_type:
-                                
-                                    # player 'X' is up
-                                    if 'X' in player:
-                                    
-                                        # make sure serial determines player turn and log it
-                                        st.session_state.player_turn == "X"
-                                        st.session_state.local_log.append('Player X Scored: ' + score)
-                                                                                
-                                        # convert to intermediate scoring
-                                        if int(score) == 1:
-                                            st.session_state.player_x_local_score = st.session_state.player_x_local_score + 1
-                                            instant_score = 1
-                                        if int(score) == 3:
-                                            st.session_state.player_x_local_score = st.session_state.player_x_local_score + 3
-                                            instant_score = 3                                          
-                                    
-                                    # player 'O' is up
-                                    if 'O' in player:
-                                    
-                                        # ...
-                                        st.session_state.player_turn == "O" 
-                                        st.session_state.local_log.append('Player O Scored: ' + score)
-                                        
-                                        # ...
-                                        if int(score) == 1:
-                                            st.session_state.player_o_local_score = st.session_state.player_o_local_score + 1
-                                            instant_score = 1
-                                        if int(score) == 3:
-                                            st.session_state.player_o_local_score = st.session_state.player_o_local_score + 3
-                                            instant_score = 3
-
-                                    # blockchain interaction here
-                                    try:  # try to send something to blockchain
-                                        play_action_txn = st.session_state.game_engine.play_action(client,
-                                                                                                   player_id=st.session_state.player_turn,
-                                                                                                   action_position=instant_score)
-                                    except:  # tx failed?
-                                        st.session_state.submitted_transactions.append(f"Rejected transaction. Tried to put "
-                                                                                       f"{st.session_state.player_turn} scored {instant_score}")
-                                        return          
-                                    
-                                    # save tx info
-                                    st.session_state.submitted_transactions.append(play_action_txn)
-                                    
-                                    # save local state info and swap players
-                                    if st.session_state.player_turn == "X":
-                                        
-                                        # ...
-                                        st.session_state.x_state = instant_score + st.session_state.x_state
-                                        st.session_state.player_turn = "O"
-                                    else:
-                                    
-                                        #
-                                        st.session_state.o_state = instant_score + st.session_state.o_state
-                                        st.session_state.player_turn = "X"                                        
-
-                                    # need to delay here!
-                                    time.sleep(10)
-                                    
-                                    # then check game status on blockchain
-                                    check_game_status()
-                                    
-                                    # alert we done and next turn player
-                                    playsound('turn.mp3')
-
-                        except:  # if we err out just pass
-                            pass
-                               
-                # player won by pt threshold, then kick out gracefully                    
-                if st.session_state.player_o_local_score >= 3 or st.session_state.player_x_local_score >= 3 and not st.session_state.game_local_finished:
-                    st.session_state.game_local_finished = True
-                    st.session_state.local_log.append('Game Finished')
-                    flag_reg = False
-                    _dev.close() 
-                    break
-
-                # yep we got here and we must close
-                _dev.close()        
-
-# TODO 
+    game_worker.start()
+
 # add registration button for scanning QR codes
-#_ = st.button("Register to Play CornHole", on_click=reg_action)                   
+_ = st.button("Register to Play CornHole", on_click=reg_action)
 
 # add button to start play actions              
 _ = st.button('Play CornHole', on_click=play_action,
-              args=(0,))              
+              args=(0,))
 
-# show current pts
-st.title("Game Points: ")
-st.write(f"x_state: {st.session_state.x_state}")
-st.write(f"o_state: {st.session_state.o_state}")
 
-# Step 4: Withdraw funds ===
+def show_game():
+    game = game_worker.snapshot()
 
+    # show who has registered at the QR code stations
+    for player_id in ("X", "O"):
+        address = game['registrations'].get(player_id)
+        if address is not None:
+            st.success(f"Player {player_id}: {address} Registered")
+        elif game['is_running']:
+            st.write(f"Waiting for player {player_id} to scan the QR code")
 
-# winner get his/her money
-def withdraw_funds(winner):
-    if winner is None:
-        try:
-            fund_escrow_txn = st.session_state.game_engine.fund_escrow(client=client)
-            st.session_state.submitted_transactions.append(fund_escrow_txn)
+    # show current pts, the throws still waiting for their confirmation already count
+    st.title("Game Points: ")
+    st.write(f"x_state: {game['player_x_local_score']} (confirmed: {game['x_state']})")
+    st.write(f"o_state: {game['player_o_local_score']} (confirmed: {game['o_state']})")
 
-            st.session_state.submitted_transactions.append(txn_description)
-        except:
-            st.session_state.submitted_transactions.append("Rejected transaction. Unsuccessful withdrawal.")
-    else:
-        try:
-            fund_escrow_txn = st.session_state.game_engine.fund_escrow(client=client)
-            st.session_state.submitted_transactions.append(fund_escrow_txn)
+    # Step 4: Withdraw funds ===
+    # the worker refunds the winner as soon as the game status on the blockchain has a winner
+    if game['game_status'] == 0:
 
-            txn_description = st.session_state.game_engine.win_money_refund(client, player_id=winner)
-            st.session_state.submitted_transactions.append(txn_description)
-        except:
-            st.session_state.submitted_transactions.append("Rejected transaction. Unsuccessful withdrawal.")
+        # game still going on...
+        st.write("The game is still active.")
 
-# go here every refresh and check winner
-if st.session_state.game_status == 0:
+    else:
 
-    # game still going on...
-    st.write("The game is still active.")
+        # we have winner
+        winner = "X" if game['game_status'] == 1 else "O"
+        if not st.session_state.is_winner_announced:
+            st.session_state.is_winner_announced = True
+            st.balloons()
+            threading.Thread(target=playsound, args=('win.mp3',), daemon=True).start()
+        st.success(f"Player {winner} won the game.")
 
-else:
+    # Step 5: Log it ===
+    st.title("Submitted transactions")
 
-    # we have winner
-    winner = None
-    if st.session_state.game_status == 1:
-        st.balloons()
-        playsound('win.mp3')
-        st.success("Player X won the game.")
-        winner = "X"
-    elif st.session_state.game_status == 2:
-        st.balloons()
-        playsound('win.mp3')
-        st.success("Player O won the game.")
-        winner = "O"
-    
-    # need some delay!
-    time.sleep(5)
-    
-    # call method for delegating money
-    withdraw_funds(winner)
-    
-    
-# Step 5: Log it === 
-st.title("Submitted transactions")
+    # log events on blockchain txs
+    for txn in game['submitted_transactions']:
+        if "Rejected transaction." in txn:
+            st.error(txn)
+        else:
+            st.success(txn)
 
-# log events on blockchain txs  
-for txn in st.session_state.submitted_transactions:
-    if "Rejected transaction." in txn:
-        st.error(txn)
-    else:
-        st.success(txn)
+    # log events locally
+    st.title("Local log")
 
-# log events locally
-st.title("Local log")
+    # ...
+    for logit in game['local_log']:
+        st.success(logit)
 
-# ...
-for logit in st.session_state.local_log:
-    st.success(logit)
\ No newline at end of file
+
+# refresh the state of the game every second, without rerunning the whole page where st.fragment exists
+if fragment is not None:
+    fragment(run_every=1)(show_game)()
+else:
+    show_game()
+    # the pinned streamlit has no fragments, the browser reloads the whole page a second later while the game is
+    # played, so the script is not held for that second
+    if game_worker.is_running:
+        components.html("<script>setTimeout(() => window.parent.location.reload(), 1000)</script>", height=0)
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark of the serial frame parser against the decode/split parsing that app.py used per line.
+
+    python -m benchmarks.frame_parser_bench --lines 200000
+    python -m benchmarks.frame_parser_bench --lines 200000 --read-size 4096
+
+With --read-size the lines are handed over in reads of about that many bytes, cut at line ends so that the old loop
+sees the same lines, as the ingest hub feeds the parser. Without it every line is parsed in a single call, which also
+keeps all of the decoded events alive at once.
+"""
+import argparse
+import time
+from typing import List, Optional
+
+from src.serial_utils.frame_parser import FrameParser
+
+QR_ADDRESS = "GD64YIY3TWGDMCNPP553DZPPR6LDUSFQOIJVFDPPXWEG3FVOJCCDBBHU5A"
+
+
+def make_chunk(lines: int) -> bytes:
+    frames = []
+    for idx in range(lines):
+        if idx % 50 == 0:
+            frames.append(f"QR,X,{1633000000 + idx},{QR_ADDRESS}\r\n")
+        elif idx % 97 == 0:
+            frames.append(f"BRD,O,{idx},\r\n")  # garbled frame, as sent by a bouncing board
+        else:
+            frames.append(f"BRD,{'XO'[idx % 2]},{idx},{(1, 3)[idx % 3 == 0]}\r\n")
+    return "".join(frames).encode("ascii")
+
+
+def split_reads(chunk: bytes, read_size: int) -> List[bytes]:
+    reads = []
+    start = 0
+    while start < len(chunk):
+        end = chunk.find(b'\n', start + read_size) + 1 or len(chunk)
+        reads.append(chunk[start:end])
+        start = end
+    return reads
+
+
+def legacy_parse(chunk: bytes) -> int:
+    parsed = 0
+    for raw in chunk.split(b'\n')[:-1]:
+        resp = raw.decode("utf-8")
+        if resp:
+            resps = resp.split(',')
+            if len(resps) >= 3:
+                try:
+                    if len(resps[0]) > 0 and len(resps[1]) > 0 and len(resps[2]) > 0 and len(resps[3]) > 0:
+                        node_type = resps[0]
+                        player = resps[1]
+                        if 'BRD' in node_type and ('X' in player or 'O' in player):
+                            int(resps[3])
+                        parsed += 1
+                except:
+                    pass
+    return parsed
+
+
+def frame_parser_parse(chunk: bytes, parser: Optional[FrameParser] = None) -> int:
+    return len((parser or FrameParser()).feed(memoryview(chunk)))
+
+
+def best_of(func, reads: List[bytes], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for read in reads:
+            func(read)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--read-size", type=int, default=0, help="bytes per read, 0 parses everything at once")
+    args = parser.parse_args()
+
+    chunk = make_chunk(args.lines)
+    reads = split_reads(chunk, args.read_size) if args.read_size else [chunk]
+    frame_parser = FrameParser()
+
+    for name, func in (("legacy decode/split", legacy_parse),
+                       ("FrameParser.feed", lambda read: frame_parser_parse(read, frame_parser))):
+        elapsed = best_of(func, reads, args.repeat)
+        print(f"{name:>20}: {args.lines / elapsed:12,.0f} lines/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Load test of the GameManager with many simulated tables.
+
+Every table gets an engine whose play_action only sleeps for the simulated confirmation time, so the numbers show how
+well the manager spreads the work of the tables over its executor. One table is made slow on purpose to show that it
+does not hold up the others.
+
+    python -m benchmarks.game_manager_load --tables 16 --throws 20 --confirmation 0.05
+"""
+import argparse
+import random
+import time
+
+from src.serial_utils.frame_parser import BoardEvent
+from src.services.game_manager import GameManager
+
+
+class SimulatedEngine:
+
+    def __init__(self, confirmation_time: float):
+        self.confirmation_time = confirmation_time
+
+    def play_action(self, client, player_id: str, action_position: int):
+        time.sleep(self.confirmation_time * random.uniform(0.5, 1.5))
+        return f"{player_id} has point(s) {action_position}"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=16)
+    parser.add_argument("--throws", type=int, default=20, help="throws per table")
+    parser.add_argument("--confirmation", type=float, default=0.05, help="simulated confirmation time in seconds")
+    parser.add_argument("--slow-factor", type=float, default=20.0, help="confirmation time multiplier of table 0")
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    manager = GameManager(client=None, max_workers=args.workers)
+
+    for table in range(args.tables):
+        confirmation = args.confirmation * (args.slow_factor if table == 0 else 1.0)
+        manager.add_table(f"table_{table}",
+                          SimulatedEngine(confirmation),
+                          board_nodes={f"T{table}X": "X", f"T{table}O": "O"})
+
+    pending = []
+    latencies = {table: [] for table in range(args.tables)}
+    started = time.perf_counter()
+
+    def record(table, submitted_at):
+        return lambda _: latencies[table].append(time.perf_counter() - submitted_at)
+
+    for throw in range(args.throws):
+        for table in range(args.tables):
+            node_name = f"T{table}{'XO'[throw % 2]}"
+            event = BoardEvent("sim", node_name, throw, 1, time.perf_counter())
+            future = manager.route_event(event)
+            future.add_done_callback(record(table, event.received_at))
+            pending.append(future)
+
+    for future in pending:
+        future.result()
+
+    elapsed = time.perf_counter() - started
+    manager.shutdown()
+
+    fast = [latency for table, values in latencies.items() if table != 0 for latency in values]
+    fast_elapsed = max(fast)
+    print(f"tables: {args.tables}, throws: {args.tables * args.throws}, elapsed: {elapsed:.2f} s, "
+          f"throughput: {args.tables * args.throws / elapsed:.1f} throws/sec")
+    print(f"other tables, time until last throw confirmed: {fast_elapsed:.2f} s "
+          f"(p50 {percentile(fast, 0.5):.2f} s), throughput: {len(fast) / fast_elapsed:.1f} throws/sec")
+    print(f"slow table, time until last throw confirmed: {max(latencies[0]):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Plays games against the local algod/indexer stand-in with injected failures and compares three ways of sending the
+play_action transactions:
+
+- single: one send, as before the IdempotentSubmitter, any error drops the throw.
+- naive: on an error play_action is built and sent again, with the same backoff as the submitter.
+- idempotent: the IdempotentSubmitter, the same bytes are resent and a transaction the node already has is recognised.
+
+The faults are switched on once every game has started: 429 responses to any request, groups dropped from the pool
+and accepted transactions whose response is lost. For every throw the ledger of the stand-in tells whether it was
+applied, so the run counts the throws that were lost, applied twice, or applied while the client saw an error and
+rolled the score back.
+
+    python -m benchmarks.idempotent_submission_load --games 8 --throws 30 --rate-limit-probability 0.1 \\
+        --response-loss-probability 0.1
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from algosdk import account
+from algosdk.v2client import algod
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.blockchain_utils.idempotent_submitter import IdempotentSubmitter
+from src.blockchain_utils.local_node import LocalNetwork, LocalNodeServer
+from src.blockchain_utils.transaction_repository import get_default_suggested_params
+from src.services.game_engine_service import GameEngineService
+
+MODES = ("single", "naive", "idempotent")
+
+
+def send_throw(client: algod.AlgodClient, engine: GameEngineService, player_id: str, mode: str, txids: list,
+               backoff: IdempotentSubmitter) -> str:
+    if mode == "idempotent":
+        txid = engine.send_play_action(client, player_id, 0)
+        txids.append(txid)
+        return txid
+
+    attempt = 0
+    while True:
+        attempt += 1
+        txn = engine._build_play_action(player_id, 0, get_default_suggested_params(client=client))
+        txids.append(txn.transaction.get_txid())
+        try:
+            return client.send_transaction(txn)
+        except Exception:
+            if mode == "single" or attempt >= backoff.max_attempts:
+                raise
+        time.sleep(random.uniform(0.0, min(backoff.max_delay, backoff.base_delay * 2 ** (attempt - 1))))
+
+
+def play_game(client: algod.AlgodClient, engine: GameEngineService, throws: int, mode: str) -> list:
+    """
+    :return:
+        Returns (txids sent for the throw, whether the client saw the throw confirmed) of every throw.
+    """
+    tracker = ConfirmationTracker.for_client(client)
+    backoff = IdempotentSubmitter.for_client(client)
+    results = []
+
+    for throw in range(throws):
+        txids = []
+        try:
+            txid = send_throw(client, engine, "XO"[throw % 2], mode, txids, backoff)
+            tracker.wait(txid)
+            results.append((txids, True))
+        except Exception:
+            results.append((txids, False))
+
+    return results
+
+
+def run(mode: str, args) -> dict:
+    network = LocalNetwork(block_time=args.block_time, latency=args.latency, seed=args.seed)
+    server = LocalNodeServer(network, port=0)
+    server.start()
+    client = algod.AlgodClient("local", server.address)
+
+    engines = []
+    for _ in range(args.games):
+        (creator_pk, creator_address), (x_pk, x_address), (o_pk, o_address) = [account.generate_account()
+                                                                               for _ in range(3)]
+        engines.append(GameEngineService(creator_pk, creator_address, x_pk, x_address, o_pk, o_address))
+
+    with ThreadPoolExecutor(max_workers=args.games) as executor:
+        list(executor.map(lambda engine: engine.deploy_application(client), engines))
+    GameEngineService.start_games(client, engines, preflight=False)
+    tracker = ConfirmationTracker.for_client(client)
+    while tracker.pending_count:
+        time.sleep(0.05)
+
+    network.rate_limit_probability = args.rate_limit_probability
+    network.drop_probability = args.drop_probability
+    network.response_loss_probability = args.response_loss_probability
+    requests_before = network.stats()["requests"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.games) as executor:
+        games = list(executor.map(lambda engine: play_game(client, engine, args.throws, mode), engines))
+    elapsed = time.perf_counter() - started
+
+    network.rate_limit_probability = network.drop_probability = network.response_loss_probability = 0.0
+    while tracker.pending_count:
+        time.sleep(0.05)
+    # transactions the client gave up on may still be in the pool
+    network.status_after_block(network.stats()["round"] + 1)
+
+    result = {"applied": 0, "lost": 0, "double": 0, "phantom": 0, "elapsed": elapsed,
+              "requests": network.stats()["requests"] - requests_before, "stand-in": network.stats(),
+              "submitter": IdempotentSubmitter.for_client(client).stats()}
+    for throws in games:
+        for txids, seen_confirmed in throws:
+            applied = sum(1 for txid in txids
+                          if (network.pending_transaction_info(txid) or {}).get('confirmed-round'))
+            result["applied"] += applied == 1
+            result["lost"] += applied == 0
+            result["double"] += applied > 1
+            result["phantom"] += applied > 0 and not seen_confirmed
+
+    server.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=8)
+    parser.add_argument("--throws", type=int, default=30, help="throws of every game")
+    parser.add_argument("--block-time", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--rate-limit-probability", type=float, default=0.1)
+    parser.add_argument("--drop-probability", type=float, default=0.0)
+    parser.add_argument("--response-loss-probability", type=float, default=0.1)
+    parser.add_argument("--mode", choices=MODES, action="append", help="modes to run, all of them by default")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    for mode in args.mode or MODES:
+        result = run(mode, args)
+        throws = args.games * args.throws
+        print(f"{mode:>10}: {result['applied']}/{throws} throws applied once, {result['lost']} lost, "
+              f"{result['double']} applied twice, {result['phantom']} applied but reported failed; "
+              f"{result['applied'] / result['elapsed']:.1f} applied throws/s, {result['requests']} requests in "
+              f"{result['elapsed']:.2f} s")
+        if mode == "idempotent":
+            print(f"{'':>10}  submitter: {result['submitter']}")
+        print(f"{'':>10}  stand-in: {result['stand-in']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Load test of the serial ingest hub over pseudo terminal pairs.
+
+Every simulated board writes BRD lines whose tick field carries the host time of the write, so the hub side can
+measure the throw-to-event latency next to the events/sec throughput.
+
+    python -m benchmarks.ingest_hub_load --ports 8 --events 2000
+"""
+import argparse
+import os
+import threading
+import time
+import tty
+
+from src.serial_utils.ingest_hub import SerialIngestHub
+
+
+def open_pty_pair():
+    controller, device = os.openpty()
+    tty.setraw(device)
+    return controller, os.ttyname(device), device
+
+
+def simulate_board(controller: int, node_name: str, events: int, interval: float):
+    for _ in range(events):
+        line = f"BRD,{node_name},{time.perf_counter_ns()},1\r\n"
+        os.write(controller, line.encode("ascii"))
+        if interval:
+            time.sleep(interval)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ports", type=int, default=8)
+    parser.add_argument("--events", type=int, default=2000, help="events written per port")
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds between writes of a single board")
+    args = parser.parse_args()
+
+    pairs = [open_pty_pair() for _ in range(args.ports)]
+    hub = SerialIngestHub(devices=[name for _, name, _ in pairs])
+    hub.start()
+
+    boards = [threading.Thread(target=simulate_board, args=(controller, f"B{idx}", args.events, args.interval))
+              for idx, (controller, _, _) in enumerate(pairs)]
+
+    expected = args.ports * args.events
+    latencies = []
+    started = time.perf_counter()
+
+    for board in boards:
+        board.start()
+
+    while len(latencies) < expected:
+        event = hub.get_event(timeout=5.0)
+        if event is None:
+            break
+        latencies.append(event.received_at - event.tick / 1e9)
+
+    elapsed = time.perf_counter() - started
+    hub.stop()
+
+    for controller, _, device in pairs:
+        os.close(controller)
+        os.close(device)
+
+    print(f"ports: {args.ports}, events: {len(latencies)}/{expected}, malformed: {hub.frames_malformed}")
+    print(f"throughput: {len(latencies) / elapsed:.0f} events/sec")
+    if latencies:
+        print(f"latency p50: {percentile(latencies, 0.5) * 1e3:.3f} ms, "
+              f"p99: {percentile(latencies, 0.99) * 1e3:.3f} ms, "
+              f"max: {max(latencies) * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
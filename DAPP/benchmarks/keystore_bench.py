@@ -0,0 +1,96 @@
+"""
+Benchmark of bulk account provisioning into the keystore against the add_account_to_config loop it replaces, which
+reads and rewrites the whole config.yml for every account, and of the account lookups.
+
+    python -m benchmarks.keystore_bench --legacy-accounts 500 --accounts 10000 --workers 4
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from src.blockchain_utils.keystore import Keystore, generate_accounts
+
+
+def legacy_add_account(config_location: Path):
+    (private_key, address, passphrase), = generate_accounts(1)
+
+    with open(config_location, 'r') as file:
+        cur_yaml = yaml.full_load(file)
+        total_accounts = cur_yaml.get("accounts").get("total")
+
+        curr_account = total_accounts + 1
+        cur_yaml["accounts"].update({f"account_{curr_account}": {"private_key": private_key,
+                                                                 "address": address,
+                                                                 "mnemonic": passphrase}})
+        cur_yaml["accounts"]["total"] = curr_account
+
+    with open(config_location, 'w') as file:
+        yaml.safe_dump(cur_yaml, file)
+
+
+def legacy_lookup(config_location: Path, account_id: int):
+    with open(config_location) as file:
+        config = yaml.full_load(file)
+    return config.get("accounts").get(f"account_{account_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--legacy-accounts", type=int, default=500)
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp())
+
+    config_location = directory / "config.yml"
+    with open(config_location, "w") as file:
+        yaml.safe_dump({"accounts": {"total": 0}}, file)
+
+    started = time.perf_counter()
+    for _ in range(args.legacy_accounts):
+        legacy_add_account(config_location)
+    legacy_elapsed = time.perf_counter() - started
+    print(f"add_account_to_config loop: {args.legacy_accounts} accounts in {legacy_elapsed:.2f} s, "
+          f"{args.legacy_accounts / legacy_elapsed:.0f} accounts/sec")
+
+    for workers in sorted({1, args.workers}):
+        keystore = Keystore(directory / f"keystore_{workers}.json")
+        started = time.perf_counter()
+        keystore.provision(args.accounts, workers=workers)
+        elapsed = time.perf_counter() - started
+        print(f"provision, {workers} worker(s): {args.accounts} accounts in {elapsed:.2f} s, "
+              f"{args.accounts / elapsed:.0f} accounts/sec")
+
+    started = time.perf_counter()
+    keystore = Keystore(keystore.path)
+    len(keystore)
+    print(f"keystore load: {(time.perf_counter() - started) * 1000:.1f} ms for {len(keystore)} accounts")
+
+    numbers = [random.randint(1, args.accounts) for _ in range(args.lookups)]
+    addresses = [keystore.get(number)[1] for number in numbers]
+
+    started = time.perf_counter()
+    for number in numbers:
+        keystore.get(number)
+    by_number = (time.perf_counter() - started) / args.lookups
+    started = time.perf_counter()
+    for address in addresses:
+        keystore.get_by_address(address)
+    by_address = (time.perf_counter() - started) / args.lookups
+    print(f"lookup by number {by_number * 1e6:.2f} us, by address {by_address * 1e6:.2f} us")
+
+    started = time.perf_counter()
+    legacy_lookup(config_location, args.legacy_accounts)
+    print(f"config.yml lookup with {args.legacy_accounts} accounts: "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Load test of whole games against the local algod/indexer stand-in, no network needed.
+
+Every game deploys the application, starts the game, plays throws until the chain reports a winner and refunds the
+winner, all of the games run at the same time. The stand-in runs in this process unless --address points at one that
+is already running (python -m src.blockchain_utils.local_node).
+
+    python -m benchmarks.local_network_load --games 8 --block-time 0.5 --latency 0.02 --latency-jitter 0.05
+
+--metrics-json records the per-stage latency histograms during the run and writes them to the given file.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from algosdk import account
+from algosdk.v2client import algod
+
+from benchmarks.game_manager_load import percentile
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.blockchain_utils.local_node import LocalNetwork, LocalNodeServer
+from src.metrics_utils.metrics import METRICS
+from src.services.game_engine_service import GameEngineService
+from src.services.game_state_reader import GameStateReader
+
+
+def play_game(client: algod.AlgodClient, max_throws: int) -> list:
+    (creator_pk, creator_address), (x_pk, x_address), (o_pk, o_address) = [account.generate_account()
+                                                                           for _ in range(3)]
+    engine = GameEngineService(creator_pk, creator_address, x_pk, x_address, o_pk, o_address)
+
+    engine.deploy_application(client)
+    reader = GameStateReader(client, engine.app_id)
+    reader.snapshot()
+    engine.start_game(client)
+
+    # start_game does not wait for its group, the reader sees the setup once the confirmation tracker does
+    while reader.snapshot().funds_escrow_address is None:
+        time.sleep(0.05)
+
+    throw_latencies = []
+    try:
+        for throw in range(max_throws):
+            started = time.perf_counter()
+            engine.play_action(client, player_id="XO"[throw % 2], action_position=random.randint(0, 1))
+            throw_latencies.append(time.perf_counter() - started)
+
+            game_status = reader.game_status()
+            if game_status != 0:
+                engine.fund_escrow(client)
+                engine.win_money_refund(client, player_id="X" if game_status == 1 else "O")
+                break
+    finally:
+        reader.close()
+
+    return throw_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=8)
+    parser.add_argument("--max-throws", type=int, default=40)
+    parser.add_argument("--address", default=None, help="address of a running stand-in")
+    parser.add_argument("--block-time", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0)
+    parser.add_argument("--drop-probability", type=float, default=0.0)
+    parser.add_argument("--metrics-json", default=None, help="file the per-stage latency histograms are written to")
+    args = parser.parse_args()
+
+    if args.metrics_json:
+        METRICS.enable()
+
+    server = None
+    address = args.address
+    if address is None:
+        network = LocalNetwork(block_time=args.block_time,
+                               latency=args.latency,
+                               latency_jitter=args.latency_jitter,
+                               rate_limit_probability=args.rate_limit_probability,
+                               drop_probability=args.drop_probability)
+        server = LocalNodeServer(network, port=0)
+        server.start()
+        address = server.address
+
+    client = algod.AlgodClient("local", address)
+
+    started = time.perf_counter()
+    latencies, failures = [], []
+    with ThreadPoolExecutor(max_workers=args.games) as executor:
+        futures = [executor.submit(play_game, client, args.max_throws) for _ in range(args.games)]
+        for future in futures:
+            try:
+                latencies += future.result()
+            except Exception as e:
+                failures.append(e)
+    elapsed = time.perf_counter() - started
+
+    # the refund groups are only tracked, let them confirm before the stand-in goes away
+    tracker = ConfirmationTracker.for_client(client)
+    deadline = time.monotonic() + 10 * args.block_time
+    while tracker.pending_count and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    print(f"games: {args.games} ({len(failures)} failed), throws: {len(latencies)}, elapsed: {elapsed:.2f} s, "
+          f"throughput: {len(latencies) / elapsed:.1f} throws/sec, {(args.games - len(failures)) / elapsed:.2f} "
+          f"games/sec")
+    if latencies:
+        print(f"throw latency p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms")
+    for failure in failures[:5]:
+        print(f"failure: {failure}")
+
+    if args.metrics_json:
+        METRICS.dump_json(args.metrics_json)
+        print(f"metrics written to {args.metrics_json}")
+
+    if server is not None:
+        print(f"stand-in: {server.network.stats()}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
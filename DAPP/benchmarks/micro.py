@@ -0,0 +1,297 @@
+"""
+Micro-benchmarks of the CPU hot paths of a throw: serial parsing, transaction building, group ids, signing, LogicSig
+wrapping and PyTeal compilation, and of the config and client lookups that run on every page rerun. Nothing here
+touches the network.
+
+Results can be stored as a JSON baseline and later runs compared against it; a case whose median got slower than the
+threshold is flagged and the run exits with status 1.
+
+    python -m benchmarks.micro                          # run all cases
+    python -m benchmarks.micro --filter sign            # run the cases whose name contains "sign"
+    python -m benchmarks.micro --save                   # store the results as the baseline
+    python -m benchmarks.micro --compare --threshold 0.2
+"""
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import timeit
+from pathlib import Path
+
+import yaml
+from algosdk import account
+from algosdk.future import transaction as algo_txn
+from pyteal import Mode, compileTeal
+
+from benchmarks.frame_parser_bench import make_chunk
+from src.blockchain_utils import credentials
+from src.blockchain_utils.transaction_repository import ApplicationTransactionRepository, \
+    PaymentTransactionRepository
+from src.serial_utils.event_debouncer import EventDebouncer
+from src.serial_utils.frame_parser import FrameParser, encode_registration
+from src.services.game_engine_service import GameEngineService, TEAL_VERSION
+from src.smart_contracts.cornhole_asc1 import approval_program
+from src.smart_contracts.game_funds_escrow import game_funds_escorw
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+
+# the escrow of app id 1 assembled with TEAL 4, the exact bytes do not matter for signing
+ESCROW_PROGRAM = bytes.fromhex("0420010131")
+
+# lines per parse_lines call
+PARSE_LINES = 1000
+
+# registrations per parse_registrations_* call, from a handful of players like at a real table
+PARSE_REGISTRATIONS = 100
+PLAYER_ADDRESSES = [account.generate_account()[1] for _ in range(4)]
+
+CASES = {}
+
+
+def case(name):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def suggested_params() -> algo_txn.SuggestedParams:
+    return algo_txn.SuggestedParams(fee=1000,
+                                    first=1000,
+                                    last=2000,
+                                    gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=",
+                                    gen="testnet-v1.0",
+                                    flat_fee=True)
+
+
+def make_engine() -> GameEngineService:
+    (creator_pk, creator_address), (x_pk, x_address), (o_pk, o_address) = [account.generate_account()
+                                                                           for _ in range(3)]
+    engine = GameEngineService(creator_pk, creator_address, x_pk, x_address, o_pk, o_address)
+    engine.app_id = 1
+    engine.escrow_fund_program_bytes = ESCROW_PROGRAM
+    engine.escrow_fund_address = algo_txn.LogicSig(ESCROW_PROGRAM).address()
+    return engine
+
+
+@case("parse_lines")
+def bench_parse_lines():
+    chunk = make_chunk(PARSE_LINES)
+    parser = FrameParser("bench")
+    return lambda: parser.feed(chunk, 0.0)
+
+
+@case("parse_registrations_text")
+def bench_parse_registrations_text():
+    chunk = b"".join(f"QR,X,{1633000000 + idx},{PLAYER_ADDRESSES[idx % len(PLAYER_ADDRESSES)]}\r\n".encode()
+                     for idx in range(PARSE_REGISTRATIONS))
+    parser = FrameParser("bench")
+    return lambda: parser.feed(chunk, 0.0)
+
+
+@case("parse_registrations_binary")
+def bench_parse_registrations_binary():
+    chunk = b"".join(encode_registration("X", 1633000000 + idx, PLAYER_ADDRESSES[idx % len(PLAYER_ADDRESSES)])
+                     for idx in range(PARSE_REGISTRATIONS))
+    parser = FrameParser("bench")
+    return lambda: parser.feed(chunk, 0.0)
+
+
+@case("debounce_lines")
+def bench_debounce_lines():
+    events = FrameParser("bench").feed(make_chunk(PARSE_LINES), 0.0)
+
+    def run():
+        debouncer = EventDebouncer("bench")
+        for event in events:
+            debouncer.accept(event)
+    return run
+
+
+@case("build_call_application")
+def bench_build_call_application():
+    engine, sp = make_engine(), suggested_params()
+    return lambda: ApplicationTransactionRepository.call_application(client=None,
+                                                                     caller_private_key=engine.player_x_pk,
+                                                                     app_id=1,
+                                                                     on_complete=algo_txn.OnComplete.NoOpOC,
+                                                                     app_args=["ActionMove", 1],
+                                                                     sign_transaction=False,
+                                                                     suggested_params=sp)
+
+
+@case("build_payment")
+def bench_build_payment():
+    engine, sp = make_engine(), suggested_params()
+    return lambda: PaymentTransactionRepository.payment(client=None,
+                                                        sender_address=engine.player_x_address,
+                                                        receiver_address=engine.escrow_fund_address,
+                                                        amount=1000000,
+                                                        sender_private_key=None,
+                                                        sign_transaction=False,
+                                                        suggested_params=sp)
+
+
+@case("sign_call_application")
+def bench_sign_call_application():
+    engine, sp = make_engine(), suggested_params()
+    txn = algo_txn.ApplicationCallTxn(engine.player_x_address, sp, 1, algo_txn.OnComplete.NoOpOC,
+                                      app_args=["ActionMove", 1])
+    return lambda: txn.sign(engine.player_x_pk)
+
+
+@case("calculate_group_id")
+def bench_calculate_group_id():
+    engine, sp = make_engine(), suggested_params()
+    txns = [algo_txn.ApplicationCallTxn(engine.app_creator_address, sp, 1, algo_txn.OnComplete.NoOpOC,
+                                        app_args=["SetupPlayers"]),
+            algo_txn.PaymentTxn(engine.player_x_address, sp, engine.escrow_fund_address, 1000000),
+            algo_txn.PaymentTxn(engine.player_o_address, sp, engine.escrow_fund_address, 1000000)]
+    return lambda: algo_txn.calculate_group_id(txns)
+
+
+@case("logic_sig_wrap")
+def bench_logic_sig_wrap():
+    engine, sp = make_engine(), suggested_params()
+    txn = algo_txn.PaymentTxn(engine.escrow_fund_address, sp, engine.player_x_address, 2000000)
+    return lambda: algo_txn.LogicSigTransaction(txn, algo_txn.LogicSig(ESCROW_PROGRAM))
+
+
+@case("play_action_build_sign")
+def bench_play_action():
+    engine, sp = make_engine(), suggested_params()
+    return lambda: engine._build_play_action("X", 1, sp)
+
+
+@case("start_game_group")
+def bench_start_game_group():
+    engine, sp = make_engine(), suggested_params()
+    return lambda: engine._build_start_game_group(sp)
+
+
+@case("win_money_refund_group")
+def bench_win_money_refund_group():
+    engine, sp = make_engine(), suggested_params()
+    return lambda: engine._build_win_money_refund_group("X", sp)
+
+
+@case("compile_teal_approval")
+def bench_compile_teal_approval():
+    return lambda: compileTeal(approval_program(), mode=Mode.Application, version=TEAL_VERSION)
+
+
+@case("compile_teal_escrow")
+def bench_compile_teal_escrow():
+    return lambda: compileTeal(game_funds_escorw(1), mode=Mode.Signature, version=TEAL_VERSION)
+
+
+def use_bench_config():
+    """
+    Points credentials at a config.yml with generated accounts, the one of the repository only holds placeholders.
+    """
+    accounts = {"total": 3}
+    for number in range(1, 4):
+        private_key, address = account.generate_account()
+        accounts[f"account_{number}"] = {"private_key": private_key, "address": address, "mnemonic": ""}
+
+    location = Path(tempfile.mkdtemp()) / "config.yml"
+    with open(location, "w") as file:
+        yaml.safe_dump({"accounts": accounts,
+                        "client_credentials": {"address": "http://127.0.0.1:4001",
+                                               "indexer_address": "http://127.0.0.1:8980",
+                                               "token": "a" * 64}}, file)
+
+    credentials.get_config_location = lambda: str(location)
+    credentials.invalidate_config()
+
+
+@case("load_config_cached")
+def bench_load_config_cached():
+    use_bench_config()
+    return credentials.load_config
+
+
+@case("load_config_parse")
+def bench_load_config_parse():
+    use_bench_config()
+
+    def parse():
+        credentials.invalidate_config()
+        return credentials.load_config()
+    return parse
+
+
+@case("get_client_cached")
+def bench_get_client_cached():
+    use_bench_config()
+    return credentials.get_client
+
+
+def measure(fn, repeat: int) -> dict:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_call = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+
+    return {
+        "median_us": statistics.median(per_call) * 1e6,
+        "min_us": min(per_call) * 1e6,
+        "calls_per_round": number,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference is None:
+            continue
+        change = result["median_us"] / reference["median_us"] - 1.0
+        result["change"] = change
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="only run the cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare the results with the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown of the median, 0.2 = 20%%")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    results = {}
+    for name, setup in CASES.items():
+        if args.filter in name:
+            results[name] = measure(setup(), args.repeat)
+
+    regressions = []
+    if args.compare:
+        if not args.baseline.exists():
+            parser.error(f"there is no baseline in {args.baseline}, store one with --save first")
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+
+    for name, result in results.items():
+        line = f"{name:<26} median {result['median_us']:>10.1f} us   min {result['min_us']:>10.1f} us"
+        if "change" in result:
+            line += f"   {result['change']:>+7.1%}" + ("   REGRESSION" if name in regressions else "")
+        print(line)
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump({"python": platform.python_version(),
+                       "machine": platform.machine(),
+                       "cases": results}, file, indent=2, sort_keys=True)
+        print(f"baseline stored in {args.baseline}")
+
+    if regressions:
+        raise SystemExit(f"{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Starts the games of a tournament against the local algod/indexer stand-in, once with the PlayerAccountCache pre-flight
+and once without, and compares how many start groups were sent only to be rejected.
+
+A share of the players can not pay every game they are drawn for: some have less than the bet, others only enough
+for their first game. Without the pre-flight the stand-in rejects their start groups after the round trip, with it the
+games are refused before anything is built.
+
+    python -m benchmarks.preflight_tournament --players 16 --games 32 --latency 0.05
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.blockchain_utils.local_node import LocalNetwork, LocalNodeServer, MIN_BALANCE
+from src.services.game_engine_service import BET_AMOUNT, GameEngineService
+from src.services.player_account_cache import PlayerAccountCache
+
+
+def run_tournament(players: list, schedule: list, balances: dict, preflight: bool, args) -> dict:
+    network = LocalNetwork(block_time=args.block_time, latency=args.latency)
+    server = LocalNodeServer(network, port=0)
+    server.start()
+    client = algod.AlgodClient("local", server.address)
+
+    for address, amount in balances.items():
+        network.set_balance(address, amount)
+
+    engines = [GameEngineService(*account.generate_account(), *players[x], *players[o]) for x, o in schedule]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda engine: engine.deploy_application(client), engines))
+
+    result = {"started": 0, "refused": 0, "rejected": 0, "failed_seconds": 0.0}
+    started = time.perf_counter()
+    for engine in engines:
+        attempt_started = time.perf_counter()
+        try:
+            GameEngineService.start_games(client, [engine], preflight=preflight)
+            result["started"] += 1
+            continue
+        except ValueError:
+            result["refused"] += 1
+        except AlgodHTTPError:
+            result["rejected"] += 1
+        result["failed_seconds"] += time.perf_counter() - attempt_started
+
+    result["elapsed"] = time.perf_counter() - started
+    result["requests"] = network.stats()["requests"]
+
+    # the start groups are only tracked, let them confirm before the stand-in goes away
+    tracker = ConfirmationTracker.for_client(client)
+    while tracker.pending_count:
+        time.sleep(0.05)
+    if preflight:
+        result["account_fetches"] = PlayerAccountCache.for_client(client).fetches
+    server.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--games", type=int, default=32)
+    parser.add_argument("--underfunded", type=float, default=0.25, help="share of the players that run out of funds")
+    parser.add_argument("--block-time", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    players = [account.generate_account() for _ in range(args.players)]
+    schedule = [tuple(rng.sample(range(args.players), 2)) for _ in range(args.games)]
+
+    # half of the short players can not pay a single game, the other half exactly one
+    balances = {}
+    for idx in range(int(args.players * args.underfunded)):
+        address = players[idx][1]
+        balances[address] = BET_AMOUNT // 2 if idx % 2 else BET_AMOUNT + 1000 + MIN_BALANCE
+
+    for preflight in (False, True):
+        result = run_tournament(players, schedule, balances, preflight, args)
+        print(f"pre-flight {'on ' if preflight else 'off'}: {result['started']} started, {result['refused']} refused "
+              f"locally, {result['rejected']} rejected by the node, {result['failed_seconds'] * 1000:.0f} ms spent "
+              f"on failed starts, {result['requests']} requests, elapsed {result['elapsed']:.2f} s"
+              + (f", {result['account_fetches']} account_info fetches" if preflight else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Replays a recorded serial session through the whole game pipeline (ingest hub, game worker, pipelined play actions)
+against the local algod/indexer stand-in, no boards or network needed.
+
+Without --session a session is synthesized: two boards that throw in turn, with the duplicate lines of a bouncing
+board, garbled lines and lines split over two reads, and the QR registrations of both players.
+
+    python -m benchmarks.replay_pipeline --speed 100
+    python -m benchmarks.replay_pipeline --session table_1.session --speed 0 --block-time 0.2
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from algosdk import account
+from algosdk.v2client import algod
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.blockchain_utils.local_node import LocalNetwork, LocalNodeServer
+from src.metrics_utils.metrics import METRICS
+from src.serial_utils.event_debouncer import DEBOUNCE_WINDOW_MS
+from src.serial_utils.ingest_hub import SerialIngestHub
+from src.serial_utils.session_replay import RAW, SESSION, SessionReplayer
+from src.services.game_engine_service import GameEngineService
+from src.services.game_worker import GameWorker
+from src.storage_utils.event_log import EventLog
+
+BOARDS = {"X": "/dev/ttyUSB0", "O": "/dev/ttyUSB1"}
+QR_STATION = "/dev/ttyUSB2"
+
+
+def synthesize_session(path: Path, throws: int, interval: float = 2.0, seed: int = 7):
+    """
+    Writes a session of two boards that throw in turn, a throw every interval seconds.
+    """
+    rng = random.Random(seed)
+    chunks = []
+
+    for idx, player_id in enumerate("XO"):
+        address = account.generate_account()[1]
+        chunks.append((0.5 * idx, QR_STATION, f"QR,{player_id},{1633000000 + idx},{address}\r\n".encode()))
+
+    at = 2.0
+    for throw in range(throws):
+        player_id = "XO"[throw % 2]
+        device = BOARDS[player_id]
+        # mostly misses, so the game lasts for the whole session
+        line = f"BRD,{player_id},{int(at * 1000)},{1 if rng.random() < 0.1 else 0}\r\n".encode()
+
+        if rng.random() < 0.2:
+            split = rng.randrange(1, len(line))
+            chunks += [(at, device, line[:split]), (at + 0.002, device, line[split:])]
+        else:
+            chunks.append((at, device, line))
+
+        if rng.random() < 0.1:
+            # a bouncing bag triggers the sensor twice
+            chunks.append((at + 0.03, device, line))
+        if rng.random() < 0.05:
+            chunks.append((at + 0.05, device, f"BRD,{player_id},{int(at * 1000) + 50},\r\n".encode()))
+
+        at += interval * rng.uniform(0.8, 1.2)
+
+    with EventLog(path) as event_log:
+        event_log.append({"t": SESSION, "devices": list(BOARDS.values()) + [QR_STATION], "started_at": time.time()})
+        for chunk_at, device, data in sorted(chunks, key=lambda chunk: chunk[0]):
+            event_log.append({"t": RAW, "device": device, "at": chunk_at, "data": data})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--session", type=Path, default=None, help="recorded session, synthesized when missing")
+    parser.add_argument("--throws", type=int, default=60, help="throws of the synthesized session")
+    parser.add_argument("--speed", type=float, default=100.0, help="replay speed, 0 replays as fast as possible")
+    parser.add_argument("--block-time", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--no-debounce", action="store_true", help="pass the duplicate lines of the boards on")
+    args = parser.parse_args()
+
+    session = args.session
+    if session is None:
+        session = Path(tempfile.mkdtemp()) / "synthesized.session"
+        synthesize_session(session, args.throws)
+
+    replayer = SessionReplayer(session, speed=args.speed or None)
+
+    server = LocalNodeServer(LocalNetwork(block_time=args.block_time, latency=args.latency), port=0)
+    server.start()
+    client = algod.AlgodClient("local", server.address)
+
+    (creator_pk, creator_address), (x_pk, x_address), (o_pk, o_address) = [account.generate_account()
+                                                                           for _ in range(3)]
+    engine = GameEngineService(creator_pk, creator_address, x_pk, x_address, o_pk, o_address)
+    hub = SerialIngestHub(replayer.devices,
+                          serial_factory=replayer.serial_factory,
+                          debounce_window_ms=None if args.no_debounce else DEBOUNCE_WINDOW_MS)
+    worker = GameWorker(client, engine, hub)
+
+    engine.deploy_application(client)
+    worker.application_deployed()
+    engine.start_game(client)
+    while worker.game_state_reader.snapshot().funds_escrow_address is None:
+        time.sleep(0.05)
+
+    METRICS.enable()
+    started = time.perf_counter()
+    worker.start()
+    replayer.wait()
+    replayed = time.perf_counter() - started
+
+    # the worker may still be submitting the last events, then their confirmations are outstanding; once the game has
+    # a winner the worker stops and the rest of the session is left unread
+    tracker = ConfirmationTracker.for_client(client)
+    while (worker.is_running and not hub.events.empty()) or worker.scoreboard.in_flight_count or tracker.pending_count:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    worker.stop(2.0)
+    hub.stop()
+
+    game = worker.snapshot()
+    confirmation = METRICS.dump().get("throw_to_confirmation", {"count": 0, "sum": 0.0})
+    print(f"session: {replayer.duration:.1f} s recorded, replayed in {replayed:.2f} s at speed {args.speed or 'max'}, "
+          f"pipeline drained after {elapsed:.2f} s")
+    print(f"frames: {hub.frames_decoded} decoded, {hub.frames_malformed} malformed, {hub.events_suppressed} "
+          f"suppressed; throws: "
+          f"{worker.scoreboard.confirmed} confirmed, {worker.scoreboard.rejected} rejected")
+    if confirmation["count"]:
+        print(f"throw to confirmation: mean {confirmation['sum'] / confirmation['count'] * 1000:.0f} ms over "
+              f"{confirmation['count']} throws")
+    print(f"score X {game['x_state']} O {game['o_state']}, game status {game['game_status']}")
+    print(f"stand-in: {server.network.stats()}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
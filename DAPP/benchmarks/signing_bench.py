@@ -0,0 +1,60 @@
+"""
+Benchmark of signing the start game groups of many tables at once: one after another in the calling thread, as
+start_game did, against the SigningService with a growing number of processes.
+
+    python -m benchmarks.signing_bench --games 200 --repeat 3
+"""
+import argparse
+import base64
+import os
+import time
+
+from algosdk import encoding
+
+from benchmarks.micro import make_engine, suggested_params
+from src.blockchain_utils.signing_service import SigningService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    sp = suggested_params()
+    engines = [make_engine() for _ in range(args.games)]
+    groups = [engine._start_game_group_jobs(sp) for engine in engines]
+    transactions = sum(len(group) for group in groups)
+
+    def serial():
+        return [b"".join(base64.b64decode(encoding.msgpack_encode(signed))
+                         for signed in engine._build_start_game_group(sp))
+                for engine in engines]
+
+    def best_of(fn) -> float:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    expected = serial()
+    elapsed = best_of(serial)
+    print(f"serial:     {transactions / elapsed:>8.0f} txns/sec ({elapsed * 1000:.1f} ms for {args.games} groups)")
+
+    workers = 1
+    while workers <= args.max_workers:
+        service = SigningService(workers=workers, inline_jobs=0)
+        # the first batch starts the processes
+        assert service.sign_groups(groups) == expected
+        elapsed = best_of(lambda: service.sign_groups(groups))
+        service.shutdown()
+        print(f"{workers:>2} worker(s): {transactions / elapsed:>8.0f} txns/sec "
+              f"({elapsed * 1000:.1f} ms for {args.games} groups)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compiles the CornHole approval program locally and reports the cost of the ActionMove and ActionMoveBatch actions.
+
+The action branches contain no loops and every opcode they use costs 1 in TEAL 4, so the number of opcodes of a branch
+is an upper bound of the cost of a call to it. The fees compare a game played with one call per throw against a game
+played with one ActionMoveBatch call per round.
+
+    python -m benchmarks.teal_cost --throws-per-round 4 --rounds 6
+"""
+import argparse
+
+from pyteal import Mode, compileTeal
+
+from src.services.game_engine_service import TEAL_VERSION
+from src.smart_contracts.cornhole_asc1 import MAX_BATCH, approval_program, play_action_batch_logic, \
+    play_action_logic
+
+# opcode budget of a single application call
+OPCODE_BUDGET = 700
+MIN_FEE = 1000
+
+
+def count_opcodes(teal: str) -> int:
+    opcodes = 0
+    for line in teal.splitlines():
+        line = line.split('//')[0].strip()
+        if line and not line.startswith('#pragma') and not line.endswith(':'):
+            opcodes += 1
+    return opcodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--throws-per-round", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=6, help="rounds per player")
+    args = parser.parse_args()
+
+    if not 1 <= args.throws_per_round <= MAX_BATCH:
+        parser.error(f"--throws-per-round should be between 1 and {MAX_BATCH}")
+
+    approval = compileTeal(approval_program(), mode=Mode.Application, version=TEAL_VERSION)
+    action_move = compileTeal(play_action_logic(), mode=Mode.Application, version=TEAL_VERSION)
+    action_move_batch = compileTeal(play_action_batch_logic(), mode=Mode.Application, version=TEAL_VERSION)
+
+    print(f"approval program: {count_opcodes(approval)} opcodes, {len(approval.splitlines())} lines of TEAL")
+    print(f"ActionMove branch: at most {count_opcodes(action_move)} opcodes per call "
+          f"(budget {OPCODE_BUDGET})")
+    print(f"ActionMoveBatch branch: at most {count_opcodes(action_move_batch)} opcodes per call for up to "
+          f"{MAX_BATCH} throws (budget {OPCODE_BUDGET})")
+
+    throws = 2 * args.rounds * args.throws_per_round
+    single_calls = throws
+    batch_calls = 2 * args.rounds
+
+    print(f"game of {throws} throws: ActionMove {single_calls} transactions / {single_calls * MIN_FEE} microAlgos, "
+          f"ActionMoveBatch {batch_calls} transactions / {batch_calls * MIN_FEE} microAlgos "
+          f"({single_calls / batch_calls:.1f}x fewer)")
+
+
+if __name__ == "__main__":
+    main()
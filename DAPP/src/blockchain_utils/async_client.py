@@ -0,0 +1,231 @@
+import base64
+import json
+from typing import List, Optional, Union
+
+import aiohttp
+from algosdk import constants, encoding, error
+from algosdk.future.transaction import SuggestedParams, SignedTransaction, LogicSigTransaction
+
+API_VERSION_PATH_PREFIX = "/v2"
+
+
+def _build_url(address: str, path: str) -> str:
+    if path not in constants.unversioned_paths:
+        path = API_VERSION_PATH_PREFIX + path
+    return address.rstrip('/') + path
+
+
+class AsyncAlgodClient:
+    """
+    Asyncio facade over the algod endpoints used by the CornHole DApp. All requests share one aiohttp session whose
+    connector keeps a pool of keep-alive connections, so a single event loop can drive many games without a thread or
+    a new TCP/TLS handshake per call.
+    """
+
+    def __init__(self,
+                 algod_token: str,
+                 algod_address: str,
+                 headers: Optional[dict] = None,
+                 max_connections: int = 64,
+                 keepalive_timeout: float = 30.0):
+        self.algod_token = algod_token
+        self.algod_address = algod_address
+        self.headers = headers
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the pooled connections.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session is created lazily, it has to be created from within the running event loop.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def algod_request(self,
+                            method: str,
+                            path: str,
+                            params: Optional[dict] = None,
+                            data: Optional[bytes] = None,
+                            headers: Optional[dict] = None,
+                            response_format: str = "json"):
+        """
+        Executes a request against algod.
+        :param method: request method.
+        :param path: path of the endpoint without the API version prefix.
+        :param params: query parameters.
+        :param data: body of the request.
+        :param headers: additional headers.
+        :param response_format: "json" or "msgpack".
+        :return:
+            Returns the decoded json response, or the raw body for any other response_format.
+        """
+        request_headers = {constants.algod_auth_header: self.algod_token}
+        if self.headers:
+            request_headers.update(self.headers)
+        if headers:
+            request_headers.update(headers)
+
+        async with self._get_session().request(method,
+                                               _build_url(self.algod_address, path),
+                                               params=params,
+                                               data=data,
+                                               headers=request_headers) as response:
+            body = await response.read()
+
+            if response.status >= 400:
+                message = body.decode('utf-8', errors='replace')
+                try:
+                    message = json.loads(message)["message"]
+                except (ValueError, KeyError, TypeError):
+                    pass
+                raise error.AlgodHTTPError(message, response.status)
+
+            if response_format == "json":
+                try:
+                    return json.loads(body)
+                except ValueError as e:
+                    raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+
+            return body
+
+    async def status(self) -> dict:
+        return await self.algod_request("GET", "/status")
+
+    async def versions(self) -> dict:
+        return await self.algod_request("GET", "/versions")
+
+    async def status_after_block(self, block_num: int) -> dict:
+        return await self.algod_request("GET", f"/status/wait-for-block-after/{block_num}")
+
+    async def suggested_params(self) -> SuggestedParams:
+        res = await self.algod_request("GET", "/transactions/params")
+
+        return SuggestedParams(res["fee"],
+                               res["last-round"],
+                               res["last-round"] + 1000,
+                               res["genesis-hash"],
+                               res["genesis-id"],
+                               False,
+                               res["consensus-version"],
+                               res["min-fee"])
+
+    async def send_raw_transaction(self, raw_transactions: bytes) -> str:
+        """
+        Broadcasts already encoded signed transactions.
+        :param raw_transactions: concatenated msgpack encodings of the signed transactions.
+        :return:
+            Returns the id of the first transaction.
+        """
+        response = await self.algod_request("POST",
+                                            "/transactions",
+                                            data=raw_transactions,
+                                            headers={'Content-Type': 'application/x-binary'})
+        return response["txId"]
+
+    async def send_transaction(self, transaction: Union[SignedTransaction, LogicSigTransaction]) -> str:
+        return await self.send_transactions([transaction])
+
+    async def send_transactions(self, transactions: List[Union[SignedTransaction, LogicSigTransaction]]) -> str:
+        raw_transactions = b''.join(base64.b64decode(encoding.msgpack_encode(transaction))
+                                    for transaction in transactions)
+        return await self.send_raw_transaction(raw_transactions)
+
+    async def pending_transaction_info(self, txid: str) -> dict:
+        return await self.algod_request("GET", f"/transactions/pending/{txid}")
+
+    async def compile(self, source: str) -> dict:
+        return await self.algod_request("POST",
+                                        "/teal/compile",
+                                        data=source.encode('utf-8'),
+                                        headers={'Content-Type': 'application/x-binary'})
+
+    async def application_info(self, application_id: int) -> dict:
+        return await self.algod_request("GET", f"/applications/{application_id}")
+
+    async def account_info(self, address: str) -> dict:
+        return await self.algod_request("GET", f"/accounts/{address}")
+
+
+class AsyncIndexerClient:
+    """
+    Asyncio facade over the indexer endpoints used by the CornHole DApp, with pooled keep-alive connections.
+    """
+
+    def __init__(self,
+                 indexer_token: str,
+                 indexer_address: str,
+                 headers: Optional[dict] = None,
+                 max_connections: int = 16):
+        self.indexer_token = indexer_token
+        self.indexer_address = indexer_address
+        self.headers = headers
+        self.max_connections = max_connections
+
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections))
+        return self._session
+
+    async def indexer_request(self, method: str, path: str, params: Optional[dict] = None) -> dict:
+        request_headers = {}
+        if self.indexer_token:
+            request_headers[constants.indexer_auth_header] = self.indexer_token
+        if self.headers:
+            request_headers.update(self.headers)
+
+        async with self._get_session().request(method,
+                                               _build_url(self.indexer_address, path),
+                                               params=params,
+                                               headers=request_headers) as response:
+            body = await response.read()
+
+            if response.status >= 400:
+                message = body.decode('utf-8', errors='replace')
+                try:
+                    message = json.loads(message)["message"]
+                except (ValueError, KeyError, TypeError):
+                    pass
+                raise error.IndexerHTTPError(message)
+
+            return json.loads(body)
+
+    async def health(self) -> dict:
+        return await self.indexer_request("GET", "/health")
+
+    async def search_applications(self, application_id: Optional[int] = None, round_num: Optional[int] = None) -> dict:
+        params = {}
+        if application_id is not None:
+            params["application-id"] = application_id
+        if round_num is not None:
+            params["round"] = round_num
+
+        return await self.indexer_request("GET", "/applications", params=params)
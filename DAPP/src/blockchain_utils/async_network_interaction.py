@@ -0,0 +1,307 @@
+import asyncio
+import base64
+import copy
+import logging
+import time
+import weakref
+from typing import Dict, List, Optional, Union
+
+from algosdk.future.transaction import LogicSigTransaction, SignedTransaction, SuggestedParams
+
+from src.blockchain_utils.async_client import AsyncAlgodClient, AsyncIndexerClient
+from src.blockchain_utils.confirmation_tracker import TransactionRejected
+
+logger = logging.getLogger(__name__)
+
+
+class _AsyncPendingTransaction:
+
+    def __init__(self, future: asyncio.Future, deadline: float):
+        self.future = future
+        self.deadline = deadline
+
+
+class AsyncConfirmationTracker:
+    """
+    Asyncio counterpart of the ConfirmationTracker. One follower task per client waits for every new round and checks
+    all of the outstanding transactions of that round concurrently. The task exits when nothing is pending.
+    """
+
+    _trackers = weakref.WeakKeyDictionary()
+
+    def __init__(self, client: AsyncAlgodClient, timeout_seconds: float = 60.0):
+        self.client = client
+        self.timeout_seconds = timeout_seconds
+        self.last_round = None
+
+        self._pending: Dict[str, _AsyncPendingTransaction] = {}
+        self._follower = None
+
+    @classmethod
+    def for_client(cls, client: AsyncAlgodClient) -> 'AsyncConfirmationTracker':
+        """
+        Returns the tracker shared by everyone that uses the given client.
+        :param client: async algorand client.
+        :return:
+        """
+        tracker = cls._trackers.get(client)
+        if tracker is None:
+            tracker = cls._trackers[client] = cls(client)
+        return tracker
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def track(self, txid: str, timeout_seconds: Optional[float] = None) -> asyncio.Future:
+        """
+        Starts tracking the transaction, must be called from within the event loop of the client.
+        :param txid: id of a transaction that has been sent to the network.
+        :param timeout_seconds: time after which the future fails with TimeoutError, defaults to timeout_seconds of the
+        tracker.
+        :return:
+            Returns a future that resolves to the pending transaction info of the confirmed transaction, or fails with
+            TransactionRejected or TimeoutError.
+        """
+        timeout_seconds = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        loop = asyncio.get_running_loop()
+
+        pending = self._pending.get(txid)
+        if pending is None:
+            pending = self._pending[txid] = _AsyncPendingTransaction(loop.create_future(),
+                                                                     time.monotonic() + timeout_seconds)
+
+        if self._follower is None or self._follower.done():
+            self._follower = loop.create_task(self._follow_blocks())
+
+        return pending.future
+
+    async def wait(self, txid: str, timeout_seconds: Optional[float] = None) -> dict:
+        """
+        Waits until the transaction is confirmed.
+        :param txid: id of a transaction that has been sent to the network.
+        :param timeout_seconds: time after which TimeoutError is raised, defaults to timeout_seconds of the tracker.
+        :return:
+            Returns the pending transaction info of the confirmed transaction.
+        """
+        # Shielded, so a cancelled waiter does not cancel the future other waiters of the same txid share.
+        return await asyncio.shield(self.track(txid, timeout_seconds))
+
+    async def _follow_blocks(self):
+        while True:
+            try:
+                if self.last_round is None:
+                    self.last_round = (await self.client.status()).get('last-round')
+
+                await self._check_pending()
+
+                if not self._pending:
+                    return
+
+                self.last_round = (await self.client.status_after_block(self.last_round)).get('last-round')
+            except Exception:
+                logger.exception("Following the blocks failed")
+                self._expire_pending()
+                if not self._pending:
+                    return
+                await asyncio.sleep(1)
+
+    async def _check_pending(self):
+        txids = list(self._pending)
+
+        responses = await asyncio.gather(*(self.client.pending_transaction_info(txid) for txid in txids),
+                                         return_exceptions=True)
+
+        for txid, txinfo in zip(txids, responses):
+            if isinstance(txinfo, Exception):
+                # The node may briefly not know the transaction, keep it until it confirms or times out.
+                logger.debug("No pending transaction info for %s: %s", txid, txinfo)
+                continue
+
+            if txinfo.get('confirmed-round'):
+                self._resolve(txid, result=txinfo)
+            elif txinfo.get('pool-error'):
+                self._resolve(txid, error=TransactionRejected(txid, txinfo.get('pool-error')))
+
+        self._expire_pending()
+
+    def _expire_pending(self):
+        now = time.monotonic()
+
+        for txid in [txid for txid, pending in self._pending.items() if pending.deadline <= now]:
+            self._resolve(txid, error=TimeoutError(f"Transaction {txid} was not confirmed in time."))
+
+    def _resolve(self, txid: str, result: Optional[dict] = None, error: Optional[Exception] = None):
+        pending = self._pending.pop(txid, None)
+
+        if pending is None or pending.future.done():
+            return
+
+        if error is None:
+            pending.future.set_result(result)
+        else:
+            pending.future.set_exception(error)
+
+
+class AsyncSuggestedParamsCache:
+    """
+    Asyncio counterpart of the SuggestedParamsCache. Concurrent callers that find the params expired share a single
+    fetch.
+    """
+
+    _caches = weakref.WeakKeyDictionary()
+
+    def __init__(self,
+                 client: AsyncAlgodClient,
+                 ttl_seconds: float = 30.0,
+                 round_time: float = 4.5,
+                 safety_rounds: int = 100):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.round_time = round_time
+        self.safety_rounds = safety_rounds
+
+        self.fetches = 0
+        self.hits = 0
+
+        self._params = None
+        self._expires_at = 0.0
+        self._fetching = None
+
+    @classmethod
+    def for_client(cls, client: AsyncAlgodClient) -> 'AsyncSuggestedParamsCache':
+        """
+        Returns the cache shared by everyone that uses the given client.
+        :param client: async algorand client.
+        :return:
+        """
+        cache = cls._caches.get(client)
+        if cache is None:
+            cache = cls._caches[client] = cls(client)
+        return cache
+
+    async def get(self) -> SuggestedParams:
+        """
+        Returns a copy of the cached suggested params, fetching them first if they have expired.
+        :return:
+        """
+        if self._params is not None and time.monotonic() < self._expires_at:
+            self.hits += 1
+            return copy.copy(self._params)
+
+        if self._fetching is None:
+            self._fetching = asyncio.ensure_future(self._fetch())
+
+        try:
+            await asyncio.shield(self._fetching)
+        finally:
+            if self._fetching is not None and self._fetching.done():
+                self._fetching = None
+
+        return copy.copy(self._params)
+
+    def invalidate(self):
+        """
+        Drops the cached params, the next call to get fetches them again.
+        """
+        self._params = None
+        self._expires_at = 0.0
+
+    async def _fetch(self):
+        params = await self.client.suggested_params()
+        self.fetches += 1
+
+        rounds_left = params.last - params.first - self.safety_rounds
+        lifetime = min(self.ttl_seconds, max(0.0, rounds_left * self.round_time))
+
+        self._params = params
+        self._expires_at = time.monotonic() + lifetime
+
+
+class AsyncNetworkInteraction:
+    """
+    Asyncio counterpart of the NetworkInteraction, for code that drives many games from a single event loop.
+    """
+
+    @staticmethod
+    async def wait_for_confirmation(client: AsyncAlgodClient, txid, log=True, timeout_seconds: Optional[float] = None):
+        """
+        Waits until the transaction is confirmed. The wait is served by the block follower shared by all transactions
+        of the client.
+        """
+        if log:
+            print("Waiting for confirmation")
+        txinfo = await AsyncConfirmationTracker.for_client(client).wait(txid, timeout_seconds)
+        if log:
+            print(f"Transaction {txid} confirmed in round {txinfo.get('confirmed-round')}.")
+        return txinfo
+
+    @staticmethod
+    async def wait_for_indexer(indexer_client: AsyncIndexerClient, round_num: int, timeout_seconds: float = 30.0,
+                               poll_interval: float = 0.5):
+        """
+        Waits until the indexer has caught up with the given round, so queries against it see its transactions.
+        :param indexer_client: async algorand indexer.
+        :param round_num: round that the indexer needs to have processed.
+        :param timeout_seconds: time after which TimeoutError is raised.
+        :param poll_interval: time in seconds between two health checks.
+        :return:
+        """
+        deadline = time.monotonic() + timeout_seconds
+        while (await indexer_client.health()).get('round', 0) < round_num:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"The indexer did not reach round {round_num} in time.")
+            await asyncio.sleep(poll_interval)
+
+    @staticmethod
+    async def get_default_suggested_params(client: AsyncAlgodClient) -> SuggestedParams:
+        """
+        Gets default suggested params with flat transaction fee and fee amount of 1000.
+        :param client:
+        :return:
+        """
+        suggested_params = await AsyncSuggestedParamsCache.for_client(client).get()
+
+        suggested_params.flat_fee = True
+        suggested_params.fee = 1000
+
+        return suggested_params
+
+    @staticmethod
+    async def submit_transaction(client: AsyncAlgodClient,
+                                 transaction: Union[SignedTransaction, LogicSigTransaction],
+                                 log=True) -> Optional[str]:
+        txid = await client.send_transaction(transaction)
+
+        await AsyncNetworkInteraction.wait_for_confirmation(client, txid, log)
+
+        return txid
+
+    @staticmethod
+    async def submit_transactions(client: AsyncAlgodClient,
+                                  transactions: List[Union[SignedTransaction, LogicSigTransaction]],
+                                  log=True) -> Optional[str]:
+        """
+        Submits an atomic group and waits until it is confirmed.
+        :param client:
+        :param transactions: signed transactions of the group.
+        :param log:
+        :return:
+            Returns the id of the first transaction of the group.
+        """
+        txid = await client.send_transactions(transactions)
+
+        await AsyncNetworkInteraction.wait_for_confirmation(client, txid, log)
+
+        return txid
+
+    @staticmethod
+    async def compile_program(client: AsyncAlgodClient, source_code):
+        """
+        :param client: async algorand client
+        :param source_code: teal source code
+        :return:
+            Decoded byte program
+        """
+        compile_response = await client.compile(source_code)
+        return base64.b64decode(compile_response['result'])
@@ -0,0 +1,328 @@
+import base64
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional
+
+import msgpack
+from algosdk import constants, encoding
+from algosdk.v2client import algod
+
+from src.metrics_utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# transaction fields that hold an address, they are returned base32 encoded like in the pending transaction info
+_ADDRESS_FIELDS = {"snd", "rcv", "close", "asnd", "arcv", "aclose", "fadd", "rekey"}
+
+
+class TransactionRejected(Exception):
+    """
+    Raised for a tracked transaction that the node removed from its pool without confirming it.
+    """
+
+    def __init__(self, txid: str, pool_error: str):
+        super().__init__(f"Transaction {txid} was rejected: {pool_error}")
+        self.txid = txid
+        self.pool_error = pool_error
+
+
+def _sorted(value):
+    if isinstance(value, dict):
+        return {key: _sorted(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_sorted(item) for item in value]
+    return value
+
+
+def _as_bytes(value) -> bytes:
+    # Go strings holding arbitrary bytes come back as surrogate escaped str
+    return value.encode('utf-8', 'surrogateescape') if isinstance(value, str) else value
+
+
+def _json_field(key: str, value):
+    if key in _ADDRESS_FIELDS and isinstance(value, bytes):
+        return encoding.encode_address(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, list):
+        return [_json_field(key, item) for item in value]
+    if isinstance(value, dict):
+        return {item_key: _json_field(item_key, item) for item_key, item in value.items()}
+    return value
+
+
+def block_transactions(raw_block: bytes) -> Dict[str, dict]:
+    """
+    Decodes a block as returned by algod for /v2/blocks/{round}?format=msgpack.
+    :param raw_block: the msgpack encoded block.
+    :return:
+        Returns txid -> pending transaction info of every transaction of the block, with the fields the listeners of
+        the ConfirmationTracker read: confirmed-round, txn, application-index and global-state-delta.
+    """
+    block = msgpack.unpackb(raw_block, raw=False, unicode_errors='surrogateescape', strict_map_key=False)["block"]
+    round_num = block.get("rnd", 0)
+
+    txinfos = {}
+    for signed in block.get("txns", []):
+        # the genesis id and hash are left out of the transactions of a block, the txid is over the full transaction
+        txn = dict(signed["txn"])
+        txn["gh"] = block["gh"]
+        if signed.get("hgi"):
+            txn["gen"] = block["gen"]
+
+        encoded = msgpack.packb(_sorted(txn), use_bin_type=True, unicode_errors='surrogateescape')
+        txid = encoding._undo_padding(
+            base64.b32encode(encoding.checksum(constants.txid_prefix + encoded)).decode('ascii'))
+
+        txinfo = {"confirmed-round": round_num,
+                  "pool-error": "",
+                  "txn": {"txn": {key: _json_field(key, value) for key, value in txn.items()}}}
+        if signed.get("apid"):
+            txinfo["application-index"] = signed["apid"]
+
+        global_delta = (signed.get("dt") or {}).get("gd") or {}
+        if global_delta:
+            txinfo["global-state-delta"] = [
+                {"key": base64.b64encode(_as_bytes(key)).decode('ascii'),
+                 "value": {"action": value.get("at", 0),
+                           "bytes": base64.b64encode(_as_bytes(value.get("bs", b""))).decode('ascii'),
+                           "uint": value.get("ui", 0)}}
+                for key, value in global_delta.items()]
+
+        txinfos[txid] = txinfo
+
+    return txinfos
+
+
+class _PendingTransaction:
+
+    def __init__(self, future: Future, deadline: float):
+        self.future = future
+        self.deadline = deadline
+        # blocks that have been checked since the transaction is tracked
+        self.blocks_checked = 0
+
+
+class ConfirmationTracker:
+    """
+    Follows the blocks of a single algod client and resolves every outstanding transaction as soon as the round in which
+    it was confirmed appears. All of the games share one follower thread per client, which waits for every round with
+    status_after_block and fetches its block once, so N pending transactions cost one wait and one block per round
+    instead of N polling loops. The follower thread exits when nothing is pending.
+
+    A block only holds the confirmed transactions. A transaction that is still missing once a block after it was
+    tracked has been checked, e.g. because the node rejected it or it was confirmed before it was tracked, is asked
+    for with pending_transaction_info, once per round until it is resolved.
+    """
+
+    _trackers = weakref.WeakKeyDictionary()
+    _trackers_lock = threading.Lock()
+
+    def __init__(self, client: algod.AlgodClient, timeout_seconds: float = 60.0):
+        self.client = client
+        self.timeout_seconds = timeout_seconds
+        self.last_round = None
+
+        self.blocks_fetched = 0
+        self.transactions_polled = 0
+
+        # next round whose block has to be checked, None while the follower is not running
+        self._next_round: Optional[int] = None
+        self._pending: Dict[str, _PendingTransaction] = {}
+        self._listeners: List[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+        self._follower = None
+
+    @classmethod
+    def for_client(cls, client: algod.AlgodClient) -> 'ConfirmationTracker':
+        """
+        Returns the tracker shared by everyone that uses the given client.
+        :param client: algorand client.
+        :return:
+        """
+        with cls._trackers_lock:
+            tracker = cls._trackers.get(client)
+            if tracker is None:
+                tracker = cls._trackers[client] = cls(client)
+            return tracker
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def track(self, txid: str, timeout_seconds: Optional[float] = None) -> Future:
+        """
+        Starts tracking the transaction.
+        :param txid: id of a transaction that has been sent to the network.
+        :param timeout_seconds: time after which the future fails with TimeoutError, defaults to timeout_seconds of the
+        tracker.
+        :return:
+            Returns a future that resolves to the pending transaction info of the confirmed transaction, or fails with
+            TransactionRejected or TimeoutError. A transaction that is already tracked keeps its future, its deadline
+            is moved up if the new timeout is shorter.
+        """
+        timeout_seconds = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        deadline = time.monotonic() + timeout_seconds
+
+        with self._lock:
+            pending = self._pending.get(txid)
+            if pending is None:
+                pending = self._pending[txid] = _PendingTransaction(Future(), deadline)
+            else:
+                pending.deadline = min(pending.deadline, deadline)
+
+            if self._follower is None:
+                self._follower = threading.Thread(target=self._follow_blocks,
+                                                  name="confirmation-tracker",
+                                                  daemon=True)
+                self._follower.start()
+
+        return pending.future
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """
+        Registers a function that is called from the follower thread with the pending transaction info of every
+        transaction that the tracker sees confirmed.
+        :param listener: function that receives the pending transaction info.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def wait(self, txid: str, timeout_seconds: Optional[float] = None) -> dict:
+        """
+        Blocks until the transaction is confirmed.
+        :param txid: id of a transaction that has been sent to the network.
+        :param timeout_seconds: time after which TimeoutError is raised, defaults to timeout_seconds of the tracker.
+        :return:
+            Returns the pending transaction info of the confirmed transaction.
+        """
+        return self.track(txid, timeout_seconds).result()
+
+    def find_confirmed(self, txids: Iterable[str], first_round: int, last_round: int) -> Dict[str, dict]:
+        """
+        Looks for transactions in the blocks of the given rounds, e.g. for transactions that were sent before a restart.
+        Such a transaction may have been confirmed long enough ago that pending_transaction_info no longer knows it,
+        only the ledger still does. The listeners are notified of every transaction that is found.
+        :param txids: ids of the transactions.
+        :param first_round: first round to check, e.g. the first valid round of the transactions.
+        :param last_round: last round to check.
+        :return:
+            Returns txid -> pending transaction info of the transactions that were found.
+        """
+        missing = set(txids)
+        found = {}
+
+        for round_num in range(first_round, last_round + 1):
+            if not missing:
+                break
+
+            with METRICS.span("block_info"):
+                txinfos = block_transactions(self.client.block_info(round_num=round_num, response_format="msgpack"))
+            self.blocks_fetched += 1
+
+            for txid in missing.intersection(txinfos):
+                found[txid] = txinfos[txid]
+                self._notify_listeners(txinfos[txid])
+            missing.difference_update(found)
+
+        return found
+
+    def _follow_blocks(self):
+        while True:
+            try:
+                if self._next_round is None:
+                    # the current round is checked too, a transaction may have been confirmed in it before it was
+                    # tracked
+                    self.last_round = self.client.status().get('last-round')
+                    self._next_round = self.last_round
+
+                while self._next_round <= self.last_round:
+                    self._check_block(self._next_round)
+                    self._next_round += 1
+
+                self._check_missing()
+                self._expire_pending()
+
+                with self._lock:
+                    if not self._pending:
+                        self._follower = None
+                        self._next_round = None
+                        return
+
+                self.last_round = self.client.status_after_block(self.last_round).get('last-round')
+            except Exception:
+                logger.exception("Following the blocks failed")
+                self._expire_pending()
+                time.sleep(1)
+
+    def _check_block(self, round_num: int):
+        with METRICS.span("block_info"):
+            txinfos = block_transactions(self.client.block_info(round_num=round_num, response_format="msgpack"))
+        self.blocks_fetched += 1
+
+        with self._lock:
+            for pending in self._pending.values():
+                pending.blocks_checked += 1
+            confirmed = [txid for txid in txinfos if txid in self._pending]
+
+        for txid in confirmed:
+            self._resolve(txid, result=txinfos[txid])
+
+    def _check_missing(self):
+        with self._lock:
+            txids = [txid for txid, pending in self._pending.items() if pending.blocks_checked > 1]
+
+        for txid in txids:
+            try:
+                txinfo = self.client.pending_transaction_info(txid)
+            except Exception as e:
+                # The node may briefly not know the transaction, keep it until it confirms or times out.
+                logger.debug("No pending transaction info for %s: %s", txid, e)
+                continue
+            self.transactions_polled += 1
+
+            if txinfo.get('confirmed-round'):
+                self._resolve(txid, result=txinfo)
+            elif txinfo.get('pool-error'):
+                self._resolve(txid, error=TransactionRejected(txid, txinfo.get('pool-error')))
+
+    def _expire_pending(self):
+        now = time.monotonic()
+
+        with self._lock:
+            expired = [txid for txid, pending in self._pending.items() if pending.deadline <= now]
+
+        for txid in expired:
+            self._resolve(txid, error=TimeoutError(f"Transaction {txid} was not confirmed in time."))
+
+    def _resolve(self, txid: str, result: Optional[dict] = None, error: Optional[Exception] = None):
+        with self._lock:
+            pending = self._pending.pop(txid, None)
+
+        if pending is None:
+            return
+
+        if error is None:
+            self._notify_listeners(result)
+            pending.future.set_result(result)
+        else:
+            pending.future.set_exception(error)
+
+    def _notify_listeners(self, txinfo: dict):
+        with self._lock:
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(txinfo)
+            except Exception:
+                logger.exception("Confirmation listener failed")
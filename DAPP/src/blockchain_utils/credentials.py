@@ -1,10 +1,25 @@
 from algosdk.v2client import algod
 from algosdk.v2client import indexer
-from algosdk import account as algo_acc
 import yaml
 import os
+import threading
+import warnings
 from pathlib import Path
-from algosdk import mnemonic
+from types import MappingProxyType
+from src.blockchain_utils.keystore import Keystore
+
+PURESTAKE_INDEXER_ADDRESS = "https://testnet-algorand.api.purestake.io/idx2"
+
+# parsed config.yml of this process and the (mtime, size) of the file it was parsed from
+_config = None
+_config_stamp = None
+_config_lock = threading.Lock()
+
+_keystore = None
+
+# clients already built, by (kind, address, token)
+_clients = {}
+_clients_lock = threading.Lock()
 
 
 def get_project_root_path() -> Path:
@@ -12,16 +27,64 @@ def get_project_root_path() -> Path:
     return path.parent.parent
 
 
+def get_config_location() -> str:
+    return os.path.join(get_project_root_path(), 'config.yml')
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
 def load_config():
-    root_path = get_project_root_path()
-    config_location = os.path.join(root_path, 'config.yml')
+    """
+    The config.yml is parsed once per process and parsed again only when its modification time or size changes.
+    :return:
+        Returns the config as a read-only mapping, lists are returned as tuples
+    """
+    global _config, _config_stamp
 
-    with open(config_location) as file:
-        return yaml.full_load(file)
+    stat = os.stat(get_config_location())
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if stamp == _config_stamp:
+        return _config
+
+    with _config_lock:
+        if stamp != _config_stamp:
+            with open(get_config_location()) as file:
+                _config = _freeze(yaml.full_load(file))
+            _config_stamp = stamp
+        return _config
+
+
+def invalidate_config():
+    """
+    Drops the parsed config, the next load_config parses the file again.
+    """
+    global _config, _config_stamp
+
+    with _config_lock:
+        _config = None
+        _config_stamp = None
+
+
+def _get_or_create_client(key: tuple, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+    return client
 
 
 def get_client():
     """
+    The client is built once per address and token, so every caller shares it together with its confirmation
+    tracker and suggested params cache.
     :return:
         Returns algod_client
     """
@@ -31,61 +94,107 @@ def get_client():
     address = config.get('client_credentials').get('address')
     purestake_token = {'X-Api-key': token}
 
-    algod_client = algod.AlgodClient(token, address, headers=purestake_token)
-    return algod_client
+    return _get_or_create_client(("algod", address, token),
+                                 lambda: algod.AlgodClient(token, address, headers=purestake_token))
 
 
 def get_indexer():
+    """
+    The client is built once per address and token.
+    :return:
+        Returns indexer_client for the indexer_address of the client credentials, PureStake's TestNet indexer by default
+    """
     config = load_config()
 
     token = config.get('client_credentials').get('token')
+    address = config.get('client_credentials').get('indexer_address', PURESTAKE_INDEXER_ADDRESS)
     headers = {'X-Api-key': token}
-    my_indexer = indexer.IndexerClient(indexer_token=token,
-                                       indexer_address="https://testnet-algorand.api.purestake.io/idx2",
-                                       headers=headers)
 
-    return my_indexer
+    return _get_or_create_client(("indexer", address, token),
+                                 lambda: indexer.IndexerClient(indexer_token=token,
+                                                               indexer_address=address,
+                                                               headers=headers))
+
+
+def config_account_numbers() -> set:
+    """
+    :return:
+        Returns the numbers of the accounts of the config.yml, which the keystore does not give to new accounts
+    """
+    accounts = load_config().get("accounts") or {}
+    numbers = set(range(1, (accounts.get("total") or 0) + 1))
+    numbers.update(int(name[len("account_"):]) for name in accounts
+                   if name.startswith("account_") and name[len("account_"):].isdigit())
+    return numbers
+
+
+def get_keystore() -> Keystore:
+    """
+    :return:
+        Returns the keystore of the project, keystore.json next to the config.yml
+    """
+    global _keystore
+
+    if _keystore is None:
+        _keystore = Keystore(get_project_root_path() / 'keystore.json', reserved_numbers=config_account_numbers)
+    return _keystore
 
 
 def get_account_credentials(account_id: int) -> (str, str, str):
     """
-    Gets the credentials for the account with number: account_id
+    Gets the credentials for the account with number: account_id. Accounts are looked up in the accounts of the
+    config.yml first, so an account of the config.yml is never shadowed by a keystore entry with the same number, and
+    then in the keystore.
     :param account_id: Number of the account for which we want the credentials
     :return: (str, str, str) private key, address and mnemonic
     """
     config = load_config()
     account_name = f"account_{account_id}"
 
-    account = config.get("accounts").get(account_name)
-    return account.get("private_key"), account.get("address"), account.get("mnemonic")
+    account = (config.get("accounts") or {}).get(account_name)
+    if account is not None:
+        return account.get("private_key"), account.get("address"), account.get("mnemonic")
 
+    account = get_keystore().get(account_id)
+    if account is None:
+        raise ValueError(f"There is no account {account_id} in the config.yml or the keystore.")
+    return account
 
-def add_account_to_config():
+
+def get_account_credentials_by_address(address: str) -> (str, str, str):
     """
-    Adds account to the accounts list in the config.yml file.
+    Gets the credentials for the account of the keystore with the given address.
+    :param address: address of the account
+    :return: (str, str, str) private key, address and mnemonic
     """
-    private_key, address = algo_acc.generate_account()
+    account = get_keystore().get_by_address(address)
+    if account is None:
+        raise ValueError(f"There is no account {address} in the keystore.")
+    return account
 
-    account_data = {
-        "private_key": private_key,
-        "address": address,
-        "mnemonic": mnemonic.from_private_key(private_key)
-    }
 
-    root_path = get_project_root_path()
-    config_location = os.path.join(root_path, 'config.yml')
+def provision_accounts(count: int, workers: int = None) -> range:
+    """
+    Generates accounts in bulk and adds them to the keystore. The new accounts are numbered after the accounts of the
+    config.yml and of the keystore.
+    :param count: number of accounts to generate.
+    :param workers: processes that generate the accounts, by default one per core.
+    :return: numbers of the new accounts
+    """
+    return get_keystore().provision(count, workers=workers)
 
-    with open(config_location, 'r') as file:
-        cur_yaml = yaml.full_load(file)
-        total_accounts = cur_yaml.get("accounts").get("total")
 
-        curr_account = total_accounts + 1
-        curr_account_credentials = {
-            f"account_{curr_account}": account_data
-        }
+def add_account_to_keystore():
+    """
+    Adds an account to the keystore, use provision_accounts to add many accounts with a single write.
+    """
+    provision_accounts(1, workers=1)
 
-        cur_yaml["accounts"].update(curr_account_credentials)
-        cur_yaml["accounts"]["total"] = curr_account
 
-    with open(config_location, 'w') as file:
-        yaml.safe_dump(cur_yaml, file)
+def add_account_to_config():
+    """
+    Deprecated, accounts are no longer written to the config.yml. Use add_account_to_keystore.
+    """
+    warnings.warn("add_account_to_config adds the account to keystore.json, not to config.yml. "
+                  "Use add_account_to_keystore instead.", DeprecationWarning, stacklevel=2)
+    add_account_to_keystore()
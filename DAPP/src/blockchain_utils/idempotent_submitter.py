@@ -0,0 +1,227 @@
+import base64
+import collections
+import hashlib
+import http.client
+import random
+import socket
+import threading
+import time
+import urllib.error
+import weakref
+from concurrent.futures import Future
+from typing import Dict, Iterable, Optional, Union
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future.transaction import LogicSigTransaction, SignedTransaction, Transaction
+from algosdk.v2client import algod
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.metrics_utils.metrics import METRICS
+
+# answers of algod to a transaction it already has, the earlier send went through
+_KNOWN_TRANSACTION_ERRORS = ("already in ledger", "already in pool")
+_OVERLAPPING_LEASE_ERROR = "overlapping lease"
+
+# errors after which the request may not have reached the node, or the node may have applied it without answering
+_TRANSIENT_ERRORS = (urllib.error.URLError, http.client.HTTPException, socket.timeout, ConnectionError)
+
+
+def action_lease(app_id: int, kind: str, sequence: int = 0) -> bytes:
+    """
+    Lease of a logical action of a game, the same action always gets the same lease. While a transaction with the
+    lease is valid the node rejects any other transaction of the sender with it, so an action that is built and sent
+    again, e.g. after a restart, can not be applied twice.
+    :param app_id: the application id of the game.
+    :param kind: kind of the action, e.g. "play_action".
+    :param sequence: number of the action among the actions of its kind, e.g. the action count of a throw.
+    :return:
+        Returns the 32 byte lease.
+    """
+    return hashlib.sha256(b"cornhole:%d:%s:%d" % (app_id, kind.encode('utf-8'), sequence)).digest()
+
+
+class IdempotentSubmitter:
+    """
+    Sends signed transactions so that a transaction is applied at most once, however often it is sent.
+
+    Transient failures, rate limiting, 5xx responses, timeouts and dropped connections, are retried with the same
+    bytes after a jittered exponential backoff. A timeout may hide a send that the node has applied, the resend of the
+    same bytes has the same txid and the node answers that it already knows the transaction, which counts as success.
+    The txids of the accepted transactions are remembered, a transaction that is submitted again is not sent a second
+    time until the ConfirmationTracker reports it rejected. A transaction that is rejected for the lease of an earlier
+    one of this submitter resolves to the txid of the earlier transaction.
+    """
+
+    _submitters = weakref.WeakKeyDictionary()
+    _submitters_lock = threading.Lock()
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 max_attempts: int = 6,
+                 base_delay: float = 0.05,
+                 max_delay: float = 2.0,
+                 remembered: int = 4096):
+        """
+        :param client: algorand client.
+        :param max_attempts: sends of a transaction before the last transient error is raised.
+        :param base_delay: upper bound of the first backoff in seconds, doubled for every further attempt.
+        :param max_delay: upper bound of a single backoff in seconds.
+        :param remembered: accepted txids and leases that are remembered.
+        """
+        self.client = client
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.remembered = remembered
+
+        self.sent = 0
+        self.retries = 0
+        self.deduplicated = 0
+
+        # txids accepted by the node, oldest first
+        self._accepted: collections.OrderedDict = collections.OrderedDict()
+        # (sender, lease) -> txid of the accepted transaction that holds the lease
+        self._leases: collections.OrderedDict = collections.OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    @classmethod
+    def for_client(cls, client: algod.AlgodClient) -> 'IdempotentSubmitter':
+        """
+        Returns the submitter shared by everyone that uses the given client.
+        :param client: algorand client.
+        :return:
+        """
+        with cls._submitters_lock:
+            submitter = cls._submitters.get(client)
+            if submitter is None:
+                submitter = cls._submitters[client] = cls(client)
+            return submitter
+
+    def submit(self, transaction: Union[SignedTransaction, LogicSigTransaction]) -> str:
+        """
+        Sends a single signed transaction.
+        :param transaction: the signed transaction.
+        :return:
+            Returns the id of the transaction.
+        """
+        txn = transaction.transaction
+        return self.send(base64.b64decode(encoding.msgpack_encode(transaction)), txn.get_txid(), [txn])
+
+    def send(self, raw: bytes, txid: str, transactions: Iterable[Transaction] = ()) -> str:
+        """
+        Sends encoded signed transactions, a single one or a whole group.
+        :param raw: the encoded signed transactions, concatenated.
+        :param txid: id of the first transaction, the id algod answers with.
+        :param transactions: the transactions, their leases are remembered once they are accepted.
+        :return:
+            Returns txid, or the id of the earlier transaction that holds the lease of the transactions.
+        """
+        leases = [(txn.sender, txn.lease) for txn in transactions if txn.lease]
+
+        with self._lock:
+            if txid in self._accepted:
+                self.deduplicated += 1
+                METRICS.count("submit_deduplicated")
+                return txid
+
+            # the same transaction submitted from two threads is sent once
+            in_flight = self._in_flight.get(txid)
+            is_owner = in_flight is None
+            if is_owner:
+                in_flight = self._in_flight[txid] = Future()
+
+        if not is_owner:
+            self.deduplicated += 1
+            METRICS.count("submit_deduplicated")
+            return in_flight.result()
+
+        try:
+            accepted_txid = self._send_with_retries(raw, txid, leases)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[txid]
+            in_flight.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[txid]
+            if accepted_txid == txid:
+                self._remember(self._accepted, txid, None)
+                for lease in leases:
+                    self._remember(self._leases, lease, txid)
+        in_flight.set_result(accepted_txid)
+
+        if accepted_txid == txid:
+            ConfirmationTracker.for_client(self.client).track(txid).add_done_callback(
+                lambda done: self._settled(txid, leases, done))
+        return accepted_txid
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sent": self.sent, "retries": self.retries, "deduplicated": self.deduplicated,
+                    "remembered": len(self._accepted)}
+
+    def _send_with_retries(self, raw: bytes, txid: str, leases: list) -> str:
+        encoded = base64.b64encode(raw)
+        attempt = 0
+
+        while True:
+            attempt += 1
+            try:
+                with METRICS.span("send_transaction"):
+                    self.sent += 1
+                    return self.client.send_raw_transaction(encoded)
+            except AlgodHTTPError as e:
+                earlier_txid = self._resolve_conflict(str(e), txid, leases)
+                if earlier_txid is not None:
+                    return earlier_txid
+                if not self._is_transient(e) or attempt >= self.max_attempts:
+                    raise
+            except _TRANSIENT_ERRORS:
+                if attempt >= self.max_attempts:
+                    raise
+
+            self.retries += 1
+            METRICS.count("submit_retry")
+            time.sleep(self._random.uniform(0.0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))))
+
+    def _resolve_conflict(self, message: str, txid: str, leases: list) -> Optional[str]:
+        if any(error in message for error in _KNOWN_TRANSACTION_ERRORS):
+            self.deduplicated += 1
+            METRICS.count("submit_deduplicated")
+            return txid
+
+        if _OVERLAPPING_LEASE_ERROR in message:
+            with self._lock:
+                earlier_txids = {self._leases.get(lease) for lease in leases}
+            if len(earlier_txids) == 1 and None not in earlier_txids:
+                self.deduplicated += 1
+                METRICS.count("submit_deduplicated")
+                return earlier_txids.pop()
+
+        return None
+
+    @staticmethod
+    def _is_transient(error: AlgodHTTPError) -> bool:
+        code = getattr(error, 'code', None)
+        return code is not None and (code == 429 or code >= 500)
+
+    def _settled(self, txid: str, leases: list, confirmation: Future):
+        if confirmation.exception() is None:
+            return
+
+        # rejected or given up on, a submit of the transaction sends it again
+        with self._lock:
+            self._accepted.pop(txid, None)
+            for lease in leases:
+                if self._leases.get(lease) == txid:
+                    del self._leases[lease]
+
+    def _remember(self, remembered: collections.OrderedDict, key, value):
+        remembered[key] = value
+        remembered.move_to_end(key)
+        while len(remembered) > self.remembered:
+            remembered.popitem(last=False)
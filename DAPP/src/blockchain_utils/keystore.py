@@ -0,0 +1,246 @@
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from algosdk import account as algo_acc
+from algosdk import mnemonic
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, only the threads of this process are kept from writing the keystore at the same time
+    fcntl = None
+
+KEYSTORE_VERSION = 2
+
+# accounts generated per task of the process pool
+PROVISION_CHUNK = 250
+
+
+def generate_accounts(count: int) -> List[Tuple[str, str, str]]:
+    """
+    Generates new accounts.
+    :param count: number of accounts.
+    :return:
+        Returns (private key, address, mnemonic) of every account
+    """
+    accounts = []
+    for _ in range(count):
+        private_key, address = algo_acc.generate_account()
+        accounts.append((private_key, address, mnemonic.from_private_key(private_key)))
+    return accounts
+
+
+class Keystore:
+    """
+    Accounts stored in a single JSON file, every account with its number. The file is read once and read again only
+    when it changes on disk, lookups by number or by address are dictionary lookups.
+
+    Accounts are added in bulk: they are generated in a process pool and written with a single atomic replace of the
+    file, so adding N accounts reads and writes the file once and readers never see a partial file. The read-modify-
+    write holds a lock on a lockfile next to the keystore, so processes that add accounts at the same time do not
+    overwrite the accounts of each other.
+
+    New accounts are numbered after the highest number in use, in the keystore or among the reserved numbers, e.g. the
+    accounts of the config.yml.
+    """
+
+    def __init__(self, path: Path, reserved_numbers: Optional[Callable[[], Iterable[int]]] = None):
+        """
+        :param path: location of the keystore file.
+        :param reserved_numbers: returns the account numbers that are in use outside of the keystore.
+        """
+        self.path = Path(path)
+        self.reserved_numbers = reserved_numbers
+
+        self._accounts: Dict[int, Tuple[str, str, str]] = {}
+        self._by_address = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def get(self, account_id: int) -> Optional[Tuple[str, str, str]]:
+        """
+        :param account_id: number of the account.
+        :return:
+            Returns (private key, address, mnemonic) of the account, None if there is no such account
+        """
+        return self._load().get(account_id)
+
+    def get_by_address(self, address: str) -> Optional[Tuple[str, str, str]]:
+        """
+        :param address: address of the account.
+        :return:
+            Returns (private key, address, mnemonic) of the account, None if there is no such account
+        """
+        accounts = self._load()
+        account_id = self._by_address.get(address)
+        return None if account_id is None else accounts[account_id]
+
+    def account_id(self, address: str) -> Optional[int]:
+        """
+        :param address: address of the account.
+        :return:
+            Returns the number of the account, None if there is no such account
+        """
+        self._load()
+        return self._by_address.get(address)
+
+    def provision(self, count: int, workers: Optional[int] = None) -> range:
+        """
+        Generates new accounts and adds them to the keystore.
+        :param count: number of accounts to generate.
+        :param workers: processes of the pool, by default one per core. With 1 the accounts are generated in this
+        process.
+        :return:
+            Returns the numbers of the new accounts
+        """
+        if count <= 0:
+            raise ValueError("The number of accounts to provision must be positive.")
+
+        chunks = [PROVISION_CHUNK] * (count // PROVISION_CHUNK)
+        if count % PROVISION_CHUNK:
+            chunks.append(count % PROVISION_CHUNK)
+
+        if workers == 1 or len(chunks) == 1:
+            generated = [generate_accounts(chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                generated = list(executor.map(generate_accounts, chunks))
+
+        return self.add([account for chunk in generated for account in chunk])
+
+    def add(self, accounts: List[Tuple[str, str, str]]) -> range:
+        """
+        Adds accounts to the keystore with a single write of the file.
+        :param accounts: (private key, address, mnemonic) of every account.
+        :return:
+            Returns the numbers of the added accounts
+        """
+        with self._lock, self._file_lock():
+            existing = self._read_file()
+
+            known = {address for _, address, _ in existing.values()}
+            for _, address, _ in accounts:
+                if address in known:
+                    raise ValueError(f"The account {address} is already in the keystore.")
+                known.add(address)
+
+            reserved = self.reserved_numbers() if self.reserved_numbers is not None else ()
+            first = max([0, *existing, *reserved]) + 1
+            numbers = range(first, first + len(accounts))
+
+            self._write_file({**existing, **{number: tuple(account) for number, account in zip(numbers, accounts)}})
+
+        return numbers
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + '.lock'), 'w') as lockfile:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[int, Tuple[str, str, str]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return {}
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return self._accounts
+
+        with self._lock:
+            if stamp != self._stamp:
+                accounts = self._read_file()
+                self._by_address = {address: number for number, (_, address, _) in accounts.items()}
+                self._accounts = accounts
+                self._stamp = stamp
+            return self._accounts
+
+    def _read_file(self) -> Dict[int, Tuple[str, str, str]]:
+        try:
+            with open(self.path) as file:
+                content = json.load(file)
+        except FileNotFoundError:
+            return {}
+
+        version = content.get("version")
+        if version == 1:
+            # the accounts were numbered by their position
+            return {number: tuple(account) for number, account in enumerate(content["accounts"], start=1)}
+        if version != KEYSTORE_VERSION:
+            raise ValueError(f"Unsupported keystore version {version} in {self.path}.")
+        return {number: tuple(account) for number, *account in content["accounts"]}
+
+    def _write_file(self, accounts: Dict[int, Tuple[str, str, str]]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so concurrent readers never see a partial keystore.
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump({"version": KEYSTORE_VERSION,
+                           "accounts": [[number, *account] for number, account in sorted(accounts.items())]},
+                          file, separators=(',', ':'))
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def main():
+    from src.blockchain_utils.credentials import get_keystore, provision_accounts
+
+    parser = argparse.ArgumentParser(description="Provision or inspect the accounts of the keystore.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    provision_parser = subparsers.add_parser("provision", help="generate new accounts")
+    provision_parser.add_argument("count", type=int)
+    provision_parser.add_argument("--workers", type=int, default=None)
+
+    lookup_parser = subparsers.add_parser("lookup", help="print the number and address of an account")
+    lookup_parser.add_argument("account", help="number or address of the account")
+
+    subparsers.add_parser("stats", help="print the location and size of the keystore")
+    args = parser.parse_args()
+
+    keystore = get_keystore()
+
+    if args.command == "provision":
+        numbers = provision_accounts(args.count, workers=args.workers)
+        print(f"Added the accounts {numbers.start}..{numbers.stop - 1} to {keystore.path}")
+    elif args.command == "lookup":
+        if args.account.isdigit():
+            account = keystore.get(int(args.account))
+        else:
+            account = keystore.get_by_address(args.account)
+        if account is None:
+            raise SystemExit(f"There is no account {args.account} in {keystore.path}")
+        print(f"{keystore.account_id(account[1])}: {account[1]}")
+    else:
+        print(json.dumps({"path": str(keystore.path), "accounts": len(keystore)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,870 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import msgpack
+from algosdk import encoding
+from algosdk.future import transaction as algo_txn
+
+from src.blockchain_utils.logic_sig_template import encode_varuint
+from src.smart_contracts.cornhole_asc1 import MAX_BATCH, WIN_PTS
+
+GENESIS_ID = "cornhole-local-v1"
+GENESIS_HASH = base64.b64encode(hashlib.sha256(GENESIS_ID.encode('utf-8')).digest()).decode('ascii')
+
+# channel reported in the build version, tells the stand-in apart from a real node
+STAND_IN_CHANNEL = "cornhole-local-stand-in"
+
+MIN_FEE = 1000
+MIN_BALANCE = 100000
+MAX_VALIDITY_ROUNDS = 1000
+FIRST_APP_ID = 1000
+# blocks that are kept and served by /v2/blocks/{round}
+KEPT_BLOCKS = 1000
+
+# mirrors of the DefaultValues of the CornHole application
+BET_AMOUNT = 1000000
+GAME_DURATION_IN_SECONDS = 3600
+
+# opcodes the fake assembler emits, pushint for integer constants and "+" for everything else
+_PUSHINT = b'\x81'
+_FILLER = b'\x08'
+
+
+class _Rejected(Exception):
+    """
+    Raised when a transaction group would be rejected by a real node.
+    """
+
+
+class _LedgerState:
+    """
+    State the transactions are applied to: balances, applications and the next application id.
+    """
+
+    def __init__(self, initial_balance: int):
+        self.initial_balance = initial_balance
+        self.balances: Dict[str, int] = {}
+        self.apps: Dict[int, dict] = {}
+        self.next_app_id = FIRST_APP_ID
+
+    def copy(self) -> '_LedgerState':
+        state = _LedgerState(self.initial_balance)
+        state.balances = dict(self.balances)
+        state.apps = {app_id: {"creator": app["creator"], "global": dict(app["global"])}
+                      for app_id, app in self.apps.items()}
+        state.next_app_id = self.next_app_id
+        return state
+
+    def balance(self, address: str) -> int:
+        return self.balances.get(address, self.initial_balance)
+
+    def min_balance(self, address: str) -> int:
+        return MIN_BALANCE * (1 + sum(app["creator"] == address for app in self.apps.values()))
+
+    def transfer(self, sender: str, receiver: Optional[str], amount: int, fee: int):
+        if self.balance(sender) < amount + fee:
+            raise _Rejected(f"overspend (account {sender})")
+        if 0 < self.balance(sender) - amount - fee < self.min_balance(sender):
+            raise _Rejected(f"account {sender} balance below min")
+        self.balances[sender] = self.balance(sender) - amount - fee
+        if receiver is not None:
+            self.balances[receiver] = self.balance(receiver) + amount
+
+
+def _global_state_entries(global_state: dict) -> List[dict]:
+    entries = []
+    for key, value in global_state.items():
+        if isinstance(value, bytes):
+            entries.append({"key": base64.b64encode(key).decode('ascii'),
+                            "value": {"type": 1, "bytes": base64.b64encode(value).decode('ascii'), "uint": 0}})
+        else:
+            entries.append({"key": base64.b64encode(key).decode('ascii'),
+                            "value": {"type": 2, "bytes": "", "uint": value}})
+    return entries
+
+
+def _global_state_delta(before: dict, after: dict) -> List[dict]:
+    delta = []
+    for key in sorted(set(before) | set(after)):
+        if key not in after:
+            delta.append({"key": base64.b64encode(key).decode('ascii'), "value": {"action": 3}})
+        elif before.get(key) != after[key]:
+            value = after[key]
+            if isinstance(value, bytes):
+                delta.append({"key": base64.b64encode(key).decode('ascii'),
+                              "value": {"action": 1, "bytes": base64.b64encode(value).decode('ascii')}})
+            else:
+                delta.append({"key": base64.b64encode(key).decode('ascii'),
+                              "value": {"action": 2, "uint": value}})
+    return delta
+
+
+def _btoi(value: bytes) -> int:
+    if len(value) > 8:
+        raise _Rejected("btoi arg too long")
+    return int.from_bytes(value, 'big')
+
+
+def assemble(source: str) -> bytes:
+    """
+    Fake TEAL assembler. It does not produce runnable programs, but the output is deterministic, passes the program
+    checks of the SDK and stores every integer constant as a varuint, as the real assembler does, so LogicSig
+    addresses and LogicSigTemplate work against it.
+    :param source: TEAL source code.
+    :return:
+    """
+    lines = source.splitlines()
+    version = 1
+    if lines and lines[0].startswith('#pragma version'):
+        version = int(lines[0].split()[-1])
+
+    program = bytearray(encode_varuint(version))
+    for line in lines:
+        words = line.split('//')[0].split()
+        if not words or words[0].startswith('#') or words[0].endswith(':'):
+            continue
+        if words[0] in ('int', 'pushint') and len(words) > 1 and words[1].isdigit():
+            program += _PUSHINT + encode_varuint(int(words[1]))
+        else:
+            program += _FILLER
+
+    return bytes(program)
+
+
+class LocalNetwork:
+    """
+    In-memory stand-in for algod and the indexer, for load testing the DApp offline. It produces a block every
+    block_time seconds, applies payments and evaluates the CornHole application calls in Python with the semantics of
+    cornhole_asc1, so game state and global state deltas behave as on the TestNet. Signatures and LogicSig programs
+    are not verified.
+
+    Faults can be injected: a fixed plus a random latency for every request, HTTP 429 responses, transactions that
+    are accepted but dropped from the pool instead of being confirmed, and transactions that are accepted but whose
+    response is lost, answered with a 504 as by a proxy that timed out. With pending_cache_rounds, confirmed
+    transactions are only known to pending_transaction_info for that many rounds, as on algod.
+    """
+
+    def __init__(self,
+                 block_time: float = 1.0,
+                 latency: float = 0.0,
+                 latency_jitter: float = 0.0,
+                 rate_limit_probability: float = 0.0,
+                 drop_probability: float = 0.0,
+                 response_loss_probability: float = 0.0,
+                 initial_balance: int = 10 ** 12,
+                 pending_cache_rounds: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self.block_time = block_time
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit_probability = rate_limit_probability
+        self.drop_probability = drop_probability
+        self.response_loss_probability = response_loss_probability
+        self.pending_cache_rounds = pending_cache_rounds
+
+        self.round = 1
+        self.round_started_at = time.monotonic()
+        self.timestamp = int(time.time())
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.responses_lost = 0
+        self.confirmed = 0
+        self.dropped = 0
+
+        self._state = _LedgerState(initial_balance)
+        self._pool: List[Tuple[List[str], bool]] = []
+        self._pending_state: Optional[_LedgerState] = None
+        self._transactions: Dict[str, dict] = {}
+        # round -> signed transactions in block of the confirmed transactions of the round
+        self._blocks: Dict[int, List[dict]] = {self.round: []}
+        self._leases: Dict[Tuple[str, bytes], int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._new_block = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._producer = None
+
+    def start(self):
+        """
+        Starts the block production.
+        """
+        if self._producer is not None:
+            return
+        self._stop.clear()
+        self._producer = threading.Thread(target=self._produce_blocks, name="local-node-blocks", daemon=True)
+        self._producer.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._producer is not None:
+            self._producer.join()
+            self._producer = None
+
+    def inject_faults(self) -> Optional[Tuple[int, dict]]:
+        """
+        Sleeps for the configured latency and decides whether the request is rate limited.
+        :return:
+            Returns the response of a rate limited request, None otherwise.
+        """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0.0, self.latency_jitter)
+            is_rate_limited = self._random.random() < self.rate_limit_probability
+            if is_rate_limited:
+                self.rate_limited += 1
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if is_rate_limited:
+            return 429, {"message": "Too Many Requests"}
+        return None
+
+    def lose_response(self) -> Optional[Tuple[int, dict]]:
+        """
+        Decides whether the response to an accepted transaction is lost.
+        :return:
+            Returns the response the client gets instead, None if the response is delivered.
+        """
+        with self._lock:
+            if self._random.random() >= self.response_loss_probability:
+                return None
+            self.responses_lost += 1
+        return 504, {"message": "upstream request timeout"}
+
+    def set_balance(self, address: str, amount: int):
+        """
+        Sets the confirmed balance of an account, e.g. to give a player less than the bet.
+        :param address: address of the account.
+        :param amount: balance in microAlgos.
+        """
+        with self._lock:
+            self._state.balances[address] = amount
+            self._pending_state = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "round": self.round,
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "responses_lost": self.responses_lost,
+                "confirmed": self.confirmed,
+                "dropped": self.dropped,
+                "pending": sum(len(txids) for txids, _ in self._pool),
+            }
+
+    # algod endpoints
+
+    def status(self) -> dict:
+        with self._lock:
+            return self._status()
+
+    def _status(self) -> dict:
+        return {
+            "last-round": self.round,
+            "last-version": GENESIS_ID,
+            "next-version": GENESIS_ID,
+            "next-version-round": self.round + 1,
+            "next-version-supported": True,
+            "time-since-last-round": int((time.monotonic() - self.round_started_at) * 1e9),
+            "catchup-time": 0,
+            "stopped-at-unsupported-round": False,
+        }
+
+    def versions(self) -> dict:
+        # the build is marked as the stand-in, its fake assembler output must never be mistaken for a real node's
+        return {"genesis_id": GENESIS_ID,
+                "genesis_hash_b64": GENESIS_HASH,
+                "build": {"major": 0, "minor": 0, "build_number": 0, "commit_hash": "", "branch": "",
+                          "channel": STAND_IN_CHANNEL},
+                "versions": ["v2"]}
+
+    def status_after_block(self, round_num: int, timeout: float = 60.0) -> dict:
+        deadline = time.monotonic() + timeout
+        with self._new_block:
+            while self.round <= round_num and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._new_block.wait(remaining)
+            return self._status()
+
+    def suggested_params(self) -> dict:
+        with self._lock:
+            return {
+                "consensus-version": GENESIS_ID,
+                "fee": 0,
+                "genesis-hash": GENESIS_HASH,
+                "genesis-id": GENESIS_ID,
+                "last-round": self.round,
+                "min-fee": MIN_FEE,
+            }
+
+    def compile(self, source: str) -> dict:
+        program = assemble(source)
+        return {"hash": encoding.encode_address(hashlib.new('sha512_256', b"Program" + program).digest()),
+                "result": base64.b64encode(program).decode('ascii')}
+
+    def send_raw_transaction(self, raw: bytes) -> dict:
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(raw)
+        group = [encoding.future_msgpack_decode(decoded) for decoded in unpacker]
+
+        if not group:
+            raise _Rejected("empty transaction group")
+
+        with self._lock:
+            txids = [self._check_transaction(stx) for stx in group]
+
+            group_ids = {stx.transaction.group for stx in group}
+            if len(group) > 1 and (len(group_ids) != 1 or None in group_ids):
+                raise _Rejected("transactions of the group do not share a group id")
+
+            # Evaluated on top of the groups already in the pool like the pending block of algod, so a group may
+            # depend on one that is not confirmed yet. The group is evaluated again when the block is assembled.
+            state = self._get_pending_state().copy()
+            self._apply_group(state, group)
+            self._pending_state = state
+
+            for txid, stx in zip(txids, group):
+                self._transactions[txid] = {"stx": stx, "pool-error": "", "confirmed-round": 0}
+                if stx.transaction.lease:
+                    self._leases[(stx.transaction.sender, stx.transaction.lease)] = stx.transaction.last_valid_round
+
+            self._pool.append((txids, self._random.random() < self.drop_probability))
+
+        return {"txId": txids[0]}
+
+    def pending_transaction_info(self, txid: str) -> Optional[dict]:
+        with self._lock:
+            info = self._transactions.get(txid)
+            if info is None:
+                return None
+
+            # like algod, only recently confirmed transactions are still known, older ones are found in the blocks
+            if self.pending_cache_rounds is not None and info["confirmed-round"] \
+                    and self.round - info["confirmed-round"] > self.pending_cache_rounds:
+                return None
+
+            response = {key: value for key, value in info.items() if key != "stx"}
+            response["txn"] = {"txn": self._transaction_json(info["stx"].transaction)}
+            return response
+
+    def application_info(self, app_id: int) -> Optional[dict]:
+        with self._lock:
+            app = self._state.apps.get(app_id)
+            if app is None:
+                return None
+            return self._application_json(app_id, app)
+
+    def account_info(self, address: str) -> dict:
+        with self._lock:
+            amount = self._state.balance(address)
+            created_apps = [self._application_json(app_id, app)
+                            for app_id, app in self._state.apps.items() if app["creator"] == address]
+
+        return {
+            "address": address,
+            "amount": amount,
+            "amount-without-pending-rewards": amount,
+            "min-balance": MIN_BALANCE * (1 + len(created_apps)),
+            "created-apps": created_apps,
+            "pending-rewards": 0,
+            "rewards": 0,
+            "round": self.round,
+            "status": "Offline",
+        }
+
+    def block(self, round_num: int) -> Optional[bytes]:
+        """
+        :param round_num: round of the block.
+        :return:
+            Returns the msgpack encoded block as served by algod with format=msgpack, None for unknown rounds. The
+            block header only has the fields the DApp reads.
+        """
+        with self._lock:
+            txns = self._blocks.get(round_num)
+            if txns is None:
+                return None
+            block = {"gen": GENESIS_ID, "gh": base64.b64decode(GENESIS_HASH), "rnd": round_num, "txns": txns}
+
+        # algod encodes Go strings, such as the keys of the state deltas, as msgpack strings whatever bytes they hold
+        return msgpack.packb({"block": block, "cert": {}}, use_bin_type=True, unicode_errors='surrogateescape')
+
+    # indexer endpoints
+
+    def health(self) -> dict:
+        with self._lock:
+            return {"round": self.round, "db-available": True, "is-migrating": False, "message": str(self.round)}
+
+    def search_applications(self, application_id: Optional[int] = None) -> dict:
+        with self._lock:
+            apps = [self._application_json(app_id, app) for app_id, app in sorted(self._state.apps.items())
+                    if application_id is None or app_id == application_id]
+            return {"applications": apps, "current-round": self.round}
+
+    # block production
+
+    def _produce_blocks(self):
+        while not self._stop.wait(self.block_time):
+            with self._new_block:
+                self.round += 1
+                self.round_started_at = time.monotonic()
+                self.timestamp = max(self.timestamp + 1, int(time.time()))
+
+                self._blocks[self.round] = []
+                self._blocks.pop(self.round - KEPT_BLOCKS, None)
+
+                pool, self._pool = self._pool, []
+                for txids, is_dropped in pool:
+                    self._confirm_group(txids, is_dropped)
+                self._pending_state = None
+
+                self._leases = {lease: last_valid for lease, last_valid in self._leases.items()
+                                if last_valid >= self.round}
+                self._new_block.notify_all()
+
+    def _get_pending_state(self) -> _LedgerState:
+        if self._pending_state is None:
+            self._pending_state = self._state.copy()
+            for txids, _ in self._pool:
+                state = self._pending_state.copy()
+                try:
+                    self._apply_group(state, [self._transactions[txid]["stx"] for txid in txids])
+                except _Rejected:
+                    continue
+                self._pending_state = state
+        return self._pending_state
+
+    def _confirm_group(self, txids: List[str], is_dropped: bool):
+        group = [self._transactions[txid]["stx"] for txid in txids]
+
+        error = "transaction dropped from the pool" if is_dropped else None
+        results = None
+        if error is None:
+            # the group is atomic, it is applied to a copy that only replaces the ledger when all of it went through
+            state = self._state.copy()
+            try:
+                results = self._apply_group(state, group)
+            except _Rejected as e:
+                error = str(e)
+            else:
+                self._state = state
+
+        for idx, txid in enumerate(txids):
+            info = self._transactions[txid]
+            if error is not None:
+                info["pool-error"] = error
+                self.dropped += 1
+            else:
+                info["confirmed-round"] = self.round
+                info.update(results[idx])
+                self._blocks[self.round].append(self._block_transaction(info["stx"], results[idx]))
+                self.confirmed += 1
+
+    def _check_transaction(self, stx) -> str:
+        txn = stx.transaction
+        txid = txn.get_txid()
+
+        if txid in self._transactions:
+            raise _Rejected(f"transaction already in ledger: {txid}")
+        if txn.genesis_hash != GENESIS_HASH:
+            raise _Rejected("genesis hash mismatch")
+        if not txn.first_valid_round <= self.round + 1 <= txn.last_valid_round:
+            raise _Rejected(f"txn dead: round {self.round + 1} outside of "
+                            f"{txn.first_valid_round}--{txn.last_valid_round}")
+        if txn.last_valid_round - txn.first_valid_round > MAX_VALIDITY_ROUNDS:
+            raise _Rejected("validity window too long")
+        if txn.fee < MIN_FEE:
+            raise _Rejected(f"transaction had fee {txn.fee}, which is less than the minimum {MIN_FEE}")
+        if txn.lease and self._leases.get((txn.sender, txn.lease), 0) >= self.round + 1:
+            raise _Rejected(f"transaction {txid} using an overlapping lease")
+
+        return txid
+
+    def _apply_group(self, state: _LedgerState, group: list) -> List[dict]:
+        results = []
+        for idx, stx in enumerate(group):
+            txn = stx.transaction
+            if isinstance(txn, algo_txn.PaymentTxn):
+                state.transfer(txn.sender, txn.receiver, txn.amt, txn.fee)
+                results.append({})
+            elif isinstance(txn, algo_txn.ApplicationCallTxn):
+                state.transfer(txn.sender, None, 0, txn.fee)
+                results.append(self._evaluate_application_call(state, group, idx))
+            else:
+                raise _Rejected(f"unsupported transaction type {txn.type}")
+        return results
+
+    def _evaluate_application_call(self, state: _LedgerState, group: list, idx: int) -> dict:
+        txn = group[idx].transaction
+
+        if txn.on_complete and txn.on_complete != algo_txn.OnComplete.NoOpOC:
+            raise _Rejected("only NoOp application calls are supported")
+
+        if not txn.index:
+            app_id = state.next_app_id
+            state.next_app_id += 1
+            global_state = {b"PlayerXState": 0, b"PlayerOState": 0, b"GameState": 0, b"BetAmount": BET_AMOUNT}
+            state.apps[app_id] = {"creator": txn.sender, "global": global_state}
+            return {"application-index": app_id, "global-state-delta": _global_state_delta({}, global_state)}
+
+        app = state.apps.get(txn.index)
+        if app is None:
+            raise _Rejected(f"application {txn.index} does not exist")
+
+        before = dict(app["global"])
+        _CornHoleEvaluator(app["global"], group, idx, self.timestamp).evaluate()
+
+        return {"global-state-delta": _global_state_delta(before, app["global"])}
+
+    # block and JSON representations
+
+    @staticmethod
+    def _block_transaction(stx, result: dict) -> dict:
+        """
+        Signed transaction in block: the genesis id and hash are left out of the transaction and flagged instead, the
+        apply data holds the created application and the global state delta.
+        """
+        # canonical like the blocks of algod, zero values are left out and the txid of the transaction is kept
+        signed = msgpack.unpackb(base64.b64decode(encoding.msgpack_encode(stx)), raw=False)
+        txn = dict(signed["txn"])
+        txn.pop("gh", None)
+        signed["hgh"] = True
+        if txn.pop("gen", None):
+            signed["hgi"] = True
+        signed["txn"] = txn
+
+        if "application-index" in result:
+            signed["apid"] = result["application-index"]
+
+        global_delta = {}
+        for entry in result.get("global-state-delta", []):
+            value = {"at": entry["value"]["action"]}
+            if entry["value"].get("bytes"):
+                value["bs"] = base64.b64decode(entry["value"]["bytes"]).decode('utf-8', 'surrogateescape')
+            if entry["value"].get("uint"):
+                value["ui"] = entry["value"]["uint"]
+            global_delta[base64.b64decode(entry["key"]).decode('utf-8', 'surrogateescape')] = value
+        if global_delta:
+            signed["dt"] = {"gd": global_delta}
+
+        return signed
+
+
+    @staticmethod
+    def _transaction_json(txn) -> dict:
+        result = {"type": txn.type, "snd": txn.sender, "fee": txn.fee, "fv": txn.first_valid_round,
+                  "lv": txn.last_valid_round}
+        if txn.group:
+            result["grp"] = base64.b64encode(txn.group).decode('ascii')
+        if txn.lease:
+            result["lx"] = base64.b64encode(txn.lease).decode('ascii')
+        if txn.note:
+            result["note"] = base64.b64encode(txn.note).decode('ascii')
+        if isinstance(txn, algo_txn.PaymentTxn):
+            result.update({"rcv": txn.receiver, "amt": txn.amt})
+        elif isinstance(txn, algo_txn.ApplicationCallTxn):
+            result["apid"] = txn.index or 0
+            result["apaa"] = [base64.b64encode(arg).decode('ascii') for arg in txn.app_args or []]
+        return result
+
+    @staticmethod
+    def _application_json(app_id: int, app: dict) -> dict:
+        return {"id": app_id,
+                "params": {"creator": app["creator"],
+                           "global-state": _global_state_entries(app["global"]),
+                           "global-state-schema": {"num-uint": 5, "num-byte-slice": 4},
+                           "local-state-schema": {"num-uint": 0, "num-byte-slice": 0}}}
+
+
+class _CornHoleEvaluator:
+    """
+    Python rendition of the approval program of cornhole_asc1, it raises _Rejected wherever the program would fail.
+    """
+
+    def __init__(self, global_state: dict, group: list, idx: int, timestamp: int):
+        self.global_state = global_state
+        self.group = group
+        self.txn = group[idx].transaction
+        self.timestamp = timestamp
+
+    def evaluate(self):
+        args = self.txn.app_args or []
+        action = args[0] if args else b""
+
+        if action == b"SetupPlayers":
+            self._setup_players()
+        elif action == b"ActionMove" and len(self.group) == 1:
+            point = _btoi(self._arg(1))
+            self._assert(point <= WIN_PTS, "point out of range")
+            self._player_move(point)
+        elif action == b"ActionMoveBatch" and len(self.group) == 1:
+            throws = self._arg(1)
+            self._assert(1 <= len(throws) <= MAX_BATCH, "batch size out of range")
+            self._assert(all(point <= WIN_PTS for point in throws), "point out of range")
+            self._player_move(sum(throws))
+        elif action == b"MoneyRefund":
+            self._money_refund()
+        else:
+            raise _Rejected("logic eval error: no matching action")
+
+    def _arg(self, idx: int) -> bytes:
+        args = self.txn.app_args or []
+        self._assert(idx < len(args), f"invalid ApplicationArgs index {idx}")
+        return args[idx]
+
+    def _gtxn(self, idx: int):
+        self._assert(idx < len(self.group), f"invalid group index {idx}")
+        return self.group[idx].transaction
+
+    def _get(self, key: bytes):
+        return self.global_state.get(key, 0)
+
+    @staticmethod
+    def _assert(condition: bool, message: str):
+        if not condition:
+            raise _Rejected(f"logic eval error: assert failed: {message}")
+
+    @staticmethod
+    def _address(value) -> bytes:
+        return encoding.decode_address(value)
+
+    def _setup_players(self):
+        if b"PlayerXAddress" in self.global_state or b"PlayerOAddress" in self.global_state:
+            raise _Rejected("logic eval error: the players are already set up")
+
+        payment_x, payment_o = self._gtxn(1), self._gtxn(2)
+        self._assert(isinstance(payment_x, algo_txn.PaymentTxn) and isinstance(payment_o, algo_txn.PaymentTxn),
+                     "funding transactions should be payments")
+        self._assert(payment_x.receiver == payment_o.receiver, "funding receivers differ")
+        self._assert(payment_x.amt == self._get(b"BetAmount") and payment_o.amt == self._get(b"BetAmount"),
+                     "funding amount differs from the bet amount")
+
+        self.global_state[b"PlayerXAddress"] = self._address(payment_x.sender)
+        self.global_state[b"PlayerOAddress"] = self._address(payment_o.sender)
+        self.global_state[b"PlayerTurnAddress"] = self._address(payment_x.sender)
+        self.global_state[b"FundsEscrowAddress"] = self._address(payment_x.receiver)
+        self.global_state[b"ActionTimeout"] = self.timestamp + GAME_DURATION_IN_SECONDS
+
+    def _player_move(self, points: int):
+        state_x, state_o = self._get(b"PlayerXState"), self._get(b"PlayerOState")
+        sender = self._address(self.txn.sender)
+
+        self._assert(self.timestamp <= self._get(b"ActionTimeout"), "the game has timed out")
+        self._assert(self._get(b"GameState") == 0, "the game has finished")
+        self._assert(sender == self.global_state.get(b"PlayerTurnAddress"), "it is not the turn of the sender")
+        self._assert(state_x < WIN_PTS and state_o < WIN_PTS, "a player has already won")
+
+        if sender == self.global_state.get(b"PlayerXAddress"):
+            self.global_state[b"PlayerXState"] = state_x + points
+            if state_x + points >= WIN_PTS:
+                self.global_state[b"GameState"] = 1
+            self.global_state[b"PlayerTurnAddress"] = self.global_state[b"PlayerOAddress"]
+        elif sender == self.global_state.get(b"PlayerOAddress"):
+            self.global_state[b"PlayerOState"] = state_o + points
+            if state_o + points >= WIN_PTS:
+                self.global_state[b"GameState"] = 2
+            self.global_state[b"PlayerTurnAddress"] = self.global_state[b"PlayerXAddress"]
+        else:
+            raise _Rejected("logic eval error: the sender is not a player")
+
+    def _money_refund(self):
+        refund = self._gtxn(1)
+        self._assert(isinstance(refund, algo_txn.PaymentTxn), "the refund should be a payment")
+        self._assert(self._address(refund.sender) == self.global_state.get(b"FundsEscrowAddress"),
+                     "the refund should come from the escrow")
+
+        game_status = self._get(b"GameState")
+        is_timed_out = game_status == 0 and self.timestamp > self._get(b"ActionTimeout")
+        turn = self.global_state.get(b"PlayerTurnAddress")
+
+        has_x_won = game_status == 1 or (is_timed_out and turn == self.global_state.get(b"PlayerOAddress"))
+        has_o_won = game_status == 2 or (is_timed_out and turn == self.global_state.get(b"PlayerXAddress"))
+
+        if has_x_won:
+            winner, status = self.global_state.get(b"PlayerXAddress"), 1
+        elif has_o_won:
+            winner, status = self.global_state.get(b"PlayerOAddress"), 2
+        else:
+            raise _Rejected("logic eval error: there is no winner")
+
+        self._assert(self._address(refund.receiver) == winner, "the refund should go to the winner")
+        self._assert(refund.amt == 2 * self._get(b"BetAmount"), "the refund should be twice the bet amount")
+        self.global_state[b"GameState"] = status
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    _PENDING_PATH = re.compile(r"^/v2/transactions/pending/([A-Z2-7]+)$")
+    _WAIT_PATH = re.compile(r"^/v2/status/wait-for-block-after/(\d+)$")
+    _BLOCK_PATH = re.compile(r"^/v2/blocks/(\d+)$")
+    _APPLICATION_PATH = re.compile(r"^/v2/applications/(\d+)$")
+    _ACCOUNT_PATH = re.compile(r"^/v2/accounts/([A-Z2-7]+)$")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self, method: str):
+        network: LocalNetwork = self.server.network
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        response = network.inject_faults()
+        if response is None:
+            try:
+                response = self._route(network, method, url.path, parse_qs(url.query), body)
+                if method == "POST" and url.path == "/v2/transactions" and response[0] == 200:
+                    response = network.lose_response() or response
+            except _Rejected as e:
+                response = 400, {"message": str(e)}
+            except Exception as e:
+                response = 400, {"message": f"{type(e).__name__}: {e}"}
+
+        status, payload = response
+        is_msgpack = isinstance(payload, bytes)
+        data = payload if is_msgpack else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/msgpack' if is_msgpack else 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, network: LocalNetwork, method: str, path: str, query: dict, body: bytes) -> Tuple[int, dict]:
+        not_found = 404, {"message": "not found"}
+
+        if method == "POST":
+            if path == "/v2/transactions":
+                return 200, network.send_raw_transaction(body)
+            if path == "/v2/teal/compile":
+                return 200, network.compile(body.decode('utf-8'))
+            return not_found
+
+        if path == "/health":
+            return 200, network.health()
+        if path == "/versions":
+            return 200, network.versions()
+        if path == "/v2/status":
+            return 200, network.status()
+        if path == "/v2/transactions/params":
+            return 200, network.suggested_params()
+        if path == "/v2/applications":
+            application_id = query.get("application-id")
+            return 200, network.search_applications(int(application_id[0]) if application_id else None)
+
+        match = self._PENDING_PATH.match(path)
+        if match:
+            info = network.pending_transaction_info(match.group(1))
+            return (200, info) if info is not None else (404, {"message": "txn does not exist"})
+
+        match = self._BLOCK_PATH.match(path)
+        if match:
+            block = network.block(int(match.group(1)))
+            return (200, block) if block is not None else (404, {"message": "ledger does not have entry"})
+
+        match = self._WAIT_PATH.match(path)
+        if match:
+            return 200, network.status_after_block(int(match.group(1)))
+
+        match = self._APPLICATION_PATH.match(path)
+        if match:
+            info = network.application_info(int(match.group(1)))
+            return (200, info) if info is not None else (404, {"message": "application does not exist"})
+
+        match = self._ACCOUNT_PATH.match(path)
+        if match:
+            return 200, network.account_info(match.group(1))
+
+        return not_found
+
+
+class LocalNodeServer:
+    """
+    Serves a LocalNetwork over HTTP with the algod and the indexer API on the same address.
+    """
+
+    def __init__(self, network: LocalNetwork, host: str = "127.0.0.1", port: int = 4001):
+        self.network = network
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.network = network
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Starts the block production and serves the requests from a background thread.
+        """
+        self.network.start()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-node-http", daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        self.network.start()
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self.network.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local algod/indexer stand-in for offline load testing. Point "
+                                                 "client_credentials.address and indexer_address of config.yml "
+                                                 "at the printed address.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4001)
+    parser.add_argument("--block-time", type=float, default=1.0, help="seconds between two blocks")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="random seconds added on top of latency")
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--drop-probability", type=float, default=0.0,
+                        help="share of transaction groups dropped instead of confirmed")
+    parser.add_argument("--response-loss-probability", type=float, default=0.0,
+                        help="share of accepted transaction groups answered with a 504")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    network = LocalNetwork(block_time=args.block_time,
+                           latency=args.latency,
+                           latency_jitter=args.latency_jitter,
+                           rate_limit_probability=args.rate_limit_probability,
+                           drop_probability=args.drop_probability,
+                           response_loss_probability=args.response_loss_probability,
+                           seed=args.seed)
+    server = LocalNodeServer(network, host=args.host, port=args.port)
+
+    print(f"Local algod/indexer listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(network.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
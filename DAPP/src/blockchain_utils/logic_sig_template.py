@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import weakref
+from typing import Callable, Dict, Tuple
+
+from algosdk import logic as algo_logic
+from algosdk.v2client import algod
+from pyteal import Expr, Mode
+
+from src.blockchain_utils.async_client import AsyncAlgodClient
+from src.blockchain_utils.teal_artifact_cache import TealArtifactCache
+
+
+def encode_varuint(value: int) -> bytes:
+    """
+    Encodes the integer the way TEAL stores integer constants in the program bytes.
+    :param value: non-negative integer.
+    :return:
+    """
+    if value < 0:
+        raise ValueError('TEAL integers can not be negative.')
+    if value >= 1 << 64:
+        raise ValueError('TEAL integers are 64 bit.')
+
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+
+    return bytes(encoded)
+
+
+class LogicSigTemplate:
+    """
+    PyTeal program with a single integer parameter (TMPL_ style) that is compiled once and instantiated for every value
+    by substituting the bytes of the integer constant. The program is compiled with two sentinel values and the slot is
+    located as the only byte range in which the two compiled programs differ.
+
+    Substituted values must keep the length of the slot, otherwise branch offsets that span the constant would break,
+    so one template is kept per encoded length. In practice this is a single template, since all application ids of a
+    network have the same length for a long time.
+    """
+
+    def __init__(self,
+                 program: Callable[[int], Expr],
+                 mode: Mode,
+                 version: int,
+                 teal_cache: TealArtifactCache = None):
+        self.program = program
+        self.mode = mode
+        self.version = version
+        self.teal_cache = teal_cache if teal_cache is not None else TealArtifactCache()
+
+        self._templates: Dict[int, Tuple[bytes, int]] = {}
+        self._lock = threading.Lock()
+        # event loop -> lock of the async compiles, an asyncio lock only works on the loop it was first used on
+        self._async_locks = weakref.WeakKeyDictionary()
+
+    def program_bytes(self, client: algod.AlgodClient, value: int) -> bytes:
+        """
+        Returns the program bytes for the given value. The client is only used the first time a template for values of
+        this length is compiled, and even then the compiled programs usually come from the TEAL artifact cache.
+        :param client: algorand client.
+        :param value: value of the integer parameter.
+        :return:
+        """
+        encoded = encode_varuint(value)
+        template, offset = self._template(client, len(encoded))
+
+        return template[:offset] + encoded + template[offset + len(encoded):]
+
+    def address(self, client: algod.AlgodClient, value: int) -> str:
+        """
+        Returns the address of the logic signature for the given value.
+        :param client: algorand client.
+        :param value: value of the integer parameter.
+        :return:
+        """
+        return algo_logic.address(self.program_bytes(client, value))
+
+    async def program_bytes_async(self, client: AsyncAlgodClient, value: int) -> bytes:
+        """
+        Same as program_bytes, for the async algorand client.
+        """
+        encoded = encode_varuint(value)
+        template, offset = await self._template_async(client, len(encoded))
+
+        return template[:offset] + encoded + template[offset + len(encoded):]
+
+    def _template(self, client: algod.AlgodClient, length: int) -> Tuple[bytes, int]:
+        with self._lock:
+            template = self._templates.get(length)
+            if template is None:
+                template = self._templates[length] = self._compile_template(client, length)
+            return template
+
+    async def _template_async(self, client: AsyncAlgodClient, length: int) -> Tuple[bytes, int]:
+        with self._lock:
+            template = self._templates.get(length)
+        if template is not None:
+            return template
+
+        # Coroutines of a loop compile a template once, like the threads of the sync path. A sync caller that compiles
+        # at the same time finds the artifacts of the other one in the TEAL artifact cache, the first template is kept.
+        with self._lock:
+            lock = self._async_locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+
+        async with lock:
+            with self._lock:
+                template = self._templates.get(length)
+            if template is not None:
+                return template
+
+            low_sentinel, high_sentinel = self._sentinels(length)
+            low_program = await self.teal_cache.compile_program_async(client, self.program, self.mode, self.version,
+                                                                      low_sentinel)
+            high_program = await self.teal_cache.compile_program_async(client, self.program, self.mode, self.version,
+                                                                       high_sentinel)
+
+            with self._lock:
+                return self._templates.setdefault(length, self._locate_slot(length, low_program, high_program))
+
+    @staticmethod
+    def _sentinels(length: int) -> Tuple[int, int]:
+        # Smallest and largest value of this encoded length, every byte of their encodings differs but the last one of
+        # 10 byte values, which only holds the 64th bit. Single byte values stay clear of the small constants programs
+        # already use.
+        low_sentinel = 1 << (7 * (length - 1)) if length > 1 else 42
+        high_sentinel = min((1 << (7 * length)) - 1, (1 << 64) - 1) if length > 1 else 85
+
+        return low_sentinel, high_sentinel
+
+    def _compile_template(self, client: algod.AlgodClient, length: int) -> Tuple[bytes, int]:
+        low_sentinel, high_sentinel = self._sentinels(length)
+
+        low_program = self.teal_cache.compile_program(client, self.program, self.mode, self.version, low_sentinel)
+        high_program = self.teal_cache.compile_program(client, self.program, self.mode, self.version, high_sentinel)
+
+        return self._locate_slot(length, low_program, high_program)
+
+    def _locate_slot(self, length: int, low_program: bytes, high_program: bytes) -> Tuple[bytes, int]:
+        low_sentinel, high_sentinel = self._sentinels(length)
+        low_encoded = encode_varuint(low_sentinel)
+        expected = [idx for idx, (low, high) in enumerate(zip(low_encoded, encode_varuint(high_sentinel)))
+                    if low != high]
+
+        differences = [idx for idx, (low, high) in enumerate(zip(low_program, high_program)) if low != high]
+        offset = differences[0] - expected[0] if differences else 0
+
+        if (len(low_program) != len(high_program)
+                or [idx - offset for idx in differences] != expected
+                or low_program[offset:offset + length] != low_encoded):
+            raise ValueError(f'{self.program.__name__} does not compile to a template with a single integer slot.')
+
+        return low_program, offset
@@ -1,30 +1,50 @@
 import base64
+import time
 from typing import Optional
 
 from algosdk.future.transaction import SignedTransaction
-from algosdk.v2client import algod
+from algosdk.v2client import algod, indexer
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.blockchain_utils.idempotent_submitter import IdempotentSubmitter
+from src.blockchain_utils.transaction_repository import get_default_suggested_params
+from src.metrics_utils.metrics import METRICS
 
 
 class NetworkInteraction:
 
     @staticmethod
-    def wait_for_confirmation(client: algod.AlgodClient, txid, log=True):
+    def wait_for_confirmation(client: algod.AlgodClient, txid, log=True, timeout_seconds: Optional[float] = None):
         """
         Utility function to wait until the transaction is
-        confirmed before proceeding.
+        confirmed before proceeding. The wait is served by the block follower shared by all transactions of the client.
         """
-        last_round = client.status().get('last-round')
-        txinfo = client.pending_transaction_info(txid)
-        while not (txinfo.get('confirmed-round') and txinfo.get('confirmed-round') > 0):
-            if log:
-                print("Waiting for confirmation")
-            last_round += 1
-            client.status_after_block(last_round)
-            txinfo = client.pending_transaction_info(txid)
+        if log:
+            print("Waiting for confirmation")
+        with METRICS.span("wait_for_confirmation"):
+            txinfo = ConfirmationTracker.for_client(client).wait(txid, timeout_seconds)
         if log:
             print(f"Transaction {txid} confirmed in round {txinfo.get('confirmed-round')}.")
         return txinfo
 
+    @staticmethod
+    def wait_for_indexer(indexer_client: indexer.IndexerClient, round_num: int, timeout_seconds: float = 30.0,
+                         poll_interval: float = 0.5):
+        """
+        Waits until the indexer has caught up with the given round, so queries against it see its transactions.
+        :param indexer_client: algorand indexer.
+        :param round_num: round that the indexer needs to have processed.
+        :param timeout_seconds: time after which TimeoutError is raised.
+        :param poll_interval: time in seconds between two health checks.
+        :return:
+        """
+        deadline = time.monotonic() + timeout_seconds
+        with METRICS.span("wait_for_indexer"):
+            while indexer_client.health().get('round', 0) < round_num:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"The indexer did not reach round {round_num} in time.")
+                time.sleep(poll_interval)
+
     @staticmethod
     def get_default_suggested_params(client: algod.AlgodClient):
         """
@@ -32,12 +52,7 @@ class NetworkInteraction:
         :param client:
         :return:
         """
-        suggested_params = client.suggested_params()
-
-        suggested_params.flat_fee = True
-        suggested_params.fee = 1000
-
-        return suggested_params
+        return get_default_suggested_params(client)
 
     @staticmethod
     def submit_asa_creation(client: algod.AlgodClient, transaction: SignedTransaction) -> Optional[int]:
@@ -47,7 +62,7 @@ class NetworkInteraction:
         :param transaction:
         :return:
         """
-        txid = client.send_transaction(transaction)
+        txid = IdempotentSubmitter.for_client(client).submit(transaction)
 
         NetworkInteraction.wait_for_confirmation(client, txid)
 
@@ -61,7 +76,15 @@ class NetworkInteraction:
 
     @staticmethod
     def submit_transaction(client: algod.AlgodClient, transaction: SignedTransaction, log=True) -> Optional[str]:
-        txid = client.send_transaction(transaction)
+        """
+        Submits a transaction and waits for its confirmation. Transient errors are retried and a transaction that is
+        submitted again is recognised, see IdempotentSubmitter.
+        :param client:
+        :param transaction:
+        :param log:
+        :return:
+        """
+        txid = IdempotentSubmitter.for_client(client).submit(transaction)
 
         NetworkInteraction.wait_for_confirmation(client, txid, log)
 
@@ -75,5 +98,6 @@ class NetworkInteraction:
         :return:
             Decoded byte program
         """
-        compile_response = client.compile(source_code)
+        with METRICS.span("compile"):
+            compile_response = client.compile(source_code)
         return base64.b64decode(compile_response['result'])
@@ -0,0 +1,146 @@
+import base64
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+from algosdk import encoding
+from algosdk.future import transaction as algo_txn
+
+from src.metrics_utils.metrics import METRICS
+
+# (transaction, private key of the sender or LogicSig of the escrow)
+SigningJob = Tuple[algo_txn.Transaction, Union[str, algo_txn.LogicSig]]
+
+# below this many jobs the round trip to the pool costs more than signing in the calling thread
+INLINE_JOBS = 32
+
+
+def sign_job(txn: algo_txn.Transaction, signer: Union[str, algo_txn.LogicSig]):
+    """
+    :param txn: transaction to sign.
+    :param signer: private key of the sender or LogicSig of the escrow.
+    :return:
+        Returns SignedTransaction or LogicSigTransaction
+    """
+    if isinstance(signer, algo_txn.LogicSig):
+        return algo_txn.LogicSigTransaction(txn, signer)
+    return txn.sign(signer)
+
+
+def sign_jobs(jobs: List[SigningJob]) -> List[bytes]:
+    """
+    Signs the transactions and encodes them.
+    :param jobs: (transaction, private key or LogicSig) pairs.
+    :return:
+        Returns the msgpack encoded signed transactions, in the order of the jobs
+    """
+    return [base64.b64decode(encoding.msgpack_encode(sign_job(txn, signer))) for txn, signer in jobs]
+
+
+class SigningService:
+    """
+    Signs transactions in a process pool, so that starting or settling many games at once uses every core for the
+    ed25519 signatures and the msgpack encoding. The signed transactions are returned encoded, the encodings of a
+    group are concatenated and sent with send_raw_transaction.
+
+    Small batches, such as the group of a single game, are signed in the calling thread.
+    """
+    _shared: Optional['SigningService'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, workers: Optional[int] = None, inline_jobs: int = INLINE_JOBS):
+        """
+        :param workers: processes of the pool, by default one per core.
+        :param inline_jobs: batches smaller than this are signed in the calling thread.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.inline_jobs = inline_jobs
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'SigningService':
+        """
+        :return:
+            Returns the signing service shared by the whole process.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def shutdown(self):
+        """
+        Stops the processes of the pool, a later call starts a new pool.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def sign(self, jobs: List[SigningJob]) -> List[bytes]:
+        """
+        :param jobs: (transaction, private key or LogicSig) pairs.
+        :return:
+            Returns the msgpack encoded signed transactions, in the order of the jobs
+        """
+        return self.submit(jobs).result()
+
+    def sign_groups(self, groups: List[List[SigningJob]]) -> List[bytes]:
+        """
+        Signs many groups with a single batch.
+        :param groups: jobs of every group, the group ids must already be assigned.
+        :return:
+            Returns the encoded signed transactions of every group concatenated, ready for send_raw_transaction
+        """
+        encoded = self.sign([job for group in groups for job in group])
+
+        raw_groups, start = [], 0
+        for group in groups:
+            raw_groups.append(b"".join(encoded[start:start + len(group)]))
+            start += len(group)
+        return raw_groups
+
+    def submit(self, jobs: List[SigningJob]) -> Future:
+        """
+        :param jobs: (transaction, private key or LogicSig) pairs.
+        :return:
+            Returns a future of the msgpack encoded signed transactions, in the order of the jobs
+        """
+        if len(jobs) < self.inline_jobs or self.workers == 1:
+            future = Future()
+            with METRICS.span("sign"):
+                future.set_result(sign_jobs(jobs))
+            return future
+
+        # one chunk per process, so every process pays the round trip once
+        size = -(-len(jobs) // self.workers)
+        chunk_futures = [self._get_executor().submit(sign_jobs, jobs[start:start + size])
+                         for start in range(0, len(jobs), size)]
+
+        future = Future()
+        pending = [len(chunk_futures)]
+        lock = threading.Lock()
+
+        def chunk_done(_):
+            with lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            try:
+                future.set_result([encoded for chunk in chunk_futures for encoded in chunk.result()])
+            except Exception as e:
+                future.set_exception(e)
+
+        for chunk_future in chunk_futures:
+            chunk_future.add_done_callback(chunk_done)
+        return future
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
@@ -0,0 +1,143 @@
+import copy
+import logging
+import threading
+import time
+import weakref
+
+from algosdk.future.transaction import SuggestedParams
+from algosdk.v2client import algod
+
+logger = logging.getLogger(__name__)
+
+
+class SuggestedParamsCache:
+    """
+    Shared cache of the suggested params of a single algod client. The params are fetched once and handed out as
+    copies until they expire, either after ttl_seconds or when the validity window of the cached first round is about
+    to run out. While the cache is in use a background thread refreshes it shortly before it expires, so builders
+    almost never wait on the suggested params round trip.
+
+    The round trip itself never runs under the lock of the cache, so a refresh does not hold up the callers that are
+    served from the cache meanwhile. Callers that find the cache empty or expired wait for a single fetch.
+    """
+
+    _caches = weakref.WeakKeyDictionary()
+    _caches_lock = threading.Lock()
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 ttl_seconds: float = 30.0,
+                 round_time: float = 4.5,
+                 safety_rounds: int = 100,
+                 background_refresh: bool = True):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.round_time = round_time
+        self.safety_rounds = safety_rounds
+        self.background_refresh = background_refresh
+
+        self.fetches = 0
+        self.hits = 0
+
+        self._params = None
+        self._expires_at = 0.0
+        self._used_since_fetch = False
+        self._lock = threading.Lock()
+        # held for the round trip of a fetch, so that concurrent misses and the refresh fetch only once
+        self._fetch_lock = threading.Lock()
+        self._refresh_thread = None
+
+    @classmethod
+    def for_client(cls, client: algod.AlgodClient) -> 'SuggestedParamsCache':
+        """
+        Returns the cache shared by everyone that uses the given client.
+        :param client: algorand client.
+        :return:
+        """
+        with cls._caches_lock:
+            cache = cls._caches.get(client)
+            if cache is None:
+                cache = cls._caches[client] = cls(client)
+            return cache
+
+    def get(self) -> SuggestedParams:
+        """
+        Returns a copy of the cached suggested params, fetching them first if they have expired.
+        :return:
+        """
+        params = self._cached()
+        if params is None:
+            with self._fetch_lock:
+                # another caller may have fetched them while this one waited
+                params = self._cached()
+                if params is None:
+                    params = self._fetch()
+
+        with self._lock:
+            self._used_since_fetch = True
+
+        if self.background_refresh:
+            self._ensure_refresh_thread()
+
+        return copy.copy(params)
+
+    def invalidate(self):
+        """
+        Drops the cached params, the next call to get fetches them again.
+        """
+        with self._lock:
+            self._params = None
+            self._expires_at = 0.0
+
+    def _cached(self):
+        with self._lock:
+            if self._params is None or time.monotonic() >= self._expires_at:
+                return None
+            self.hits += 1
+            return self._params
+
+    def _fetch(self) -> SuggestedParams:
+        params = self.client.suggested_params()
+
+        rounds_left = params.last - params.first - self.safety_rounds
+        lifetime = min(self.ttl_seconds, max(0.0, rounds_left * self.round_time))
+
+        with self._lock:
+            self.fetches += 1
+            self._params = params
+            self._expires_at = time.monotonic() + lifetime
+            self._used_since_fetch = False
+        return params
+
+    def _ensure_refresh_thread(self):
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+
+        self._refresh_thread = threading.Thread(target=self._refresh_loop,
+                                                name="suggested-params-refresh",
+                                                daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            with self._lock:
+                refresh_in = self._expires_at - time.monotonic() - self.ttl_seconds * 0.2
+
+            if refresh_in > 0:
+                time.sleep(refresh_in)
+                continue
+
+            with self._lock:
+                # Nobody asked for params since the last fetch, let them expire instead of polling an idle node.
+                if not self._used_since_fetch:
+                    self._refresh_thread = None
+                    return
+
+            try:
+                with self._fetch_lock:
+                    self._fetch()
+            except Exception:
+                logger.exception("Refreshing the suggested params failed")
+                with self._lock:
+                    self._refresh_thread = None
+                return
@@ -0,0 +1,269 @@
+import argparse
+import base64
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import re
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+from importlib import metadata
+from typing import Callable, Optional, Tuple
+
+from algosdk.v2client import algod
+from pyteal import Expr, Mode, compileTeal
+
+from src.blockchain_utils.async_client import AsyncAlgodClient
+from src.blockchain_utils.async_network_interaction import AsyncNetworkInteraction
+from src.blockchain_utils.credentials import get_project_root_path
+from src.blockchain_utils.network_interaction import NetworkInteraction
+
+PYTEAL_VERSION = metadata.version('pyteal')
+
+# how long the identity of a node is trusted before /versions is asked again, so an upgraded node gets new artifacts
+COMPILER_IDENTITY_TTL = 300.0
+
+
+def _sha256(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _compiler_identity(versions: dict) -> Tuple[str, str]:
+    """
+    Derives the identity of the compiler from the /versions response of a node.
+    :param versions: response of the /versions endpoint.
+    :return:
+        Returns (namespace, compiler id). The namespace is the network and release channel of the node, so artifacts of
+        the local stand-in or of another network are never shared with a real node. The compiler id also covers the
+        genesis hash and the build of the node.
+    """
+    build = versions.get("build") or {}
+    namespace = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{versions.get('genesis_id', '')}-{build.get('channel', '')}")
+    compiler_id = _sha256(versions.get("genesis_id", ""),
+                          versions.get("genesis_hash_b64", ""),
+                          str(build.get("major")),
+                          str(build.get("minor")),
+                          str(build.get("build_number")),
+                          str(build.get("commit_hash")),
+                          str(build.get("channel")))
+    return namespace, compiler_id
+
+
+class TealArtifactCache:
+    """
+    Content-addressed on-disk cache of compiled TEAL programs. It has two levels:
+    - sources: hash of the PyTeal source module, the program arguments, the PyTeal version, the mode and the TEAL
+    version -> generated TEAL text, so a hit skips building the PyTeal AST.
+    - artifacts: hash of the generated TEAL text, the TEAL version and the compiler identity -> assembled program
+    bytes, so a hit skips the compile round trip.
+
+    The compiler identity is taken from the /versions endpoint of the node (genesis id and hash, build version and
+    channel) and the artifacts of every network are kept in a directory of their own, not keyed by the algod address,
+    which the local stand-in shares with a sandbox node.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else get_project_root_path() / '.teal_cache'
+
+        self.source_hits = 0
+        self.source_misses = 0
+        self.artifact_hits = 0
+        self.artifact_misses = 0
+
+        self._identities = weakref.WeakKeyDictionary()
+        self._identities_lock = threading.Lock()
+
+    def stats(self) -> dict:
+        """
+        :return:
+            Returns the hit and miss counters of this process together with the number of entries on disk.
+        """
+        return {
+            "source_hits": self.source_hits,
+            "source_misses": self.source_misses,
+            "artifact_hits": self.artifact_hits,
+            "artifact_misses": self.artifact_misses,
+            "sources_on_disk": self._count_entries('sources'),
+            "artifacts_on_disk": self._count_entries('artifacts'),
+        }
+
+    def invalidate(self):
+        """
+        Removes every cached source and artifact.
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def compile_program(self,
+                        client: algod.AlgodClient,
+                        program: Callable[..., Expr],
+                        mode: Mode,
+                        version: int,
+                        *program_args) -> bytes:
+        """
+        Returns the assembled bytes of the PyTeal program, building and compiling it only on a cache miss.
+        :param client: algorand client used to compile the program on a miss.
+        :param program: function that builds the PyTeal expression.
+        :param mode: mode of the program.
+        :param version: TEAL version.
+        :param program_args: arguments passed to the program function.
+        :return:
+        """
+        _, program_bytes = self.compile_program_with_source(client, program, mode, version, *program_args)
+        return program_bytes
+
+    def compile_program_with_source(self,
+                                    client: algod.AlgodClient,
+                                    program: Callable[..., Expr],
+                                    mode: Mode,
+                                    version: int,
+                                    *program_args) -> Tuple[str, bytes]:
+        """
+        Same as compile_program, but also returns the generated TEAL text.
+        :return:
+            Returns (TEAL text, assembled program bytes).
+        """
+        teal = self.generate_teal(program, mode, version, *program_args)
+
+        identity = self._cached_identity(client)
+        if identity is None:
+            identity = self._store_identity(client, client.versions())
+
+        namespace, compiler_id = identity
+        artifact_key = _sha256(_sha256(teal), str(version), compiler_id)
+        program_bytes = self._read_artifact(namespace, artifact_key)
+
+        if program_bytes is None:
+            program_bytes = NetworkInteraction.compile_program(client=client, source_code=teal)
+            self._write(f'artifacts/{namespace}', artifact_key,
+                        {"program": base64.b64encode(program_bytes).decode('ascii')})
+
+        return teal, program_bytes
+
+    async def compile_program_async(self,
+                                    client: AsyncAlgodClient,
+                                    program: Callable[..., Expr],
+                                    mode: Mode,
+                                    version: int,
+                                    *program_args) -> bytes:
+        """
+        Same as compile_program, for the async algorand client.
+        """
+        teal = self.generate_teal(program, mode, version, *program_args)
+
+        identity = self._cached_identity(client)
+        if identity is None:
+            identity = self._store_identity(client, await client.versions())
+
+        namespace, compiler_id = identity
+        artifact_key = _sha256(_sha256(teal), str(version), compiler_id)
+        program_bytes = self._read_artifact(namespace, artifact_key)
+
+        if program_bytes is None:
+            program_bytes = await AsyncNetworkInteraction.compile_program(client=client, source_code=teal)
+            self._write(f'artifacts/{namespace}', artifact_key,
+                        {"program": base64.b64encode(program_bytes).decode('ascii')})
+
+        return program_bytes
+
+    def generate_teal(self, program: Callable[..., Expr], mode: Mode, version: int, *program_args) -> str:
+        """
+        Returns the TEAL text of the PyTeal program, building the PyTeal AST only on a cache miss.
+        :param program: function that builds the PyTeal expression.
+        :param mode: mode of the program.
+        :param version: TEAL version.
+        :param program_args: arguments passed to the program function.
+        :return:
+        """
+        with open(inspect.getsourcefile(program), 'rb') as file:
+            module_hash = hashlib.sha256(file.read()).hexdigest()
+
+        source_key = _sha256(module_hash,
+                             program.__qualname__,
+                             repr(program_args),
+                             PYTEAL_VERSION,
+                             mode.name,
+                             str(version))
+
+        source = self._read('sources', source_key)
+        if source is not None:
+            self.source_hits += 1
+            return source["teal"]
+
+        self.source_misses += 1
+        teal = compileTeal(program(*program_args), mode=mode, version=version)
+        self._write('sources', source_key, {"teal": teal})
+
+        return teal
+
+    def _cached_identity(self, client) -> Optional[Tuple[str, str]]:
+        with self._identities_lock:
+            entry = self._identities.get(client)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def _store_identity(self, client, versions: dict) -> Tuple[str, str]:
+        identity = _compiler_identity(versions)
+        with self._identities_lock:
+            self._identities[client] = (time.monotonic() + COMPILER_IDENTITY_TTL, identity)
+        return identity
+
+    def _read_artifact(self, namespace: str, artifact_key: str) -> Optional[bytes]:
+        artifact = self._read(f'artifacts/{namespace}', artifact_key)
+
+        if artifact is None:
+            self.artifact_misses += 1
+            return None
+
+        self.artifact_hits += 1
+        return base64.b64decode(artifact["program"])
+
+    def _entry_path(self, kind: str, key: str) -> Path:
+        return self.cache_dir / kind / f"{key}.json"
+
+    def _count_entries(self, kind: str) -> int:
+        path = self.cache_dir / kind
+        return len(list(path.rglob('*.json'))) if path.exists() else 0
+
+    def _read(self, kind: str, key: str) -> Optional[dict]:
+        try:
+            with open(self._entry_path(kind, key)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, kind: str, key: str, entry: dict):
+        path = self._entry_path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so concurrent readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the compiled TEAL artifact cache.")
+    parser.add_argument("command", choices=["stats", "invalidate"])
+    args = parser.parse_args()
+
+    cache = TealArtifactCache()
+
+    if args.command == "invalidate":
+        cache.invalidate()
+        print(f"Removed the TEAL artifact cache in {cache.cache_dir}")
+    else:
+        print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,21 @@ from algosdk.v2client import algod
 from algosdk.future import transaction as algo_txn
 from typing import List, Any, Optional, Union
 from algosdk import account as algo_acc
-from algosdk.future.transaction import Transaction, SignedTransaction
+from algosdk.future.transaction import Transaction, SignedTransaction, SuggestedParams
 
+from src.blockchain_utils.suggested_params_cache import SuggestedParamsCache
+from src.metrics_utils.metrics import METRICS
 
-def get_default_suggested_params(client: algod.AlgodClient):
+
+def get_default_suggested_params(client: algod.AlgodClient) -> SuggestedParams:
     """
-    Gets default suggested params with flat transaction fee and fee amount of 1000.
+    Gets default suggested params with flat transaction fee and fee amount of 1000. The params are served from the
+    cache shared by all users of the client.
     :param client:
     :return:
     """
-    suggested_params = client.suggested_params()
+    with METRICS.span("suggested_params"):
+        suggested_params = SuggestedParamsCache.for_client(client).get()
 
     suggested_params.flat_fee = True
     suggested_params.fee = 1000
@@ -34,7 +39,8 @@ class ApplicationTransactionRepository:
                            global_schema: algo_txn.StateSchema,
                            local_schema: algo_txn.StateSchema,
                            app_args: Optional[List[Any]],
-                           sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                           sign_transaction: bool = True,
+                           suggested_params: Optional[SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
         Initiates a transaction that represents application creation. The transaction is optionally signed using the
         provided private key.
@@ -46,11 +52,13 @@ class ApplicationTransactionRepository:
         :param local_schema: local schema for the application.
         :param app_args: list of arguments for the application.
         :param sign_transaction: boolean value that determines whether the created transaction should be signed or not.
+        :param suggested_params: params to build the transaction with, the cached default params are used if omitted.
         :return:
             Returns SignedTransaction or Transaction depending on the boolean property sign_transaction.
         """
         creator_address = algo_acc.address_from_private_key(private_key=creator_private_key)
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         txn = algo_txn.ApplicationCreateTxn(sender=creator_address,
                                             sp=suggested_params,
@@ -62,7 +70,8 @@ class ApplicationTransactionRepository:
                                             app_args=app_args)
 
         if sign_transaction:
-            txn = txn.sign(private_key=creator_private_key)
+            with METRICS.span("sign"):
+                txn = txn.sign(private_key=creator_private_key)
 
         return txn
 
@@ -73,7 +82,10 @@ class ApplicationTransactionRepository:
                          app_id: int,
                          on_complete: algo_txn.OnComplete,
                          app_args: Optional[List[Any]] = None,
-                         sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                         note: Optional[bytes] = None,
+                         lease: Optional[bytes] = None,
+                         sign_transaction: bool = True,
+                         suggested_params: Optional[SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
         Creates a transaction that represents an application call.
         :param client: algorand client.
@@ -81,21 +93,29 @@ class ApplicationTransactionRepository:
         :param app_id: the application id which identifies the app.
         :param on_complete: Type of the application call.
         :param app_args: Arguments of the application.
+        :param note: note attached to the transaction, makes otherwise identical calls distinct.
+        :param lease: 32 byte lease, no other transaction of the caller with the same lease is accepted while the
+        transaction is valid.
         :param sign_transaction: boolean value that determines whether the created transaction should be signed or not.
+        :param suggested_params: params to build the transaction with, the cached default params are used if omitted.
         :return:
         Returns SignedTransaction or Transaction depending on the boolean property sign_transaction.
         """
         caller_address = algo_acc.address_from_private_key(private_key=caller_private_key)
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         txn = algo_txn.ApplicationCallTxn(sender=caller_address,
                                           sp=suggested_params,
                                           index=app_id,
                                           app_args=app_args,
-                                          on_complete=on_complete)
+                                          on_complete=on_complete,
+                                          note=note,
+                                          lease=lease)
 
         if sign_transaction:
-            txn = txn.sign(private_key=caller_private_key)
+            with METRICS.span("sign"):
+                txn = txn.sign(private_key=caller_private_key)
 
         return txn
 
@@ -120,7 +140,8 @@ class ASATransactionRepository:
                    clawback_address: Optional[str] = None,
                    url: Optional[str] = None,
                    default_frozen: bool = False,
-                   sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                   sign_transaction: bool = True,
+                   suggested_params: Optional[SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
 
         :param client:
@@ -137,10 +158,12 @@ class ASATransactionRepository:
         :param url:
         :param default_frozen:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
 
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         creator_address = algo_acc.address_from_private_key(private_key=creator_private_key)
 
@@ -159,7 +182,8 @@ class ASATransactionRepository:
                                       note=note)
 
         if sign_transaction:
-            txn = txn.sign(private_key=creator_private_key)
+            with METRICS.span("sign"):
+                txn = txn.sign(private_key=creator_private_key)
 
         return txn
 
@@ -176,7 +200,8 @@ class ASATransactionRepository:
                                 clawback_address: Optional[str] = None,
                                 url: Optional[str] = None,
                                 default_frozen: bool = False,
-                                sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                                sign_transaction: bool = True,
+                                suggested_params: Optional[SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
 
         :param client:
@@ -191,6 +216,7 @@ class ASATransactionRepository:
         :param url:
         :param default_frozen:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
 
@@ -207,24 +233,28 @@ class ASATransactionRepository:
                                                    clawback_address=clawback_address,
                                                    url=url,
                                                    default_frozen=default_frozen,
-                                                   sign_transaction=sign_transaction)
+                                                   sign_transaction=sign_transaction,
+                                                   suggested_params=suggested_params)
 
     @classmethod
     def asa_opt_in(cls,
                    client: algod.AlgodClient,
                    sender_private_key: str,
                    asa_id: int,
-                   sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                   sign_transaction: bool = True,
+                   suggested_params: Optional[SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
         Opts-in the sender's account to the specified asa with an id: asa_id.
         :param client:
         :param sender_private_key:
         :param asa_id:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
 
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
         sender_address = algo_acc.address_from_private_key(sender_private_key)
 
         txn = algo_txn.AssetTransferTxn(sender=sender_address,
@@ -234,7 +264,8 @@ class ASATransactionRepository:
                                         index=asa_id)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            with METRICS.span("sign"):
+                txn = txn.sign(private_key=sender_private_key)
 
         return txn
 
@@ -247,7 +278,8 @@ class ASATransactionRepository:
                      amount: int,
                      revocation_target: Optional[str],
                      sender_private_key: Optional[str],
-                     sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                     sign_transaction: bool = True,
+                     suggested_params: Optional[SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
         :param client:
         :param sender_address:
@@ -257,9 +289,11 @@ class ASATransactionRepository:
         :param revocation_target:
         :param sender_private_key:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         txn = algo_txn.AssetTransferTxn(sender=sender_address,
                                         sp=suggested_params,
@@ -269,7 +303,8 @@ class ASATransactionRepository:
                                         revocation_target=revocation_target)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            with METRICS.span("sign"):
+                txn = txn.sign(private_key=sender_private_key)
 
         return txn
 
@@ -283,7 +318,8 @@ class ASATransactionRepository:
                               freeze_address: Optional[str] = None,
                               clawback_address: Optional[str] = None,
                               strict_empty_address_check: bool = True,
-                              sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                              sign_transaction: bool = True,
+                              suggested_params: Optional[SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
         Changes the management properties of a given ASA.
         :param client:
@@ -295,16 +331,18 @@ class ASATransactionRepository:
         :param clawback_address:
         :param strict_empty_address_check:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
 
-        params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         current_manager_address = algo_acc.address_from_private_key(private_key=current_manager_pk)
 
         txn = algo_txn.AssetConfigTxn(
             sender=current_manager_address,
-            sp=params,
+            sp=suggested_params,
             index=asa_id,
             manager=manager_address,
             reserve=reserve_address,
@@ -313,7 +351,8 @@ class ASATransactionRepository:
             strict_empty_address_check=strict_empty_address_check)
 
         if sign_transaction:
-            txn = txn.sign(private_key=current_manager_pk)
+            with METRICS.span("sign"):
+                txn = txn.sign(private_key=current_manager_pk)
 
         return txn
 
@@ -327,7 +366,8 @@ class PaymentTransactionRepository:
                 receiver_address: str,
                 amount: int,
                 sender_private_key: Optional[str],
-                sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                sign_transaction: bool = True,
+                suggested_params: Optional[SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
         Creates a payment transaction in ALGOs.
         :param client:
@@ -336,9 +376,11 @@ class PaymentTransactionRepository:
         :param amount:
         :param sender_private_key:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         txn = algo_txn.PaymentTxn(sender=sender_address,
                                   sp=suggested_params,
@@ -346,6 +388,7 @@ class PaymentTransactionRepository:
                                   amt=amount)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            with METRICS.span("sign"):
+                txn = txn.sign(private_key=sender_private_key)
 
         return txn
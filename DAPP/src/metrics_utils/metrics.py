@@ -0,0 +1,242 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Deque, Dict
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, start_http_server
+
+# latency buckets in seconds, from a parse of a single frame up to a confirmation on a congested network
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+
+# millis() of the Arduino boards wraps around after 2^32 ms
+MILLIS_WRAP = 1 << 32
+
+
+class _NoopSpan:
+    """
+    Span handed out while the metrics are disabled, so a disabled span costs a single attribute check.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+
+    def __init__(self, metrics: 'Metrics', stage: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Latency histograms per named stage of the path from a board throw to its confirmation on chain, and counters of
+    events along the path. They are exposed in the Prometheus format on a local HTTP endpoint, the histograms can also be
+    dumped as JSON.
+
+    While disabled, span() returns a shared no-op context manager and observe() and count() return right away, so the
+    instrumentation can stay in the hot paths.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.registry = CollectorRegistry()
+        self.histogram = Histogram("cornhole_stage_seconds",
+                                   "Latency of the stages from a board throw to its confirmation on chain.",
+                                   labelnames=("stage",),
+                                   buckets=LATENCY_BUCKETS,
+                                   registry=self.registry)
+        self.counter = Counter("cornhole_events",
+                               "Events on the path from a board throw to the chain, e.g. suppressed duplicate lines.",
+                               labelnames=("event",),
+                               registry=self.registry)
+
+        self._counters: Dict[str, Counter] = {}
+        self._stages: Dict[str, Histogram] = {}
+        self._server_port = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> 'Metrics':
+        """
+        The metrics are enabled by CORNHOLE_METRICS=1.
+        :return:
+        """
+        return cls(enabled=os.environ.get("CORNHOLE_METRICS") == "1")
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, stage: str):
+        """
+        Context manager that records the time spent in its body as the latency of the stage.
+        :param stage: name of the stage.
+        :return:
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage)
+
+    def timed(self, stage: str) -> Callable:
+        """
+        Decorator that records the time spent in the function as the latency of the stage.
+        :param stage: name of the stage.
+        :return:
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage: str, seconds: float):
+        """
+        Records a latency of the stage.
+        :param stage: name of the stage.
+        :param seconds: latency in seconds.
+        """
+        if not self.enabled:
+            return
+
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(stage, self.histogram.labels(stage))
+        histogram.observe(seconds)
+
+    def count(self, event: str, amount: int = 1):
+        """
+        Counts occurrences of an event.
+        :param event: name of the event.
+        :param amount: occurrences to add.
+        """
+        if not self.enabled:
+            return
+
+        counter = self._counters.get(event)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(event, self.counter.labels(event))
+        counter.inc(amount)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        :return:
+            Returns the count of every counted event.
+        """
+        counts = {}
+        for metric in self.counter.collect():
+            for sample in metric.samples:
+                if sample.name.endswith("_total"):
+                    counts[sample.labels["event"]] = int(sample.value)
+        return counts
+
+    def serve(self, port: int = 9108, address: str = "127.0.0.1"):
+        """
+        Starts the Prometheus endpoint, does nothing if it is already running.
+        :param port: port of the endpoint.
+        :param address: address the endpoint listens on.
+        """
+        with self._lock:
+            if self._server_port is None:
+                start_http_server(port, addr=address, registry=self.registry)
+                self._server_port = port
+
+    def exposition(self) -> bytes:
+        """
+        :return:
+            Returns the histograms and the counters in the Prometheus text format.
+        """
+        return generate_latest(self.registry)
+
+    def dump(self) -> dict:
+        """
+        :return:
+            Returns count, sum and cumulative bucket counts of every stage.
+        """
+        stages = {}
+        for metric in self.histogram.collect():
+            for sample in metric.samples:
+                stage = stages.setdefault(sample.labels["stage"], {"count": 0, "sum": 0.0, "buckets": {}})
+                if sample.name.endswith("_count"):
+                    stage["count"] = int(sample.value)
+                elif sample.name.endswith("_sum"):
+                    stage["sum"] = sample.value
+                elif sample.name.endswith("_bucket"):
+                    stage["buckets"][sample.labels["le"]] = int(sample.value)
+        return stages
+
+    def dump_json(self, path: str):
+        """
+        Writes the dump of the histograms to a JSON file.
+        :param path: location of the file.
+        """
+        with open(path, "w") as file:
+            json.dump(self.dump(), file, indent=2, sort_keys=True)
+
+
+class DeviceClock:
+    """
+    Maps the millis() ticks of a device to host perf_counter time, to measure how long a frame took from the device to
+    the host. The offset between the clocks is estimated as the smallest observed difference over a window of recent
+    frames, so hop_latency is the delay of a frame on top of the fastest recent frame. The window lets the estimate
+    follow clock drift, a tick that jumps backwards is treated as a reset of the device.
+    """
+
+    def __init__(self, window: int = 128):
+        self._offsets: Deque[float] = collections.deque(maxlen=window)
+        self._last_tick = None
+        self._wraps = 0
+
+    def reset(self):
+        self._offsets.clear()
+        self._last_tick = None
+        self._wraps = 0
+
+    def hop_latency(self, tick: int, received_at: float) -> float:
+        """
+        :param tick: millis() of the device when it sent the frame.
+        :param received_at: perf_counter() of the host when it received the frame.
+        :return:
+            Returns the delay of the frame on top of the fastest frame of the window, in seconds.
+        """
+        if self._last_tick is not None and tick < self._last_tick:
+            if self._last_tick - tick > MILLIS_WRAP // 2:
+                self._wraps += 1
+            else:
+                self.reset()
+        self._last_tick = tick
+
+        device_time = (tick + self._wraps * MILLIS_WRAP) / 1000.0
+        self._offsets.append(received_at - device_time)
+
+        return received_at - device_time - min(self._offsets)
+
+
+METRICS = Metrics.from_environment()
@@ -0,0 +1,142 @@
+import collections
+from typing import Deque, Dict, Optional, Tuple
+
+from src.metrics_utils.metrics import METRICS, MILLIS_WRAP
+from src.serial_utils.frame_parser import BoardEvent, QrEvent, SerialEvent
+
+# A player can not throw twice within a second, the bounces of the lock flag of a board come within tens of ms.
+DEBOUNCE_WINDOW_MS = 1000
+
+# recent throws remembered per node, enough to recognize a line the board repeats after a few others
+HISTORY_SIZE = 16
+
+
+class _NodeHistory:
+    """
+    Recent throws of a single node, with the ticks unwrapped into a monotonic count of ms since the last reset.
+    """
+    __slots__ = ('throws', 'last_tick', 'last_accepted', 'wraps')
+
+    def __init__(self, history_size: int):
+        self.throws: Deque[Tuple[int, int]] = collections.deque(maxlen=history_size)
+        self.last_tick: Optional[int] = None
+        self.last_accepted: Optional[int] = None
+        self.wraps = 0
+
+    def reset(self):
+        self.throws.clear()
+        self.last_tick = None
+        self.last_accepted = None
+        self.wraps = 0
+
+
+class EventDebouncer:
+    """
+    Drops the lines a board sends more than once for a single throw, before they turn into transactions. The lock flag
+    of the boards bounces and every bounce makes the board report the throw again, so per node the debouncer keeps a
+    ring buffer of the recent (millis, score) throws and suppresses:
+
+    - duplicates: a throw whose millis and score are already in the ring buffer, the same line sent again.
+    - bounces: a throw less than window_ms after the last accepted throw of the node.
+
+    millis() of a board wraps around after 2^32 ms, a tick far below the previous one is unwrapped instead of being
+    taken for a reset, and a tick far above it after a wrap is a line from before the wrap sent again. Any other tick
+    that goes backwards means the board has restarted, its history is dropped.
+
+    QR registrations are only suppressed when a station sends exactly the same registration again.
+
+    A debouncer is used by the reader thread of a single device.
+    """
+
+    def __init__(self, device: str = '', window_ms: int = DEBOUNCE_WINDOW_MS, history_size: int = HISTORY_SIZE):
+        """
+        :param device: device the events come from.
+        :param window_ms: throws of a node closer than this to its last accepted throw are bounces.
+        :param history_size: throws remembered per node.
+        """
+        self.device = device
+        self.window_ms = window_ms
+        self.history_size = history_size
+
+        self.accepted = 0
+        self.duplicates = 0
+        self.bounces = 0
+        self.wraps = 0
+        self.resets = 0
+
+        self._nodes: Dict[str, _NodeHistory] = {}
+        self._registrations: Dict[str, Tuple[int, str]] = {}
+
+    @property
+    def suppressed(self) -> int:
+        """
+        :return:
+            Returns the number of events that were dropped, each one a play_action transaction that was not sent.
+        """
+        return self.duplicates + self.bounces
+
+    def accept(self, event: SerialEvent) -> bool:
+        """
+        :param event: event decoded from the device.
+        :return:
+            Returns whether the event is new and should be passed on.
+        """
+        if isinstance(event, BoardEvent):
+            return self._accept_throw(event)
+        if isinstance(event, QrEvent):
+            return self._accept_registration(event)
+        return True
+
+    def _accept_throw(self, event: BoardEvent) -> bool:
+        node = self._nodes.get(event.node_name)
+        if node is None:
+            node = self._nodes[event.node_name] = _NodeHistory(self.history_size)
+
+        tick = event.tick
+        if node.last_tick is not None and tick < node.last_tick:
+            if node.last_tick - tick > MILLIS_WRAP // 2:
+                node.wraps += 1
+                self.wraps += 1
+            elif (tick + node.wraps * MILLIS_WRAP, event.score) in node.throws:
+                # an older line sent again, not a restart
+                return self._duplicate()
+            else:
+                node.reset()
+                self.resets += 1
+                METRICS.count("serial_board_reset")
+        elif node.wraps and tick - node.last_tick > MILLIS_WRAP // 2:
+            # a line from before the last wrap sent again, not a jump of weeks
+            return self._duplicate()
+
+        unwrapped = tick + node.wraps * MILLIS_WRAP
+        if (unwrapped, event.score) in node.throws:
+            return self._duplicate()
+
+        node.last_tick = tick
+        node.throws.append((unwrapped, event.score))
+
+        if node.last_accepted is not None and unwrapped - node.last_accepted < self.window_ms:
+            return self._bounce()
+
+        node.last_accepted = unwrapped
+        self.accepted += 1
+        return True
+
+    def _accept_registration(self, event: QrEvent) -> bool:
+        registration = (event.timestamp, event.address)
+        if self._registrations.get(event.node_name) == registration:
+            return self._duplicate()
+
+        self._registrations[event.node_name] = registration
+        self.accepted += 1
+        return True
+
+    def _duplicate(self) -> bool:
+        self.duplicates += 1
+        METRICS.count("serial_duplicate")
+        return False
+
+    def _bounce(self) -> bool:
+        self.bounces += 1
+        METRICS.count("serial_bounce")
+        return False
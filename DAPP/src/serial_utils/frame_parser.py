@@ -0,0 +1,309 @@
+import base64
+import functools
+import struct
+from itertools import repeat
+from typing import List, Optional, Union
+
+from algosdk import encoding
+
+# Longest line any node sends is a QR registration (QR,X,<10 digit ts>,<58 char address>\r\n), anything longer
+# without a newline is garbage on the wire.
+MAX_FRAME_LENGTH = 128
+
+ALGORAND_ADDRESS_LENGTH = 58
+
+MAX_NODE_NAMES = 64
+
+# Large chunks are decoded in blocks of about this many bytes, which keeps the fields of a block in the cache.
+DECODE_BLOCK_SIZE = 8192
+
+# Binary registration sent by the QR code stations instead of the CSV line: STX, b'R', the node name as a single byte,
+# the unix time as uint32, the 32 byte public key of the address and the 4 byte checksum of the address. The frame
+# starts with STX, which never appears in the CSV lines, and has a fixed length, so it may contain any byte.
+STX = b'\x02'
+REGISTRATION_FRAME = struct.Struct('>1s1s1sI32s4s')
+REGISTRATION_TYPE = b'R'
+
+# validated addresses remembered by the parsers, a table sees the same few players over and over
+ADDRESS_CACHE_SIZE = 1024
+
+# Boards terminate lines with println, so the score is looked up together with the trailing carriage return.
+_SCORES = {b'0': 0, b'1': 1, b'2': 2, b'3': 3, b'0\r': 0, b'1\r': 1, b'2\r': 2, b'3\r': 3}
+# the same with the newline, which the column decoding keeps in the last field of every line
+_LINE_SCORES = {score + b'\n': value for score, value in _SCORES.items()}
+
+
+class BoardEvent:
+    """
+    Throw reported by a CornHole board: BRD,NODE_NAME,millis,score.
+    """
+    __slots__ = ('device', 'node_name', 'tick', 'score', 'received_at')
+
+    node_type = 'BRD'
+
+    def __init__(self, device: str, node_name: str, tick: int, score: int, received_at: float):
+        self.device = device
+        self.node_name = node_name
+        self.tick = tick
+        self.score = score
+        self.received_at = received_at
+
+    def __repr__(self):
+        return f"BoardEvent({self.device}: {self.node_name}, tick={self.tick}, score={self.score})"
+
+
+class QrEvent:
+    """
+    Player registration reported by a QR code station: QR,player,timestamp,address.
+    """
+    __slots__ = ('device', 'node_name', 'timestamp', 'address', 'received_at')
+
+    node_type = 'QR'
+
+    def __init__(self, device: str, node_name: str, timestamp: int, address: str, received_at: float):
+        self.device = device
+        self.node_name = node_name
+        self.timestamp = timestamp
+        self.address = address
+        self.received_at = received_at
+
+    def __repr__(self):
+        return f"QrEvent({self.device}: {self.node_name}, timestamp={self.timestamp}, address={self.address})"
+
+
+SerialEvent = Union[BoardEvent, QrEvent]
+
+
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def is_valid_address(address: bytes) -> bool:
+    """
+    :param address: base32 address as sent in a CSV registration.
+    :return:
+        Returns whether the checksum of the address matches its public key.
+    """
+    return encoding.is_valid_address(address.decode('ascii'))
+
+
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def address_from_public_key(public_key: bytes, checksum: bytes) -> Optional[str]:
+    """
+    :param public_key: public key of a binary registration.
+    :param checksum: checksum of the address of a binary registration.
+    :return:
+        Returns the base32 address, None if the checksum does not match the public key.
+    """
+    if encoding.checksum(public_key)[-len(checksum):] != checksum:
+        return None
+    return encoding.encode_address(public_key)
+
+
+def encode_registration(node_name: str, timestamp: int, address: str) -> bytes:
+    """
+    :param node_name: single character name of the QR code station.
+    :param timestamp: unix time of the scan.
+    :param address: base32 address of the player.
+    :return:
+        Returns the binary registration frame.
+    """
+    key_and_checksum = base64.b32decode(address + '=' * (-len(address) % 8))
+    return REGISTRATION_FRAME.pack(STX, REGISTRATION_TYPE, node_name.encode('ascii'), timestamp,
+                                   key_and_checksum[:32], key_and_checksum[32:])
+
+
+class FrameParser:
+    """
+    Incremental parser of the frames sent by the CornHole nodes: CSV lines, and the binary registrations of the QR code
+    stations that may come between them. Every call to feed decodes all of the complete frames in the received chunk
+    at once and keeps the incomplete remainder for the next chunk. Frames that do not match the expected layout
+    exactly, including registrations of addresses with a wrong checksum, are counted in frames_malformed instead of
+    being silently dropped.
+    """
+
+    def __init__(self, device: str = ''):
+        self.device = device
+        self.frames_decoded = 0
+        self.frames_malformed = 0
+        self._tail = b''
+        # validated and decoded node names, there are only a handful of them per device
+        self._node_names = _NodeNames()
+
+    def reset(self):
+        """
+        Drops the incomplete remainder, e.g. after the device has been reopened.
+        """
+        self._tail = b''
+
+    def feed(self, chunk: Union[bytes, bytearray, memoryview], received_at: float = 0.0) -> List[SerialEvent]:
+        """
+        Decodes every complete frame in the chunk.
+        :param chunk: bytes read from the device.
+        :param received_at: host time at which the chunk was read.
+        :return:
+            Returns the decoded events in the order they were received.
+        """
+        data = self._tail + chunk
+        events = []
+
+        if STX not in data:
+            self._tail = self._feed_lines(data, received_at, events)
+            return events
+
+        pos = 0
+        while True:
+            start = data.find(STX, pos)
+            if start < 0:
+                self._tail = self._feed_lines(data[pos:], received_at, events)
+                break
+
+            if start > pos and self._feed_lines(data[pos:start], received_at, events):
+                # a line cut short by the registration
+                self.frames_malformed += 1
+
+            frame_type = data[start + 1:start + 2]
+            if frame_type and frame_type != REGISTRATION_TYPE:
+                # a stray STX in the line noise, not the start of a registration
+                self.frames_malformed += 1
+                pos = start + 1
+                continue
+
+            end = start + REGISTRATION_FRAME.size
+            if end > len(data):
+                self._tail = data[start:]
+                break
+
+            self._feed_registration(data[start:end], received_at, events)
+            pos = end
+
+        return events
+
+    def _feed_lines(self, data: bytes, received_at: float, events: List[SerialEvent]) -> bytes:
+        """
+        Decodes the complete CSV lines of data into events, in blocks of about DECODE_BLOCK_SIZE bytes.
+        :return:
+            Returns the incomplete remainder.
+        """
+        pos = 0
+        while len(data) - pos > 2 * DECODE_BLOCK_SIZE:
+            cut = data.find(b'\n', pos + DECODE_BLOCK_SIZE) + 1
+            if not cut:
+                break
+            self._feed_block(data[pos:cut], received_at, events)
+            pos = cut
+
+        return self._feed_block(data[pos:], received_at, events)
+
+    def _feed_block(self, data: bytes, received_at: float, events: List[SerialEvent]) -> bytes:
+        """
+        Every newline is turned into the end of a field, so that a single split returns the fields of all of the lines,
+        in columns of four if every line has four fields. That is the case exactly if every fourth field ends with a
+        newline. The board lines between the lines whose last field is not a score are then decoded column by column,
+        other lines, and all of the lines of the block if one of them does not have four fields, one at a time.
+        :return:
+            Returns the incomplete remainder.
+        """
+        end = data.rfind(b'\n') + 1
+        tail = data[end:]
+
+        if len(tail) > MAX_FRAME_LENGTH:
+            self.frames_malformed += 1
+            tail = b''
+
+        lines = data.count(b'\n', 0, end)
+        fields = data[:end].replace(b'\n', b'\n,').split(b',')
+        fields.pop()
+        payloads = fields[3::4]
+
+        if len(fields) != 4 * lines or b''.join(payloads).count(b'\n') != lines:
+            for line in data[:end].split(b'\n')[:-1]:
+                self._feed_line(line, received_at, events)
+            return tail
+
+        node_types = fields[0::4]
+        names = list(map(self._node_names.__getitem__, fields[1::4]))
+        ticks = fields[2::4]
+        scores = list(map(_LINE_SCORES.get, payloads))
+
+        pos = 0
+        while pos < lines:
+            try:
+                run_end = scores.index(None, pos)
+            except ValueError:
+                run_end = lines
+
+            if run_end > pos:
+                self._feed_boards(node_types[pos:run_end], names[pos:run_end], ticks[pos:run_end],
+                                  scores[pos:run_end], received_at, events)
+            if run_end < lines:
+                self._feed_fields(node_types[run_end], names[run_end], ticks[run_end], payloads[run_end][:-1],
+                                  received_at, events)
+            pos = run_end + 1
+
+        return tail
+
+    def _feed_boards(self, node_types: List[bytes], names: List[Optional[str]], ticks: List[bytes], scores: List[int],
+                     received_at: float, events: List[SerialEvent]):
+        if node_types.count(b'BRD') == len(node_types) and None not in names and all(map(bytes.isdigit, ticks)):
+            events += map(BoardEvent, repeat(self.device), names, map(int, ticks), scores, repeat(received_at))
+            self.frames_decoded += len(names)
+            return
+
+        for node_type, name, tick, score in zip(node_types, names, ticks, scores):
+            if node_type == b'BRD' and name is not None and tick.isdigit():
+                events.append(BoardEvent(self.device, name, int(tick), score, received_at))
+                self.frames_decoded += 1
+            else:
+                self.frames_malformed += 1
+
+    def _feed_line(self, line: bytes, received_at: float, events: List[SerialEvent]):
+        fields = line.split(b',')
+        if len(fields) != 4:
+            self.frames_malformed += 1
+            return
+
+        node_type, node_name, tick, payload = fields
+        self._feed_fields(node_type, self._node_names[node_name], tick, payload, received_at, events)
+
+    def _feed_fields(self, node_type: bytes, name: Optional[str], tick: bytes, payload: bytes, received_at: float,
+                     events: List[SerialEvent]):
+        if name is None or not tick.isdigit():
+            self.frames_malformed += 1
+        elif node_type == b'BRD' and payload in _SCORES:
+            events.append(BoardEvent(self.device, name, int(tick), _SCORES[payload], received_at))
+            self.frames_decoded += 1
+        elif node_type == b'QR' and _is_address(payload.rstrip(b'\r')):
+            events.append(QrEvent(self.device, name, int(tick), payload.rstrip(b'\r').decode('ascii'), received_at))
+            self.frames_decoded += 1
+        else:
+            self.frames_malformed += 1
+
+    def _feed_registration(self, frame: bytes, received_at: float, events: List[SerialEvent]):
+        _, _, node_name, timestamp, public_key, checksum = REGISTRATION_FRAME.unpack(frame)
+
+        name = self._node_names[node_name]
+        address = address_from_public_key(public_key, checksum)
+        if name is None or address is None:
+            self.frames_malformed += 1
+            return
+
+        events.append(QrEvent(self.device, name, timestamp, address, received_at))
+        self.frames_decoded += 1
+
+class _NodeNames(dict):
+    """
+    Decoded node names by their bytes, filled on lookup with up to MAX_NODE_NAMES names. Names that are not
+    alphanumeric are looked up as None.
+    """
+
+    def __missing__(self, node_name: bytes) -> Optional[str]:
+        if not node_name.isalnum():
+            return None
+
+        name = node_name.decode('ascii')
+        if len(self) < MAX_NODE_NAMES:
+            self[node_name] = name
+        return name
+
+
+def _is_address(address: bytes) -> bool:
+    return len(address) == ALGORAND_ADDRESS_LENGTH and address.isalnum() and address.isupper() \
+        and is_valid_address(address)
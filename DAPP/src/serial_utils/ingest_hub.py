@@ -0,0 +1,195 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import serial
+
+from src.metrics_utils.metrics import METRICS, DeviceClock
+from src.serial_utils.event_debouncer import DEBOUNCE_WINDOW_MS, EventDebouncer
+from src.serial_utils.frame_parser import BoardEvent, FrameParser, SerialEvent
+
+logger = logging.getLogger(__name__)
+
+
+def open_serial_device(device: str, baudrate: int = 9600, read_timeout: float = 0.1) -> serial.Serial:
+    """
+    Opens the serial device with the settings used by the CornHole boards and the QR code stations.
+    :param device: path of the serial device.
+    :param baudrate: baudrate of the device.
+    :param read_timeout: timeout in seconds of a single read, so the reader can notice that the hub is stopped.
+    :return:
+    """
+    return serial.Serial(device,
+                         baudrate=baudrate,
+                         parity=serial.PARITY_NONE,
+                         stopbits=serial.STOPBITS_ONE,
+                         bytesize=serial.EIGHTBITS,
+                         timeout=read_timeout)
+
+
+class SerialIngestHub:
+    """
+    Keeps every serial device open for the lifetime of the hub and reads all of them concurrently, one reader thread
+    per device, so a quiet board never stalls the others. The parsed events of all devices are pushed on a single
+    bounded queue that is consumed by the game loop. The lines a bouncing board repeats for a single throw are dropped
+    by an EventDebouncer per device before they are queued.
+    """
+
+    def __init__(self,
+                 devices: List[str],
+                 queue_size: int = 1024,
+                 reconnect_delay: float = 1.0,
+                 serial_factory: Callable[[str], serial.Serial] = open_serial_device,
+                 debounce_window_ms: Optional[int] = DEBOUNCE_WINDOW_MS):
+        """
+        :param devices: serial devices of the boards and QR code stations.
+        :param queue_size: events that can wait for the game loop, the readers block once it is full.
+        :param reconnect_delay: time in seconds between attempts to reopen a failed device.
+        :param serial_factory: opens a device.
+        :param debounce_window_ms: throws of a node closer than this are bounces of the board, None passes every
+            event on.
+        """
+        self.devices = list(devices)
+        self.events = queue.Queue(maxsize=queue_size)
+        self.reconnect_delay = reconnect_delay
+        self.serial_factory = serial_factory
+
+        self.parsers = {device: FrameParser(device) for device in self.devices}
+        self.clocks = {device: DeviceClock() for device in self.devices}
+        self.debouncers = {device: EventDebouncer(device, debounce_window_ms) for device in self.devices} \
+            if debounce_window_ms is not None else {}
+
+        self._ports: Dict[str, serial.Serial] = {}
+        self._raw_taps: List[Callable[[str, bytes, float], None]] = []
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+
+    @property
+    def frames_decoded(self) -> int:
+        return sum(parser.frames_decoded for parser in self.parsers.values())
+
+    @property
+    def frames_malformed(self) -> int:
+        return sum(parser.frames_malformed for parser in self.parsers.values())
+
+    @property
+    def events_suppressed(self) -> int:
+        """
+        :return:
+            Returns the number of duplicate and bounced events that were dropped instead of being sent to the chain.
+        """
+        return sum(debouncer.suppressed for debouncer in self.debouncers.values())
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """
+        Starts one reader thread per device. Calling start on a running hub does nothing.
+        """
+        if self.is_running:
+            return
+
+        self._stop_event.clear()
+        self._threads = [threading.Thread(target=self._read_device,
+                                          args=(device,),
+                                          name=f"serial-ingest-{device}",
+                                          daemon=True)
+                         for device in self.devices]
+
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """
+        Stops the reader threads and closes all of the serial devices.
+        :param timeout: time in seconds to wait for each reader thread.
+        """
+        self._stop_event.set()
+
+        for thread in self._threads:
+            thread.join(timeout)
+
+        self._threads = []
+
+    def add_raw_tap(self, tap: Callable[[str, bytes, float], None]):
+        """
+        Registers a function that receives every chunk read from any device before it is parsed, e.g. to record a
+        session. It is called on the reader thread of the device and must not block.
+        :param tap: called with the device, the raw chunk and the perf_counter() time it was read at.
+        """
+        self._raw_taps = self._raw_taps + [tap]
+
+    def remove_raw_tap(self, tap: Callable[[str, bytes, float], None]):
+        self._raw_taps = [registered for registered in self._raw_taps if registered is not tap]
+
+    def get_event(self, timeout: Optional[float] = None) -> Optional[SerialEvent]:
+        """
+        Returns the next event from any of the devices.
+        :param timeout: time in seconds to wait for an event, None waits forever.
+        :return:
+            Returns the event or None if no event was received within the timeout.
+        """
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _publish(self, event: SerialEvent):
+        # Block the reader rather than dropping events, the OS buffers the device in the meantime.
+        while not self._stop_event.is_set():
+            try:
+                self.events.put(event, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _read_device(self, device: str):
+        parser = self.parsers[device]
+        clock = self.clocks[device]
+        debouncer = self.debouncers.get(device)
+
+        while not self._stop_event.is_set():
+            port = self._ports.get(device)
+
+            try:
+                if port is None:
+                    port = self.serial_factory(device)
+                    self._ports[device] = port
+
+                chunk = port.read(port.in_waiting or 1)
+            except (serial.SerialException, OSError) as e:
+                logger.warning("Serial device %s failed: %s", device, e)
+                self._close_device(device)
+                parser.reset()
+                clock.reset()
+                self._stop_event.wait(self.reconnect_delay)
+                continue
+
+            if not chunk:
+                continue
+
+            received_at = time.perf_counter()
+            for tap in self._raw_taps:
+                tap(device, chunk, received_at)
+
+            with METRICS.span("serial_parse"):
+                events = parser.feed(chunk, received_at=received_at)
+
+            for event in events:
+                if debouncer is not None and not debouncer.accept(event):
+                    continue
+                if METRICS.enabled and isinstance(event, BoardEvent):
+                    METRICS.observe("serial_hop", clock.hop_latency(event.tick, received_at))
+                self._publish(event)
+
+        self._close_device(device)
+
+    def _close_device(self, device: str):
+        port = self._ports.pop(device, None)
+
+        if port is not None and port.isOpen():
+            port.close()
@@ -0,0 +1,286 @@
+import argparse
+import os
+import threading
+import time
+import tty
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.serial_utils.ingest_hub import SerialIngestHub
+from src.storage_utils.event_log import EventLog
+
+# record types of a session
+SESSION = "session"
+RAW = "raw"
+
+
+class SessionRecorder:
+    """
+    Records the raw byte streams of every device of a SerialIngestHub, with the time every chunk was read at, into an
+    EventLog. The recording holds exactly what the boards sent, duplicate and garbled lines included, so it can be
+    replayed through the whole pipeline later.
+    """
+
+    def __init__(self, path: Path):
+        self.event_log = EventLog(path)
+        self.chunks = 0
+        self.bytes = 0
+        self._started = None
+
+    def attach(self, hub: SerialIngestHub):
+        """
+        Starts recording every chunk the hub reads.
+        :param hub: hub to record.
+        """
+        self._started = time.perf_counter()
+        self.event_log.append({"t": SESSION, "devices": hub.devices, "started_at": time.time()})
+        hub.add_raw_tap(self.record)
+
+    def detach(self, hub: SerialIngestHub):
+        hub.remove_raw_tap(self.record)
+
+    def record(self, device: str, chunk: bytes, received_at: float):
+        """
+        Appends a chunk to the recording.
+        :param device: device the chunk was read from.
+        :param chunk: raw bytes.
+        :param received_at: perf_counter() time the chunk was read at.
+        """
+        self.event_log.append({"t": RAW, "device": device, "at": received_at - self._started, "data": chunk})
+        self.chunks += 1
+        self.bytes += len(chunk)
+
+    def close(self):
+        self.event_log.close()
+
+
+class _ReplayPort:
+    """
+    Stand-in for serial.Serial that returns the chunks recorded for a single device at their recorded times.
+    """
+
+    def __init__(self, replayer: 'SessionReplayer', chunks: List[Tuple[float, int, bytes]], read_timeout: float):
+        self.replayer = replayer
+        self.chunks = chunks
+        self.read_timeout = read_timeout
+        self.is_open = True
+        self._next = 0
+
+    @property
+    def in_waiting(self) -> int:
+        return 0
+
+    def isOpen(self) -> bool:
+        return self.is_open
+
+    def close(self):
+        self.is_open = False
+
+    def read(self, size: int = 1) -> bytes:
+        if self._next >= len(self.chunks):
+            self.replayer._port_drained(self)
+            time.sleep(self.read_timeout)
+            return b""
+
+        at, seq, data = self.chunks[self._next]
+        delay = self.replayer.due(at) - time.perf_counter()
+        if delay > self.read_timeout:
+            time.sleep(self.read_timeout)
+            return b""
+        if delay > 0:
+            time.sleep(delay)
+
+        if not self.replayer._hand_out(seq, self.read_timeout):
+            return b""
+        self._next += 1
+        return data
+
+
+class SessionReplayer:
+    """
+    Plays a recorded session back, either straight into a SerialIngestHub through serial_factory, or through pseudo
+    terminal pairs with play_to_ptys so that anything that opens serial devices can read it. The recorded timing is
+    kept and scaled by speed: 1 plays in real time, 100 plays a hundred times faster and None plays as fast as
+    possible.
+    """
+
+    def __init__(self, path: Path, speed: Optional[float] = 1.0, read_timeout: float = 0.1):
+        self.speed = speed
+        self.read_timeout = read_timeout
+        self.finished = threading.Event()
+
+        self.chunks: Dict[str, List[Tuple[float, int, bytes]]] = {}
+        timeline = []
+        with EventLog(path) as event_log:
+            for record in event_log.records():
+                if record["t"] == SESSION:
+                    for device in record["devices"]:
+                        self.chunks.setdefault(device, [])
+                elif record["t"] == RAW:
+                    timeline.append((record["at"], record["device"], record["data"]))
+
+        # Every chunk gets its place in the whole recording, the ports hand the chunks out in that order so that the
+        # throws of the two boards stay in turn even when the replay does not wait for the recorded times.
+        timeline.sort(key=lambda chunk: chunk[0])
+        for seq, (at, device, data) in enumerate(timeline):
+            self.chunks.setdefault(device, []).append((at, seq, data))
+
+        self._started = None
+        self._handed_out = 0
+        self._drained = set()
+        self._controllers: List[int] = []
+        self._lock = threading.Lock()
+        self._turn = threading.Condition(self._lock)
+
+    @property
+    def devices(self) -> List[str]:
+        return list(self.chunks)
+
+    @property
+    def duration(self) -> float:
+        """
+        :return:
+            Returns the length of the recording in seconds.
+        """
+        return max((chunks[-1][0] for chunks in self.chunks.values() if chunks), default=0.0)
+
+    def due(self, at: float) -> float:
+        """
+        :param at: time of a chunk from the start of the recording.
+        :return:
+            Returns the perf_counter() time the chunk is due at, the replay starts with the first call.
+        """
+        with self._lock:
+            if self._started is None:
+                self._started = time.perf_counter()
+        if not self.speed:
+            return self._started
+        return self._started + at / self.speed
+
+    def serial_factory(self, device: str) -> _ReplayPort:
+        """
+        Opens the replay of a recorded device, pass it as serial_factory of a SerialIngestHub of the recorded devices.
+        :param device: recorded device.
+        :return:
+        """
+        return _ReplayPort(self, self.chunks.get(device, []), self.read_timeout)
+
+    def play_to_ptys(self, lead_in: float = 1.0) -> Dict[str, str]:
+        """
+        Creates a pseudo terminal for every recorded device and writes the recording to them in a background thread.
+        :param lead_in: time in seconds before the first chunk is written, opening a serial device drops what is
+            already waiting on it, so the readers need to open the terminals first.
+        :return:
+            Returns the path of the pseudo terminal of every recorded device.
+        """
+        paths, controllers = {}, {}
+        for device in self.chunks:
+            controller, follower = os.openpty()
+            tty.setraw(follower)
+            paths[device] = os.ttyname(follower)
+            controllers[device] = controller
+            self._controllers += [controller, follower]
+
+        timeline = sorted((seq, at, device, data) for device, chunks in self.chunks.items() for at, seq, data in chunks)
+
+        def play():
+            time.sleep(lead_in)
+            for _, at, device, data in timeline:
+                delay = self.due(at) - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                os.write(controllers[device], data)
+            self.finished.set()
+
+        threading.Thread(target=play, name="session-replay", daemon=True).start()
+        return paths
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every chunk has been handed out.
+        :param timeout: time in seconds to wait, None waits forever.
+        :return:
+            Returns whether the replay has finished.
+        """
+        return self.finished.wait(timeout)
+
+    def close(self):
+        for fd in self._controllers:
+            os.close(fd)
+        self._controllers = []
+
+    def _hand_out(self, seq: int, timeout: float) -> bool:
+        """
+        Waits until every chunk recorded before the chunk seq has been handed out.
+        :return:
+            Returns whether the chunk can be handed out, it is then counted as handed out.
+        """
+        with self._turn:
+            if not self._turn.wait_for(lambda: self._handed_out == seq, timeout):
+                return False
+            self._handed_out += 1
+            self._turn.notify_all()
+            return True
+
+    def _port_drained(self, port: _ReplayPort):
+        with self._lock:
+            self._drained.add(id(port))
+            if len(self._drained) >= len(self.chunks):
+                self.finished.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the serial devices of a table or replay a recording.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="record the devices until interrupted")
+    record_parser.add_argument("session")
+    record_parser.add_argument("devices", nargs="+")
+
+    replay_parser = subparsers.add_parser("replay", help="replay a recording and print the parsed events")
+    replay_parser.add_argument("session")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="0 replays as fast as possible")
+    replay_parser.add_argument("--pty", action="store_true", help="replay through pseudo terminals and wait")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        hub = SerialIngestHub(args.devices)
+        recorder = SessionRecorder(Path(args.session))
+        recorder.attach(hub)
+        hub.start()
+        try:
+            while True:
+                event = hub.get_event(timeout=1.0)
+                if event is not None:
+                    print(event)
+        except KeyboardInterrupt:
+            pass
+        hub.stop()
+        recorder.close()
+        print(f"Recorded {recorder.chunks} chunks, {recorder.bytes} bytes to {args.session}")
+        return
+
+    replayer = SessionReplayer(Path(args.session), speed=args.speed or None)
+    if args.pty:
+        for device, path in replayer.play_to_ptys().items():
+            print(f"{device} -> {path}")
+        replayer.wait()
+        # let the readers drain the pseudo terminals before they go away
+        time.sleep(1.0)
+        replayer.close()
+        return
+
+    hub = SerialIngestHub(replayer.devices, serial_factory=replayer.serial_factory)
+    hub.start()
+    started = time.perf_counter()
+    while not replayer.finished.is_set() or not hub.events.empty():
+        event = hub.get_event(timeout=0.2)
+        if event is not None:
+            print(event)
+    hub.stop()
+    print(f"Replayed {replayer.duration:.1f} s of recording in {time.perf_counter() - started:.1f} s: "
+          f"{hub.frames_decoded} frames decoded, {hub.frames_malformed} malformed, {hub.events_suppressed} suppressed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,51 @@
+import base64
+import io
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import msgpack
+from algosdk import encoding
 from algosdk import logic as algo_logic
 from algosdk.future import transaction as algo_txn
-from pyteal import compileTeal, Mode
+from pyteal import Mode
 
+from src.blockchain_utils.async_client import AsyncAlgodClient
+from src.blockchain_utils.async_network_interaction import AsyncNetworkInteraction
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.blockchain_utils.idempotent_submitter import IdempotentSubmitter, action_lease
 from src.blockchain_utils.network_interaction import NetworkInteraction
-from src.blockchain_utils.transaction_repository import ApplicationTransactionRepository, PaymentTransactionRepository
+from src.blockchain_utils.logic_sig_template import LogicSigTemplate
+from src.blockchain_utils.signing_service import SigningJob, SigningService, sign_job
+from src.blockchain_utils.teal_artifact_cache import TealArtifactCache
+from src.blockchain_utils.transaction_repository import ApplicationTransactionRepository, PaymentTransactionRepository, \
+    get_default_suggested_params
+from src.metrics_utils.metrics import METRICS
+from src.services.player_account_cache import PlayerAccountCache
+from src.storage_utils.event_log import CONFIRMED, DEPLOY, ESCROW, PLAY_ACTION, PLAY_ACTION_BATCH, REJECTED, \
+    TRANSACTION, EventLog, GameLogState
 from src.smart_contracts.game_funds_escrow import game_funds_escorw
-from src.smart_contracts.cornhole_asc1 import approval_program, clear_program, AppVariables
+from src.smart_contracts.cornhole_asc1 import approval_program, clear_program, AppVariables, MAX_BATCH
+
+logger = logging.getLogger(__name__)
+
+TEAL_VERSION = 4
+
+# microAlgos every player pays into the escrow when the game starts, the BetAmount of the application
+BET_AMOUNT = 1000000
+
+# The escrow only differs in the application id between games, so it is compiled once and shared by all of them.
+ESCROW_FUND_TEMPLATE = LogicSigTemplate(game_funds_escorw, mode=Mode.Signature, version=TEAL_VERSION)
+
+
+def _validity_rounds(raw: bytes) -> Tuple[int, int]:
+    """
+    :param raw: msgpack encoded signed transactions as logged, a single transaction or a group.
+    :return:
+        Returns the first and last valid round of the first transaction.
+    """
+    txn = next(msgpack.Unpacker(io.BytesIO(raw), raw=False, unicode_errors='surrogateescape',
+                                strict_map_key=False))["txn"]
+    return txn.get("fv", 0), txn["lv"]
 
 
 class GameEngineService:
@@ -19,55 +59,48 @@ class GameEngineService:
                  player_x_pk,
                  player_x_address,
                  player_o_pk,
-                 player_o_address):
+                 player_o_address,
+                 event_log: Optional[EventLog] = None):
+        """
+        :param event_log: when set, the deployment, the escrow and every sent transaction together with its
+        confirmation are appended to the log, so that restore can resume the game after a crash.
+        """
         self.app_creator_pk = app_creator_pk
         self.app_creator_address = app_creator_address
         self.player_x_pk = player_x_pk
         self.player_x_address = player_x_address
         self.player_o_pk = player_o_pk
         self.player_o_address = player_o_address
-        self.teal_version = 4
-
-        self.approval_program_code = approval_program()
-        self.clear_program_code = clear_program()
+        self.teal_version = TEAL_VERSION
+        self.teal_cache = TealArtifactCache()
+        self.event_log = event_log
 
         self.app_id = None
         self.escrow_fund_address = None
         self.escrow_fund_program_bytes = None
 
+        # number of play actions sent so far, used as note so that equal throws never produce equal transactions
+        self.action_count = 0
+
     def deploy_application(self, client):
         """
         Creates and sends the transaction to the network that does the initialization of the CornHole game.
         :param client:
         :return:
         """
-        approval_program_compiled = compileTeal(approval_program(),
-                                                mode=Mode.Application,
-                                                version=self.teal_version)
-
-        clear_program_compiled = compileTeal(clear_program(),
-                                             mode=Mode.Application,
-                                             version=self.teal_version)
-
-        approval_program_bytes = NetworkInteraction.compile_program(client=client,
-                                                                    source_code=approval_program_compiled)
+        approval_program_bytes = self.teal_cache.compile_program(client,
+                                                                 approval_program,
+                                                                 Mode.Application,
+                                                                 self.teal_version)
 
-        clear_program_bytes = NetworkInteraction.compile_program(client=client,
-                                                                 source_code=clear_program_compiled)
+        clear_program_bytes = self.teal_cache.compile_program(client,
+                                                              clear_program,
+                                                              Mode.Application,
+                                                              self.teal_version)
 
-        global_schema = algo_txn.StateSchema(num_uints=AppVariables.number_of_int(),
-                                             num_byte_slices=AppVariables.number_of_str())
-
-        local_schema = algo_txn.StateSchema(num_uints=0,
-                                            num_byte_slices=0)
-
-        app_transaction = ApplicationTransactionRepository.create_application(client=client,
-                                                                              creator_private_key=self.app_creator_pk,
-                                                                              approval_program=approval_program_bytes,
-                                                                              clear_program=clear_program_bytes,
-                                                                              global_schema=global_schema,
-                                                                              local_schema=local_schema,
-                                                                              app_args=None)
+        app_transaction = self._build_application_creation(approval_program_bytes,
+                                                           clear_program_bytes,
+                                                           get_default_suggested_params(client=client))
 
         tx_id = NetworkInteraction.submit_transaction(client,
                                                       transaction=app_transaction,
@@ -75,10 +108,7 @@ class GameEngineService:
 
         transaction_response = client.pending_transaction_info(tx_id)
 
-        self.app_id = transaction_response['application-index']
-        print(f"CornHole application deployed with the application_id: {self.app_id}")
-
-        return f"CornHole application deployed with the application_id: {self.app_id}"
+        return self._application_deployed(transaction_response['application-index'])
 
     def start_game(self, client):
         """
@@ -89,46 +119,493 @@ class GameEngineService:
         :param client:
         :return:
         """
+        return GameEngineService.start_games(client, [self])[0]
+
+    def start_game_shortfalls(self, client) -> Dict[str, int]:
+        """
+        Checks with the PlayerAccountCache that both players can pay the bet and the fee of their payment, e.g. to
+        show the players what they are missing before the game is started.
+        :param client:
+        :return:
+            Returns address -> missing microAlgos of every player that can not pay, empty if the game can be started.
+        """
+        fee = get_default_suggested_params(client=client).fee
+        return PlayerAccountCache.for_client(client).shortfalls(self._start_game_payments(fee))
+
+    @staticmethod
+    def start_games(client, engines: List['GameEngineService'], preflight: bool = True) -> List[str]:
+        """
+        Starts many games at once, the groups of all of the games are signed together by the SigningService.
+        :param client:
+        :param engines: engines of the games, every application must be deployed.
+        :param preflight: check with the PlayerAccountCache that every player can pay the bet and the fee of all of
+        their games, before anything is built or sent.
+        :return:
+        """
+        for engine in engines:
+            engine._check_game_can_start()
+
+        suggested_params = get_default_suggested_params(client=client)
+        account_cache = PlayerAccountCache.for_client(client) if preflight else None
+        if account_cache is not None:
+            requirements = {}
+            for engine in engines:
+                for address, amount in engine._start_game_payments(suggested_params.fee).items():
+                    requirements[address] = requirements.get(address, 0) + amount
+
+            shortfalls = account_cache.shortfalls(requirements)
+            if shortfalls:
+                raise ValueError("Not enough funds to start the game: " +
+                                 ", ".join(f"{address} needs {amount / 1000000:.6f} more Algos"
+                                           for address, amount in shortfalls.items()))
+
+        escrow_programs = [ESCROW_FUND_TEMPLATE.program_bytes(client, engine.app_id) for engine in engines]
+
+        groups_jobs = [engine._start_game_group_jobs(suggested_params, algo_logic.address(escrow_program))
+                       for engine, escrow_program in zip(engines, escrow_programs)]
+        raw_groups = SigningService.shared().sign_groups(groups_jobs)
+
+        descriptions = []
+        for engine, escrow_program, jobs, raw_group in zip(engines, escrow_programs, groups_jobs, raw_groups):
+            txid = IdempotentSubmitter.for_client(client).send(raw_group,
+                                                               jobs[0][0].get_txid(),
+                                                               [txn for txn, _ in jobs])
+
+            # only a game whose group has been sent has started, if a send fails the later games can be started again
+            engine._escrow_created(escrow_program)
+            engine._log_transaction(client, "start_game", txid, raw_group)
+
+            # not waited for, but tracked so that listeners such as the GameStateReader see the confirmation
+            confirmation = ConfirmationTracker.for_client(client).track(txid)
+            if account_cache is not None:
+                account_cache.reserve(txid, engine._start_game_payments(suggested_params.fee), confirmation)
+
+            print(f"Game started with the transaction_id: {txid}")
+            descriptions.append(f"Game started with the transaction_id: {txid}")
+
+        return descriptions
+
+    @METRICS.timed("play_action")
+    def play_action(self, client, player_id: str, action_position: int):
+        """
+        Application call transaction that performs an action for the specified player at the specified action position.
+        :param client:
+        :param player_id: "X" or "O"
+        :param action_position: action position in the range of [0, 8]
+        :return:
+        """
+        tx_id = self.send_play_action(client, player_id, action_position)
+
+        NetworkInteraction.wait_for_confirmation(client, tx_id, log=False)
+
+        print(f"{player_id} has point(s) {action_position} in transaction with id: {tx_id}")
+
+        return f"{player_id} has point(s) {action_position} in transaction with id: {tx_id}"
+
+    def send_play_action(self, client, player_id: str, action_position: int) -> str:
+        """
+        Sends the application call of play_action without waiting for its confirmation, so the throws of a game can
+        be pipelined. Track the returned transaction id with the ConfirmationTracker of the client.
+        :param client:
+        :param player_id: "X" or "O"
+        :param action_position: action position in the range of [0, 8]
+        :return:
+            Returns the id of the sent transaction
+        """
+        app_call_txn = self._build_play_action(player_id,
+                                               action_position,
+                                               get_default_suggested_params(client=client))
+
+        return self._send_transaction(client,
+                                      app_call_txn,
+                                      PLAY_ACTION,
+                                      player_id=player_id,
+                                      points=action_position,
+                                      action_count=self.action_count)
+
+    @METRICS.timed("play_action_batch")
+    def play_action_batch(self, client, player_id: str, action_positions: List[int]):
+        """
+        Application call transaction that applies a whole round of throws of the specified player at once.
+        :param client:
+        :param player_id: "X" or "O"
+        :param action_positions: points of every throw of the round, at most MAX_BATCH throws.
+        :return:
+        """
+        app_call_txn = self._build_play_action_batch(player_id,
+                                                     action_positions,
+                                                     get_default_suggested_params(client=client))
+
+        tx_id = self._send_transaction(client,
+                                       app_call_txn,
+                                       PLAY_ACTION_BATCH,
+                                       player_id=player_id,
+                                       points=sum(action_positions),
+                                       action_count=self.action_count)
+
+        NetworkInteraction.wait_for_confirmation(client, tx_id, log=False)
+
+        print(f"{player_id} has point(s) {sum(action_positions)} in {len(action_positions)} throw(s) "
+              f"in transaction with id: {tx_id}")
+
+        return f"{player_id} has point(s) {sum(action_positions)} in {len(action_positions)} throw(s) " \
+               f"in transaction with id: {tx_id}"
+
+    def fund_escrow(self, client):
+        """
+        Funding the escrow address in order to handle the transactions fees for refunding.
+        :param client:
+        :return:
+        """
+        fund_escrow_txn = self._build_fund_escrow(get_default_suggested_params(client=client))
+
+        tx_id = self._send_transaction(client, fund_escrow_txn, "fund_escrow")
+
+        NetworkInteraction.wait_for_confirmation(client, tx_id, log=False)
+
+        print(f'Escrow address has been funded in transaction with id: {tx_id}')
+        return f'Escrow address has been funded in transaction with id: {tx_id}'
+
+    def win_money_refund(self, client, player_id: str):
+        """
+        Atomic transfer of 2 transactions:
+        1. Application call
+        2. Payment from the Escrow account to winner address either PlayerX or PlayerO.
+        :param client:
+        :param player_id: "X" or "O".
+        :return:
+        """
+        return GameEngineService.win_money_refunds(client, [(self, player_id)])[0]
+
+    @staticmethod
+    def win_money_refunds(client, refunds: List[Tuple['GameEngineService', str]]) -> List[str]:
+        """
+        Refunds the winners of many games at once, the groups of all of the games are signed together by the
+        SigningService.
+        :param client:
+        :param refunds: (engine of the game, "X" or "O") of every game.
+        :return:
+        """
+        suggested_params = get_default_suggested_params(client=client)
+        groups_jobs = [engine._win_money_refund_jobs(player_id, suggested_params) for engine, player_id in refunds]
+        raw_groups = SigningService.shared().sign_groups(groups_jobs)
+
+        descriptions = []
+        for jobs, raw_group, (engine, player_id) in zip(groups_jobs, raw_groups, refunds):
+            txid = IdempotentSubmitter.for_client(client).send(raw_group,
+                                                               jobs[0][0].get_txid(),
+                                                               [txn for txn, _ in jobs])
+            engine._log_transaction(client, "win_money_refund", txid, raw_group)
+
+            ConfirmationTracker.for_client(client).track(txid)
+
+            print(f"The winning money have been refunded to the player {player_id} in the transaction with id: {txid}")
+            descriptions.append(f"The winning money have been refunded to the player {player_id} in the transaction "
+                                f"with id: {txid}")
+
+        return descriptions
+
+    async def deploy_application_async(self, client: AsyncAlgodClient):
+        """
+        Same as deploy_application, for the async algorand client.
+        :param client:
+        :return:
+        """
+        approval_program_bytes = await self.teal_cache.compile_program_async(client,
+                                                                             approval_program,
+                                                                             Mode.Application,
+                                                                             self.teal_version)
+
+        clear_program_bytes = await self.teal_cache.compile_program_async(client,
+                                                                          clear_program,
+                                                                          Mode.Application,
+                                                                          self.teal_version)
+
+        suggested_params = await AsyncNetworkInteraction.get_default_suggested_params(client)
+        app_transaction = self._build_application_creation(approval_program_bytes,
+                                                           clear_program_bytes,
+                                                           suggested_params)
+
+        tx_id = await AsyncNetworkInteraction.submit_transaction(client,
+                                                                 transaction=app_transaction,
+                                                                 log=False)
+
+        transaction_response = await client.pending_transaction_info(tx_id)
+
+        return self._application_deployed(transaction_response['application-index'])
+
+    async def start_game_async(self, client: AsyncAlgodClient):
+        """
+        Same as start_game, for the async algorand client.
+        :param client:
+        :return:
+        """
+        self._check_game_can_start()
+
+        escrow_program = await ESCROW_FUND_TEMPLATE.program_bytes_async(client, self.app_id)
+
+        suggested_params = await AsyncNetworkInteraction.get_default_suggested_params(client)
+        txid = await client.send_transactions(self._build_start_game_group(suggested_params,
+                                                                           algo_logic.address(escrow_program)))
+        self._escrow_created(escrow_program)
+
+        print(f"Game started with the transaction_id: {txid}")
+
+        return f"Game started with the transaction_id: {txid}"
+
+    async def play_action_async(self, client: AsyncAlgodClient, player_id: str, action_position: int):
+        """
+        Same as play_action, for the async algorand client.
+        :param client:
+        :param player_id: "X" or "O"
+        :param action_position: action position in the range of [0, 8]
+        :return:
+        """
+        suggested_params = await AsyncNetworkInteraction.get_default_suggested_params(client)
+        app_initialization_txn = self._build_play_action(player_id, action_position, suggested_params)
+
+        tx_id = await AsyncNetworkInteraction.submit_transaction(client,
+                                                                 transaction=app_initialization_txn,
+                                                                 log=False)
+
+        print(f"{player_id} has point(s) {action_position} in transaction with id: {tx_id}")
+
+        return f"{player_id} has point(s) {action_position} in transaction with id: {tx_id}"
+
+    async def play_action_batch_async(self, client: AsyncAlgodClient, player_id: str, action_positions: List[int]):
+        """
+        Same as play_action_batch, for the async algorand client.
+        :param client:
+        :param player_id: "X" or "O"
+        :param action_positions: points of every throw of the round, at most MAX_BATCH throws.
+        :return:
+        """
+        suggested_params = await AsyncNetworkInteraction.get_default_suggested_params(client)
+        app_call_txn = self._build_play_action_batch(player_id, action_positions, suggested_params)
+
+        tx_id = await AsyncNetworkInteraction.submit_transaction(client,
+                                                                 transaction=app_call_txn,
+                                                                 log=False)
+
+        print(f"{player_id} has point(s) {sum(action_positions)} in {len(action_positions)} throw(s) "
+              f"in transaction with id: {tx_id}")
+
+        return f"{player_id} has point(s) {sum(action_positions)} in {len(action_positions)} throw(s) " \
+               f"in transaction with id: {tx_id}"
+
+    async def fund_escrow_async(self, client: AsyncAlgodClient):
+        """
+        Same as fund_escrow, for the async algorand client.
+        :param client:
+        :return:
+        """
+        suggested_params = await AsyncNetworkInteraction.get_default_suggested_params(client)
+
+        tx_id = await AsyncNetworkInteraction.submit_transaction(client,
+                                                                 transaction=self._build_fund_escrow(suggested_params),
+                                                                 log=False)
+
+        print(f'Escrow address has been funded in transaction with id: {tx_id}')
+        return f'Escrow address has been funded in transaction with id: {tx_id}'
+
+    async def win_money_refund_async(self, client: AsyncAlgodClient, player_id: str):
+        """
+        Same as win_money_refund, for the async algorand client.
+        :param client:
+        :param player_id: "X" or "O".
+        :return:
+        """
+        suggested_params = await AsyncNetworkInteraction.get_default_suggested_params(client)
+        txid = await client.send_transactions(self._build_win_money_refund_group(player_id, suggested_params))
+
+        print(f"The winning money have been refunded to the player {player_id} in the transaction with id: {txid}")
+        return f"The winning money have been refunded to the player {player_id} in the transaction with id: {txid}"
+
+    def restore(self, client) -> GameLogState:
+        """
+        Rebuilds the state of the engine from its event log: the application, the escrow and the play action counter
+        of the last game. Transactions that were sent but whose outcome is not in the log are looked for in the blocks
+        of their validity window first, they may have been confirmed while the process was down. Those that are not
+        in the ledger and can still be confirmed are followed again. The outcome of every one of them is appended to
+        the log.
+        :param client:
+        :return:
+            Returns the state of the last game in the log
+        """
+        if self.event_log is None:
+            raise ValueError('The engine has no event log to restore from.')
+
+        state = GameLogState.from_log(self.event_log)
+        if state.app_id is None:
+            return state
+
+        self.app_id = state.app_id
+        self.action_count = state.action_count
+        if state.escrow_fund_program_bytes is not None:
+            self.escrow_fund_program_bytes = state.escrow_fund_program_bytes
+            self.escrow_fund_address = algo_logic.address(state.escrow_fund_program_bytes)
+
+        if state.pending:
+            try:
+                self._resolve_from_ledger(client, state)
+            except Exception:
+                # followed like any other pending transaction, they are still found if they are not confirmed yet
+                logger.exception("Looking for the pending transactions in the ledger failed")
+
+        for txid in state.pending:
+            self._follow_confirmation(client, txid)
+
+        return state
+
+    def _resolve_from_ledger(self, client, state: GameLogState):
+        """
+        Appends the outcome of the pending transactions of the state that the ledger already decided: confirmed if
+        they are in a block, rejected if they are not and their last valid round has passed.
+        """
+        validity = {txid: _validity_rounds(record["raw"]) for txid, record in state.pending.items()}
+        last_round = client.status().get('last-round')
+
+        first_valid = min(first for first, _ in validity.values())
+        last_valid = max(last for _, last in validity.values())
+        found = ConfirmationTracker.for_client(client).find_confirmed(validity,
+                                                                      first_valid,
+                                                                      min(last_valid, last_round))
+
+        for txid, (_, last) in validity.items():
+            if txid in found:
+                record = {"t": CONFIRMED, "txid": txid, "round": found[txid].get('confirmed-round', 0)}
+            elif last <= last_round:
+                record = {"t": REJECTED, "txid": txid, "error": f"not in the ledger by its last valid round {last}"}
+            else:
+                continue
+            self._log(record)
+            state.apply(record)
+
+    def _log(self, record: dict):
+        if self.event_log is not None:
+            self.event_log.append(record)
+
+    def _send_transaction(self, client, signed_txn, kind: str, **fields) -> str:
+        txid = IdempotentSubmitter.for_client(client).submit(signed_txn)
+
+        if self.event_log is not None:
+            self._log_transaction(client, kind, txid, base64.b64decode(encoding.msgpack_encode(signed_txn)), **fields)
+        return txid
+
+    def _log_transaction(self, client, kind: str, txid: str, raw: bytes, **fields):
+        if self.event_log is None:
+            return
+
+        self.event_log.append(dict(t=TRANSACTION, kind=kind, txid=txid, raw=raw, **fields))
+        self._follow_confirmation(client, txid)
+
+    def _follow_confirmation(self, client, txid: str):
+        def done(future):
+            try:
+                txinfo = future.result()
+            except TimeoutError:
+                # still unknown, a restore follows it again
+                return
+            except Exception as e:
+                self.event_log.append({"t": REJECTED, "txid": txid, "error": str(e)})
+                return
+            self.event_log.append({"t": CONFIRMED, "txid": txid, "round": txinfo.get('confirmed-round', 0)})
+
+        ConfirmationTracker.for_client(client).track(txid).add_done_callback(done)
+
+    def _application_deployed(self, app_id: int) -> str:
+        self.app_id = app_id
+        self._log({"t": DEPLOY, "app_id": app_id})
+        print(f"CornHole application deployed with the application_id: {self.app_id}")
+        print(f"TEAL artifact cache: {self.teal_cache.stats()}")
+
+        return f"CornHole application deployed with the application_id: {self.app_id}"
+
+    def _escrow_created(self, escrow_program: bytes):
+        self.escrow_fund_program_bytes = escrow_program
+        self.escrow_fund_address = algo_logic.address(escrow_program)
+        self._log({"t": ESCROW, "program": escrow_program})
+
+    def _check_game_can_start(self):
         if self.app_id is None:
             raise ValueError('The application has not been deployed')
 
         if self.escrow_fund_address is not None or self.escrow_fund_program_bytes is not None:
             raise ValueError('The game has already started!')
 
-        escrow_fund_program_compiled = compileTeal(game_funds_escorw(app_id=self.app_id),
-                                                   mode=Mode.Signature,
-                                                   version=self.teal_version)
+    def _start_game_payments(self, fee: int) -> Dict[str, int]:
+        """
+        :return:
+            Returns address -> microAlgos every player pays when the game starts, the fee of its payment included.
+        """
+        payments = {self.player_x_address: BET_AMOUNT + fee}
+        payments[self.player_o_address] = payments.get(self.player_o_address, 0) + BET_AMOUNT + fee
+        return payments
+
+    def _build_application_creation(self,
+                                    approval_program_bytes: bytes,
+                                    clear_program_bytes: bytes,
+                                    suggested_params: algo_txn.SuggestedParams) -> algo_txn.SignedTransaction:
+        global_schema = algo_txn.StateSchema(num_uints=AppVariables.number_of_int(),
+                                             num_byte_slices=AppVariables.number_of_str())
 
-        self.escrow_fund_program_bytes = NetworkInteraction.compile_program(client=client,
-                                                                            source_code=escrow_fund_program_compiled)
+        local_schema = algo_txn.StateSchema(num_uints=0,
+                                            num_byte_slices=0)
 
-        self.escrow_fund_address = algo_logic.address(self.escrow_fund_program_bytes)
+        return ApplicationTransactionRepository.create_application(client=None,
+                                                                   creator_private_key=self.app_creator_pk,
+                                                                   approval_program=approval_program_bytes,
+                                                                   clear_program=clear_program_bytes,
+                                                                   global_schema=global_schema,
+                                                                   local_schema=local_schema,
+                                                                   app_args=None,
+                                                                   suggested_params=suggested_params)
+
+    def _build_start_game_group(self,
+                                suggested_params: algo_txn.SuggestedParams,
+                                escrow_fund_address: Optional[str] = None) -> list:
+        return [sign_job(txn, signer)
+                for txn, signer in self._start_game_group_jobs(suggested_params, escrow_fund_address)]
+
+    def _start_game_group_jobs(self,
+                               suggested_params: algo_txn.SuggestedParams,
+                               escrow_fund_address: Optional[str] = None) -> List[SigningJob]:
+        """
+        :param escrow_fund_address: escrow the bets are paid to, the escrow of the engine if None. The escrow is only
+        set on the engine once the group has been sent.
+        """
+        if escrow_fund_address is None:
+            escrow_fund_address = self.escrow_fund_address
 
-        player_x_funding_txn = PaymentTransactionRepository.payment(client=client,
+        player_x_funding_txn = PaymentTransactionRepository.payment(client=None,
                                                                     sender_address=self.player_x_address,
-                                                                    receiver_address=self.escrow_fund_address,
-                                                                    amount=1000000,
+                                                                    receiver_address=escrow_fund_address,
+                                                                    amount=BET_AMOUNT,
                                                                     sender_private_key=None,
-                                                                    sign_transaction=False)
+                                                                    sign_transaction=False,
+                                                                    suggested_params=suggested_params)
 
-        player_o_funding_txn = PaymentTransactionRepository.payment(client=client,
+        player_o_funding_txn = PaymentTransactionRepository.payment(client=None,
                                                                     sender_address=self.player_o_address,
-                                                                    receiver_address=self.escrow_fund_address,
-                                                                    amount=1000000,
+                                                                    receiver_address=escrow_fund_address,
+                                                                    amount=BET_AMOUNT,
                                                                     sender_private_key=None,
-                                                                    sign_transaction=False)
+                                                                    sign_transaction=False,
+                                                                    suggested_params=suggested_params)
 
         app_args = [
             "SetupPlayers"
         ]
 
         app_initialization_txn = \
-            ApplicationTransactionRepository.call_application(client=client,
+            ApplicationTransactionRepository.call_application(client=None,
                                                               caller_private_key=self.app_creator_pk,
                                                               app_id=self.app_id,
                                                               on_complete=algo_txn.OnComplete.NoOpOC,
                                                               app_args=app_args,
-                                                              sign_transaction=False)
+                                                              lease=action_lease(self.app_id, "start_game"),
+                                                              sign_transaction=False,
+                                                              suggested_params=suggested_params)
 
         gid = algo_txn.calculate_group_id([app_initialization_txn,
                                            player_x_funding_txn,
@@ -138,28 +615,14 @@ class GameEngineService:
         player_x_funding_txn.group = gid
         player_o_funding_txn.group = gid
 
-        app_initialization_txn_signed = app_initialization_txn.sign(self.app_creator_pk)
-        player_x_funding_txn_signed = player_x_funding_txn.sign(self.player_x_pk)
-        player_o_funding_txn_signed = player_o_funding_txn.sign(self.player_o_pk)
-
-        signed_group = [app_initialization_txn_signed,
-                        player_x_funding_txn_signed,
-                        player_o_funding_txn_signed]
-
-        txid = client.send_transactions(signed_group)
-
-        print(f"Game started with the transaction_id: {txid}")
+        return [(app_initialization_txn, self.app_creator_pk),
+                (player_x_funding_txn, self.player_x_pk),
+                (player_o_funding_txn, self.player_o_pk)]
 
-        return f"Game started with the transaction_id: {txid}"
-
-    def play_action(self, client, player_id: str, action_position: int):
-        """
-        Application call transaction that performs an action for the specified player at the specified action position.
-        :param client:
-        :param player_id: "X" or "O"
-        :param action_position: action position in the range of [0, 8]
-        :return:
-        """
+    def _build_play_action(self,
+                           player_id: str,
+                           action_position: int,
+                           suggested_params: algo_txn.SuggestedParams) -> algo_txn.SignedTransaction:
         if player_id != "X" and player_id != "O":
             raise ValueError('Invalid player id! The player_id should be X or O.')
 
@@ -172,50 +635,62 @@ class GameEngineService:
 
         player_pk = self.player_x_pk if player_id == "X" else self.player_o_pk
 
-        app_initialization_txn = \
-            ApplicationTransactionRepository.call_application(client=client,
-                                                              caller_private_key=player_pk,
-                                                              app_id=self.app_id,
-                                                              on_complete=algo_txn.OnComplete.NoOpOC,
-                                                              app_args=app_args)
-
-        tx_id = NetworkInteraction.submit_transaction(client,
-                                                      transaction=app_initialization_txn,
-                                                      log=False)
+        self.action_count += 1
+
+        return ApplicationTransactionRepository.call_application(client=None,
+                                                                 caller_private_key=player_pk,
+                                                                 app_id=self.app_id,
+                                                                 on_complete=algo_txn.OnComplete.NoOpOC,
+                                                                 app_args=app_args,
+                                                                 note=self.action_count.to_bytes(8, 'big'),
+                                                                 lease=action_lease(self.app_id, PLAY_ACTION,
+                                                                                    self.action_count),
+                                                                 suggested_params=suggested_params)
+
+    def _build_play_action_batch(self,
+                                 player_id: str,
+                                 action_positions: List[int],
+                                 suggested_params: algo_txn.SuggestedParams) -> algo_txn.SignedTransaction:
+        if not 1 <= len(action_positions) <= MAX_BATCH:
+            raise ValueError(f'A batch should contain between 1 and {MAX_BATCH} throws.')
 
-        print(f"{player_id} has point(s) {action_position} in transaction with id: {tx_id}")
-
-        return f"{player_id} has point(s) {action_position} in transaction with id: {tx_id}"
+        if player_id != "X" and player_id != "O":
+            raise ValueError('Invalid player id! The player_id should be X or O.')
 
-    def fund_escrow(self, client):
-        """
-        Funding the escrow address in order to handle the transactions fees for refunding.
-        :param client:
-        :return:
-        """
-        fund_escrow_txn = PaymentTransactionRepository.payment(client=client,
-                                                               sender_address=self.app_creator_address,
-                                                               receiver_address=self.escrow_fund_address,
-                                                               amount=1000000,
-                                                               sender_private_key=self.app_creator_pk,
-                                                               sign_transaction=True)
+        if self.app_id is None:
+            raise ValueError('The application has not been deployed')
 
-        tx_id = NetworkInteraction.submit_transaction(client,
-                                                      transaction=fund_escrow_txn,
-                                                      log=False)
+        app_args = [
+            "ActionMoveBatch",
+            bytes(action_positions)]
 
-        print(f'Escrow address has been funded in transaction with id: {tx_id}')
-        return f'Escrow address has been funded in transaction with id: {tx_id}'
+        player_pk = self.player_x_pk if player_id == "X" else self.player_o_pk
 
-    def win_money_refund(self, client, player_id: str):
-        """
-        Atomic transfer of 2 transactions:
-        1. Application call
-        2. Payment from the Escrow account to winner address either PlayerX or PlayerO.
-        :param client:
-        :param player_id: "X" or "O".
-        :return:
-        """
+        self.action_count += 1
+
+        return ApplicationTransactionRepository.call_application(client=None,
+                                                                 caller_private_key=player_pk,
+                                                                 app_id=self.app_id,
+                                                                 on_complete=algo_txn.OnComplete.NoOpOC,
+                                                                 app_args=app_args,
+                                                                 note=self.action_count.to_bytes(8, 'big'),
+                                                                 lease=action_lease(self.app_id, PLAY_ACTION,
+                                                                                    self.action_count),
+                                                                 suggested_params=suggested_params)
+
+    def _build_fund_escrow(self, suggested_params: algo_txn.SuggestedParams) -> algo_txn.SignedTransaction:
+        return PaymentTransactionRepository.payment(client=None,
+                                                    sender_address=self.app_creator_address,
+                                                    receiver_address=self.escrow_fund_address,
+                                                    amount=1000000,
+                                                    sender_private_key=self.app_creator_pk,
+                                                    sign_transaction=True,
+                                                    suggested_params=suggested_params)
+
+    def _build_win_money_refund_group(self, player_id: str, suggested_params: algo_txn.SuggestedParams) -> list:
+        return [sign_job(txn, signer) for txn, signer in self._win_money_refund_jobs(player_id, suggested_params)]
+
+    def _win_money_refund_jobs(self, player_id: str, suggested_params: algo_txn.SuggestedParams) -> List[SigningJob]:
         if player_id != "X" and player_id != "O":
             raise ValueError('Invalid player id! The player_id should be X or O.')
 
@@ -230,19 +705,22 @@ class GameEngineService:
         ]
 
         app_withdraw_call_txn = \
-            ApplicationTransactionRepository.call_application(client=client,
+            ApplicationTransactionRepository.call_application(client=None,
                                                               caller_private_key=player_pk,
                                                               app_id=self.app_id,
                                                               on_complete=algo_txn.OnComplete.NoOpOC,
                                                               app_args=app_args,
-                                                              sign_transaction=False)
+                                                              lease=action_lease(self.app_id, "win_money_refund"),
+                                                              sign_transaction=False,
+                                                              suggested_params=suggested_params)
 
-        refund_txn = PaymentTransactionRepository.payment(client=client,
+        refund_txn = PaymentTransactionRepository.payment(client=None,
                                                           sender_address=self.escrow_fund_address,
                                                           receiver_address=player_address,
                                                           amount=2000000,
                                                           sender_private_key=None,
-                                                          sign_transaction=False)
+                                                          sign_transaction=False,
+                                                          suggested_params=suggested_params)
 
         gid = algo_txn.calculate_group_id([app_withdraw_call_txn,
                                            refund_txn])
@@ -250,15 +728,7 @@ class GameEngineService:
         app_withdraw_call_txn.group = gid
         refund_txn.group = gid
 
-        app_withdraw_call_txn_signed = app_withdraw_call_txn.sign(player_pk)
-
         refund_txn_logic_signature = algo_txn.LogicSig(self.escrow_fund_program_bytes)
-        refund_txn_signed = algo_txn.LogicSigTransaction(refund_txn, refund_txn_logic_signature)
-
-        signed_group = [app_withdraw_call_txn_signed,
-                        refund_txn_signed]
 
-        txid = client.send_transactions(signed_group)
-
-        print(f"The winning money have been refunded to the player {player_id} in the transaction with id: {txid}")
-        return f"The winning money have been refunded to the player {player_id} in the transaction with id: {txid}"
+        return [(app_withdraw_call_txn, player_pk),
+                (refund_txn, refund_txn_logic_signature)]
@@ -0,0 +1,233 @@
+import collections
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from algosdk.v2client import algod
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.serial_utils.frame_parser import BoardEvent, QrEvent, SerialEvent
+from src.services.game_engine_service import GameEngineService
+from src.services.throw_accumulator import ThrowAccumulator
+
+
+class _TableLane:
+    """
+    Ordered queue of the blockchain work of a single table.
+    """
+
+    def __init__(self):
+        self.jobs = collections.deque()
+        self.is_draining = False
+        self.lock = threading.Lock()
+
+
+class GameManager:
+    """
+    Owns the GameEngineService of every table and routes the serial events to the right game by NODE_TYPE/NODE_NAME.
+    The blockchain work of all tables runs on one shared executor. The work of a single table is still executed in
+    order, but a slow confirmation only holds up its own table.
+    """
+
+    def __init__(self, client: algod.AlgodClient, max_workers: int = 32):
+        self.client = client
+        self.engines: Dict[str, GameEngineService] = {}
+        self.registrations: Dict[str, Dict[str, str]] = {}
+
+        self._routes: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._lanes: Dict[str, _TableLane] = {}
+        self._accumulators: Dict[str, ThrowAccumulator] = {}
+        self._pipelined: Set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="game-manager")
+
+    def add_table(self,
+                  table_id: str,
+                  engine: GameEngineService,
+                  board_nodes: Dict[str, str],
+                  qr_nodes: Optional[Dict[str, str]] = None,
+                  batch_window: Optional[float] = None,
+                  pipelined: bool = False):
+        """
+        Adds a table to the manager.
+        :param table_id: unique name of the table.
+        :param engine: engine that plays the game of the table.
+        :param board_nodes: NODE_NAME of every board of the table mapped to the player id ("X" or "O") it scores for.
+        :param qr_nodes: NODE_NAME of every QR code station of the table mapped to the player id it registers.
+        :param batch_window: when set, the throws of a player are submitted per round with play_action_batch, waiting
+        at most batch_window seconds for further throws. Otherwise every throw is submitted with play_action.
+        :param pipelined: when set, the lane of the table only sends the throws, in order, and does not wait for their
+        confirmation before sending the next one. The futures of the throws still resolve once they are confirmed.
+        """
+        if table_id in self.engines:
+            raise ValueError(f'The table {table_id} already exists.')
+
+        if pipelined and batch_window is not None:
+            raise ValueError('A table either batches or pipelines its throws.')
+
+        routes = [(('BRD', node_name), player_id) for node_name, player_id in board_nodes.items()]
+        routes += [(('QR', node_name), player_id) for node_name, player_id in (qr_nodes or {}).items()]
+
+        for route, player_id in routes:
+            if player_id != "X" and player_id != "O":
+                raise ValueError('Invalid player id! The player_id should be X or O.')
+            if route in self._routes:
+                raise ValueError(f'The node {route[1]} is already used by the table {self._routes[route][0]}.')
+
+        for route, player_id in routes:
+            self._routes[route] = (table_id, player_id)
+
+        self.engines[table_id] = engine
+        self.registrations[table_id] = {}
+        self._lanes[table_id] = _TableLane()
+        if pipelined:
+            self._pipelined.add(table_id)
+
+        if batch_window is not None:
+            self._accumulators[table_id] = ThrowAccumulator(
+                lambda player_id, points: self.submit(table_id,
+                                                      engine.play_action_batch,
+                                                      self.client,
+                                                      player_id=player_id,
+                                                      action_positions=points),
+                window_seconds=batch_window)
+
+    def remove_table(self, table_id: str):
+        """
+        Removes the table, work that was already submitted for it still runs.
+        :param table_id: name of the table.
+        """
+        accumulator = self._accumulators.pop(table_id, None)
+        if accumulator is not None:
+            accumulator.flush()
+
+        self.engines.pop(table_id, None)
+        self.registrations.pop(table_id, None)
+        self._lanes.pop(table_id, None)
+        self._pipelined.discard(table_id)
+        self._routes = {route: target for route, target in self._routes.items() if target[0] != table_id}
+
+    def route(self, event: SerialEvent) -> Optional[Tuple[str, str]]:
+        """
+        :param event: event received from one of the nodes.
+        :return:
+            Returns (table_id, player_id) the event belongs to, or None for nodes that are not part of any table.
+        """
+        return self._routes.get((event.node_type, event.node_name))
+
+    def route_event(self, event: SerialEvent, player_id: Optional[str] = None) -> Optional[Future]:
+        """
+        Dispatches the event to the game of its table. Throws are submitted as play actions, registrations are
+        recorded in registrations.
+        :param event: event received from one of the nodes.
+        :param player_id: player a throw is played for, e.g. the player whose turn it is. Defaults to the player of
+        the board that reported it.
+        :return:
+            Returns the future of the play action for a throw, or of the batch it is part of on batching tables, None
+            otherwise.
+        """
+        target = self.route(event)
+        if target is None:
+            return None
+
+        table_id, node_player_id = target
+
+        if isinstance(event, QrEvent):
+            self.registrations[table_id].setdefault(node_player_id, event.address)
+            return None
+
+        if player_id is None:
+            player_id = node_player_id
+
+        if isinstance(event, BoardEvent):
+            accumulator = self._accumulators.get(table_id)
+            if accumulator is not None:
+                return accumulator.add(player_id, event.score)
+
+            engine = self.engines[table_id]
+            if table_id in self._pipelined:
+                return self._submit_pipelined(table_id, engine, player_id, event.score)
+
+            return self.submit(table_id,
+                               engine.play_action,
+                               self.client,
+                               player_id=player_id,
+                               action_position=event.score)
+
+        return None
+
+    def submit(self, table_id: str, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Schedules blockchain work of the table on the shared executor, after all work already submitted for the table.
+        :param table_id: name of the table.
+        :param fn: function to execute.
+        :return:
+            Returns the future of the result of fn.
+        """
+        lane = self._lanes[table_id]
+        future = Future()
+
+        with lane.lock:
+            lane.jobs.append((future, fn, args, kwargs))
+            if lane.is_draining:
+                return future
+            lane.is_draining = True
+
+        self._executor.submit(self._drain, lane)
+        return future
+
+    def _submit_pipelined(self, table_id: str, engine: GameEngineService, player_id: str, points: int) -> Future:
+        confirmed = Future()
+
+        def sent(future: Future):
+            try:
+                txid = future.result()
+            except Exception as e:
+                confirmed.set_exception(e)
+                return
+
+            description = f"{player_id} has point(s) {points} in transaction with id: {txid}"
+            ConfirmationTracker.for_client(self.client).track(txid).add_done_callback(
+                lambda tracked: self._confirmation_done(tracked, confirmed, description))
+
+        self.submit(table_id,
+                    engine.send_play_action,
+                    self.client,
+                    player_id=player_id,
+                    action_position=points).add_done_callback(sent)
+        return confirmed
+
+    @staticmethod
+    def _confirmation_done(tracked: Future, confirmed: Future, description: str):
+        try:
+            tracked.result()
+        except Exception as e:
+            confirmed.set_exception(e)
+            return
+        confirmed.set_result(description)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops accepting work and optionally waits for the submitted work to finish.
+        :param wait: whether to wait for the submitted work.
+        """
+        for accumulator in self._accumulators.values():
+            accumulator.flush()
+
+        self._executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _drain(lane: _TableLane):
+        while True:
+            with lane.lock:
+                if not lane.jobs:
+                    lane.is_draining = False
+                    return
+                future, fn, args, kwargs = lane.jobs.popleft()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
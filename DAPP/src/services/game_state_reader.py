@@ -0,0 +1,169 @@
+import base64
+import threading
+from typing import Optional
+
+from algosdk import encoding
+from algosdk.v2client import algod
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.metrics_utils.metrics import METRICS
+
+# global state key of every AppVariables entry -> (snapshot attribute, whether the value is an address)
+_GLOBAL_STATE_FIELDS = {
+    b"PlayerXState": ("player_x_state", False),
+    b"PlayerOState": ("player_o_state", False),
+    b"PlayerOAddress": ("player_o_address", True),
+    b"PlayerXAddress": ("player_x_address", True),
+    b"PlayerTurnAddress": ("player_turn_address", True),
+    b"FundsEscrowAddress": ("funds_escrow_address", True),
+    b"BetAmount": ("bet_amount", False),
+    b"ActionTimeout": ("action_timeout", False),
+    b"GameState": ("game_status", False),
+}
+
+# reads of the state until it is known to be of a single round
+_READ_ATTEMPTS = 3
+
+# value types of the global state and actions of the global state delta as returned by algod
+_BYTES_TYPE = 1
+_DELETE_ACTION = 3
+
+
+class GameStateSnapshot:
+    """
+    Decoded global state of the CornHole application at a given round.
+    """
+    __slots__ = ('round', 'player_x_state', 'player_o_state', 'player_o_address', 'player_x_address',
+                 'player_turn_address', 'funds_escrow_address', 'bet_amount', 'action_timeout', 'game_status')
+
+    def __init__(self, round_num: int):
+        self.round = round_num
+        self.player_x_state = 0
+        self.player_o_state = 0
+        self.player_o_address = None
+        self.player_x_address = None
+        self.player_turn_address = None
+        self.funds_escrow_address = None
+        self.bet_amount = 0
+        self.action_timeout = 0
+        self.game_status = 0
+
+    def copy(self) -> 'GameStateSnapshot':
+        snapshot = GameStateSnapshot(self.round)
+        for attribute in self.__slots__:
+            setattr(snapshot, attribute, getattr(self, attribute))
+        return snapshot
+
+    def apply(self, entries: list, round_num: int):
+        """
+        Applies global state entries, either the full state or a state delta, on top of the snapshot.
+        :param entries: list of {key, value} entries with base64 encoded keys.
+        :param round_num: round the entries belong to.
+        """
+        for entry in entries:
+            field = _GLOBAL_STATE_FIELDS.get(base64.b64decode(entry['key']))
+            if field is None:
+                continue
+
+            attribute, is_address = field
+            value = entry['value']
+
+            if value.get('action') == _DELETE_ACTION:
+                setattr(self, attribute, None if is_address else 0)
+            elif value.get('type', value.get('action')) == _BYTES_TYPE:
+                raw = base64.b64decode(value.get('bytes', ''))
+                setattr(self, attribute, encoding.encode_address(raw) if is_address and len(raw) == 32 else raw)
+            else:
+                setattr(self, attribute, value.get('uint', 0))
+
+        self.round = max(self.round, round_num)
+
+
+class GameStateReader:
+    """
+    In-memory view of the global state of a single CornHole application. The state is read from algod once and then
+    kept up to date with the global state deltas of the confirmed transactions that the ConfirmationTracker of the
+    client sees, so status checks are answered from memory without waiting on the indexer.
+    """
+
+    def __init__(self, client: algod.AlgodClient, app_id: int):
+        self.client = client
+        self.app_id = app_id
+
+        self.reads = 0
+        self.deltas_applied = 0
+
+        self._snapshot: Optional[GameStateSnapshot] = None
+        self._lock = threading.Lock()
+        self._tracker = ConfirmationTracker.for_client(client)
+        self._tracker.add_listener(self.apply_transaction)
+
+    def close(self):
+        """
+        Stops following the confirmed transactions.
+        """
+        self._tracker.remove_listener(self.apply_transaction)
+
+    def snapshot(self, refresh: bool = False) -> GameStateSnapshot:
+        """
+        :param refresh: read the state from algod even if a snapshot is cached.
+        :return:
+            Returns a copy of the current state of the application.
+        """
+        with self._lock:
+            if self._snapshot is None or refresh:
+                self._read()
+            return self._snapshot.copy()
+
+    def game_status(self) -> int:
+        """
+        :return:
+            Returns the GameState global variable, 0 while the game is running, 1 when X has won and 2 when O has won.
+        """
+        return self.snapshot().game_status
+
+    def invalidate(self):
+        """
+        Drops the cached snapshot, the next call reads the state from algod again.
+        """
+        with self._lock:
+            self._snapshot = None
+
+    def apply_transaction(self, txinfo: dict):
+        """
+        Applies the global state delta of a confirmed transaction of the application to the cached snapshot.
+        :param txinfo: pending transaction info of a confirmed transaction.
+        """
+        delta = txinfo.get('global-state-delta')
+        if not delta or txinfo.get('txn', {}).get('txn', {}).get('apid') != self.app_id:
+            return
+
+        round_num = txinfo.get('confirmed-round', 0)
+
+        with self._lock:
+            # Without a snapshot there is nothing to update, and older rounds are already part of the snapshot.
+            if self._snapshot is None or round_num < self._snapshot.round:
+                return
+
+            self._snapshot.apply(delta, round_num)
+            self.deltas_applied += 1
+
+    def _read(self):
+        # algod returns the state of its last round, which may pass while the state is read. The read is repeated until
+        # the round before and after it is the same, so the snapshot is labelled with the round of its data and deltas
+        # of older rounds are never applied on top of it. Should the rounds keep passing, the later round is used, a
+        # delta of a round in between is then missed until the state is read again.
+        round_num = self.client.status().get('last-round', 0)
+        for _ in range(_READ_ATTEMPTS):
+            with METRICS.span("application_info"):
+                application = self.client.application_info(self.app_id)
+
+            read_round, round_num = round_num, self.client.status().get('last-round', 0)
+            if read_round == round_num:
+                break
+
+        self.reads += 1
+
+        snapshot = GameStateSnapshot(round_num)
+        snapshot.apply(application['params'].get('global-state', []), round_num)
+        self._snapshot = snapshot
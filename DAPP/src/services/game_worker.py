@@ -0,0 +1,351 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.metrics_utils.metrics import METRICS
+from src.serial_utils.frame_parser import BoardEvent, QrEvent, SerialEvent
+from src.serial_utils.ingest_hub import SerialIngestHub
+from src.services.game_engine_service import GameEngineService
+from src.services.game_manager import GameManager
+from src.services.game_state_reader import GameStateReader
+from src.services.optimistic_scoreboard import OptimisticScoreboard
+from src.smart_contracts.cornhole_asc1 import WIN_PTS
+from src.storage_utils.event_log import PLAY_ACTION, PLAY_ACTION_BATCH, SERIAL
+
+logger = logging.getLogger(__name__)
+
+
+class GameWorker:
+    """
+    Runs the game loop of a table in a background thread: it reads the events of the serial devices, submits the
+    throws through the GameManager without waiting for their confirmation, follows the game status and refunds the
+    winner at the end of the game. The UI only reads snapshot(), so a page rerun never waits on a device or the
+    network.
+
+    The local score is optimistic: a throw counts as soon as the board reports it and is dropped again if its
+    transaction is rejected, so the score falls back to the confirmed PlayerXState/PlayerOState.
+    """
+
+    def __init__(self,
+                 client,
+                 engine: GameEngineService,
+                 ingest_hub: SerialIngestHub,
+                 table_id: str = "table_1",
+                 on_turn: Optional[Callable[[], None]] = None,
+                 pipelined: bool = True):
+        """
+        :param client: algorand client.
+        :param engine: engine that plays the game of the table.
+        :param ingest_hub: hub that reads the devices of the table, the worker starts it.
+        :param table_id: name of the table in the GameManager.
+        :param on_turn: called after every confirmed throw, e.g. to play a sound. It runs on its own thread.
+        :param pipelined: send every throw right away instead of after the confirmation of the previous one.
+        """
+        self.client = client
+        self.engine = engine
+        self.ingest_hub = ingest_hub
+        self.table_id = table_id
+        self.on_turn = on_turn
+
+        self.game_manager = GameManager(client)
+        self.game_manager.add_table(table_id,
+                                    engine,
+                                    board_nodes={"X": "X", "O": "O"},
+                                    qr_nodes={"X": "X", "O": "O"},
+                                    pipelined=pipelined)
+        self.game_state_reader: Optional[GameStateReader] = None
+        self.scoreboard = OptimisticScoreboard()
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._reset_state()
+
+    def _reset_state(self):
+        self.x_state = 0
+        self.o_state = 0
+        self.player_x_local_score = 0
+        self.player_o_local_score = 0
+        self.player_turn = "X"
+        self.game_status = 0
+        self.game_local_finished = False
+        self.is_refund_submitted = False
+        self.local_log = []
+        self.submitted_transactions = []
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self) -> dict:
+        """
+        :return:
+            Returns a copy of the state of the game that is safe to render from any thread.
+        """
+        with self._lock:
+            return {
+                "x_state": self.x_state,
+                "o_state": self.o_state,
+                "player_x_local_score": self.player_x_local_score,
+                "player_o_local_score": self.player_o_local_score,
+                "player_turn": self.player_turn,
+                "game_status": self.game_status,
+                "game_local_finished": self.game_local_finished,
+                "is_running": self.is_running,
+                "registrations": dict(self.game_manager.registrations.get(self.table_id, {})),
+                "local_log": list(self.local_log),
+                "submitted_transactions": list(self.submitted_transactions),
+            }
+
+    def log_transaction(self, description: str):
+        with self._lock:
+            self.submitted_transactions.append(description)
+
+    def log(self, message: str):
+        with self._lock:
+            self.local_log.append(message)
+
+    def application_deployed(self):
+        """
+        Starts following the state of the application the engine has deployed.
+        """
+        if self.game_state_reader is not None:
+            self.game_state_reader.close()
+        self.game_state_reader = GameStateReader(self.client, self.engine.app_id)
+        self.scoreboard.game_state_reader = self.game_state_reader
+
+    def restore(self) -> bool:
+        """
+        Resumes the game of the event log of the engine after a crash or a restart: the application, the logs shown
+        to the players and the throws that are still waiting for their confirmation.
+        :return:
+            Returns whether there was a game to resume.
+        """
+        if self.engine.event_log is None:
+            return False
+
+        state = self.engine.restore(self.client)
+        if state.app_id is None:
+            return False
+
+        self.application_deployed()
+
+        with self._lock:
+            self.local_log = []
+            for txid, player_id, points in state.throws:
+                self.local_log.append(f'Player {player_id} Scored: {points}')
+                if state.transactions[txid][1] == "rejected":
+                    self.local_log.append(f'Throw of Player {player_id} ({points}) was rejected')
+            self.submitted_transactions = [f"{kind} transaction {txid}: {status}"
+                                           for txid, (kind, status) in state.transactions.items()]
+            self.is_refund_submitted = any(kind == "win_money_refund" for kind, _ in state.transactions.values())
+
+        # the engine has already resolved the transactions the ledger knows, the others are still in flight
+        tracker = ConfirmationTracker.for_client(self.client)
+        for txid, record in state.pending.items():
+            # a batch holds the throws of a round in one transaction, its points are the sum of them
+            if record["kind"] in (PLAY_ACTION, PLAY_ACTION_BATCH):
+                token = self.scoreboard.add(record["player_id"], record["points"])
+                tracker.track(txid).add_done_callback(
+                    lambda done, txid=txid, record=record, token=token:
+                    self._pending_throw_done(done, txid, record, token))
+
+        self._sync_turn()
+        self._update_local_scores()
+        self._check_game_status()
+        return True
+
+    def _pending_throw_done(self, future: Future, txid: str, record: dict, token: int):
+        kind, player_id, points = record["kind"], record["player_id"], record["points"]
+        error = future.exception()
+
+        if error is None:
+            self.scoreboard.confirm(token)
+            self.log_transaction(f"{kind} transaction {txid}: confirmed")
+        elif isinstance(error, TimeoutError):
+            self._throw_unknown(player_id, points, token, error)
+            self.log_transaction(f"{kind} transaction {txid}: unknown, {error}")
+        else:
+            self.scoreboard.reject(token)
+            self._sync_turn()
+            self.log(f'Throw of Player {player_id} ({points}) was rejected: {error}')
+            self.log_transaction(f"Rejected transaction. {kind} transaction {txid}: {error}")
+        self._update_local_scores()
+        self._check_game_status()
+
+    def _throw_unknown(self, player_id: str, points: int, token: int, error: Exception):
+        """
+        The confirmation of the throw timed out, it is neither known to be confirmed nor rejected. The throw leaves
+        the score and the turn is taken from the application, both follow the state on the blockchain from now on.
+        """
+        self.scoreboard.forget(token)
+        self._sync_turn()
+        self.log(f'Outcome of the throw of Player {player_id} ({points}) is unknown, the score follows the blockchain: '
+                 f'{error}')
+
+    def start(self):
+        """
+        Starts the game loop, does nothing if it is already running.
+        """
+        if self.is_running:
+            return
+
+        if not self.ingest_hub.is_running:
+            self.ingest_hub.start()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"game-worker-{self.table_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stops the game loop.
+        :param timeout: maximum time to wait for the loop to exit.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set() and self.game_status == 0:
+            event = self.ingest_hub.get_event(timeout=1.0)
+            if event is None:
+                continue
+
+            try:
+                self._handle_event(event)
+            except Exception:
+                logger.exception("Handling %r failed", event)
+
+    def _handle_event(self, event: SerialEvent):
+        if self.engine.event_log is not None:
+            self._log_serial_event(event)
+
+        if isinstance(event, QrEvent):
+            self.game_manager.route_event(event)
+            self.log(f'Player {event.node_name}: {event.address} Registered')
+            return
+
+        if not isinstance(event, BoardEvent) or event.node_name not in ("X", "O"):
+            return
+
+        METRICS.observe("event_queue", time.perf_counter() - event.received_at)
+
+        # The application enforces the turns, so as in the session of the page every throw is played for the player
+        # whose turn it is and the turn passes as soon as the throw is sent, the next throw may be sent before this one
+        # is confirmed.
+        with self._lock:
+            player_id = self.player_turn
+            self.player_turn = "O" if player_id == "X" else "X"
+
+        # Every throw is sent, even after a local win: the win may still be rolled back, and throws after a confirmed
+        # win are rejected by the application and dropped from the score again.
+        token = self.scoreboard.add(player_id, event.score)
+        self.log(f'Player {player_id} Scored: {event.score}')
+        self._update_local_scores()
+
+        future = self.game_manager.route_event(event, player_id=player_id)
+        if future is not None:
+            future.add_done_callback(lambda done: self._throw_confirmed(done, event, player_id, token))
+
+    def _log_serial_event(self, event: SerialEvent):
+        record = {"t": SERIAL, "device": event.device, "node_type": event.node_type, "node_name": event.node_name}
+        if isinstance(event, BoardEvent):
+            record.update(tick=event.tick, score=event.score)
+        else:
+            record.update(timestamp=event.timestamp, address=event.address)
+        self.engine.event_log.append(record)
+
+    def _update_local_scores(self):
+        score_x, score_o = self.scoreboard.scores()
+
+        with self._lock:
+            self.player_x_local_score = score_x
+            self.player_o_local_score = score_o
+
+            # player won by pt threshold, then kick out gracefully
+            was_finished = self.game_local_finished
+            self.game_local_finished = score_x >= WIN_PTS or score_o >= WIN_PTS
+            if self.game_local_finished and not was_finished:
+                self.local_log.append('Game Finished')
+            elif was_finished and not self.game_local_finished:
+                self.local_log.append('Game Resumed, the winning throw was rejected')
+
+    def _throw_confirmed(self, future: Future, event: BoardEvent, player_id: str, token: int):
+        points = event.score
+        METRICS.observe("throw_to_confirmation", time.perf_counter() - event.received_at)
+
+        try:
+            description = future.result()
+        except TimeoutError as e:
+            self._throw_unknown(player_id, points, token, e)
+            self._update_local_scores()
+            self._check_game_status()
+            return
+        except Exception as e:
+            self.scoreboard.reject(token)
+            self._update_local_scores()
+            self._sync_turn()
+            self.log(f'Throw of Player {player_id} ({points}) was rejected: {e}')
+            self.log_transaction(f"Rejected transaction. Tried to put {player_id} scored {points}, the score is back "
+                                 f"to the confirmed state")
+            return
+
+        self.scoreboard.confirm(token)
+        self._update_local_scores()
+
+        with self._lock:
+            self.submitted_transactions.append(description)
+
+        self._check_game_status()
+
+        if self.on_turn is not None:
+            threading.Thread(target=self.on_turn, daemon=True).start()
+
+    def _sync_turn(self):
+        """
+        Takes the turn from the application, passed on once for every throw that is still in flight. Needed after a
+        rejection, whose turn did not pass on the blockchain, and after a restart.
+        """
+        if self.game_state_reader is None:
+            return
+
+        turn_address = self.game_state_reader.snapshot(refresh=True).player_turn_address
+        if turn_address is None:
+            return
+
+        player_turn = "X" if turn_address == self.engine.player_x_address else "O"
+        if self.scoreboard.in_flight_count % 2:
+            player_turn = "O" if player_turn == "X" else "X"
+
+        with self._lock:
+            self.player_turn = player_turn
+
+    def _check_game_status(self):
+        if self.game_state_reader is None:
+            return
+
+        snapshot = self.game_state_reader.snapshot()
+        game_status = snapshot.game_status
+
+        with self._lock:
+            self.x_state = snapshot.player_x_state
+            self.o_state = snapshot.player_o_state
+            self.game_status = game_status
+            if game_status == 0 or self.is_refund_submitted:
+                return
+            self.is_refund_submitted = True
+
+        # queued on the lane of the table, after every throw that is still being confirmed
+        self.game_manager.submit(self.table_id, self._withdraw_funds, "X" if game_status == 1 else "O")
+
+    def _withdraw_funds(self, winner: str):
+        try:
+            self.log_transaction(self.engine.fund_escrow(client=self.client))
+            self.log_transaction(self.engine.win_money_refund(self.client, player_id=winner))
+        except Exception:
+            logger.exception("Refunding player %s failed", winner)
+            self.log_transaction("Rejected transaction. Unsuccessful withdrawal.")
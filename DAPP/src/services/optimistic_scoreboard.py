@@ -0,0 +1,91 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from src.services.game_state_reader import GameStateReader
+
+
+class OptimisticScoreboard:
+    """
+    Score of a game as shown to the players: the last confirmed PlayerXState/PlayerOState of the GameStateReader plus
+    the throws that have been sent but are not confirmed yet. A throw leaves the board once it is confirmed, from then
+    on it is part of the state of the reader, or once it is rejected, which rolls the score of its player back to the
+    confirmed state. A throw whose outcome is unknown, e.g. whose confirmation timed out, leaves the board too: if it
+    was confirmed after all, its points are part of the state of the reader once the state is read again.
+    """
+
+    def __init__(self, game_state_reader: Optional[GameStateReader] = None):
+        """
+        :param game_state_reader: reader of the application of the game, can be set once the application is deployed.
+        """
+        self.game_state_reader = game_state_reader
+
+        self.confirmed = 0
+        self.rejected = 0
+        self.unknown = 0
+
+        self._in_flight: Dict[int, Tuple[str, int]] = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight_count(self) -> int:
+        return len(self._in_flight)
+
+    def add(self, player_id: str, points: int) -> int:
+        """
+        Adds a throw that is about to be sent.
+        :param player_id: "X" or "O".
+        :param points: points of the throw.
+        :return:
+            Returns the token that identifies the throw in confirm and reject.
+        """
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._in_flight[token] = (player_id, points)
+        return token
+
+    def confirm(self, token: int):
+        """
+        The throw has been confirmed, its points are now part of the state of the reader.
+        :param token: token returned by add.
+        """
+        with self._lock:
+            if self._in_flight.pop(token, None) is not None:
+                self.confirmed += 1
+
+    def reject(self, token: int):
+        """
+        The throw has been rejected, its points are dropped.
+        :param token: token returned by add.
+        """
+        with self._lock:
+            if self._in_flight.pop(token, None) is not None:
+                self.rejected += 1
+
+    def forget(self, token: int):
+        """
+        The outcome of the throw is unknown, its points are left to the state of the reader.
+        :param token: token returned by add.
+        """
+        with self._lock:
+            if self._in_flight.pop(token, None) is not None:
+                self.unknown += 1
+
+    def scores(self) -> Tuple[int, int]:
+        """
+        :return:
+            Returns the (X, O) score: the confirmed state plus the points of the throws in flight.
+        """
+        with self._lock:
+            in_flight = list(self._in_flight.values())
+
+        score_x = sum(points for player_id, points in in_flight if player_id == "X")
+        score_o = sum(points for player_id, points in in_flight if player_id == "O")
+
+        if self.game_state_reader is not None:
+            snapshot = self.game_state_reader.snapshot()
+            score_x += snapshot.player_x_state
+            score_o += snapshot.player_o_state
+
+        return score_x, score_o
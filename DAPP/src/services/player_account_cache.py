@@ -0,0 +1,210 @@
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from algosdk.v2client import algod
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.metrics_utils.metrics import METRICS
+
+# minimum balance requirements of the protocol in microAlgos, for nodes whose account_info has no min-balance yet
+MIN_BALANCE = 100000
+ASSET_MIN_BALANCE = 100000
+APP_MIN_BALANCE = 100000
+APP_UINT_MIN_BALANCE = 28500
+APP_BYTE_SLICE_MIN_BALANCE = 50000
+APP_EXTRA_PAGE_MIN_BALANCE = 100000
+
+
+def account_min_balance(info: dict) -> int:
+    """
+    :param info: account_info of the account.
+    :return:
+        Returns the minimum balance of the account, as reported by algod or else computed from the assets it holds,
+        the applications it created or opted in to and their state schemas.
+    """
+    if 'min-balance' in info:
+        return info['min-balance']
+
+    schema = info.get('apps-total-schema') or {}
+    return (MIN_BALANCE
+            + ASSET_MIN_BALANCE * len(info.get('assets') or [])
+            + APP_MIN_BALANCE * (len(info.get('created-apps') or []) + len(info.get('apps-local-state') or []))
+            + APP_UINT_MIN_BALANCE * schema.get('num-uint', 0)
+            + APP_BYTE_SLICE_MIN_BALANCE * schema.get('num-byte-slice', 0)
+            + APP_EXTRA_PAGE_MIN_BALANCE * info.get('apps-total-extra-pages', 0))
+
+
+class _Account:
+    __slots__ = ('amount', 'min_balance', 'round', 'fetched_at')
+
+    def __init__(self, amount: int, min_balance: int, round_num: int, fetched_at: float):
+        self.amount = amount
+        self.min_balance = min_balance
+        self.round = round_num
+        self.fetched_at = fetched_at
+
+
+class PlayerAccountCache:
+    """
+    Balances of the player accounts, so that a game whose players can not pay their bet is refused before its group is
+    built, signed and sent. Missing and stale accounts are fetched with account_info in a single concurrent batch.
+
+    The cached balances follow the transactions the ConfirmationTracker sees confirmed. Groups that are sent but not
+    confirmed yet hold a reservation on the accounts they pay from, so that a tournament that starts many games of the
+    same players never counts the same funds twice. Transactions the tracker does not see, e.g. a top-up from a faucet,
+    are picked up once the account is older than max_age.
+    """
+
+    _caches = weakref.WeakKeyDictionary()
+    _caches_lock = threading.Lock()
+
+    def __init__(self, client: algod.AlgodClient, max_age: float = 30.0, workers: int = 8):
+        """
+        :param client: algorand client.
+        :param max_age: time in seconds after which a cached account is fetched again.
+        :param workers: account_info requests of a batch that run at the same time.
+        """
+        self.client = client
+        self.max_age = max_age
+        self.workers = workers
+
+        self.fetches = 0
+        self.refused = 0
+
+        self._accounts: Dict[str, _Account] = {}
+        # txid of a sent group -> microAlgos it takes from every account, until it is confirmed or rejected
+        self._reservations: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="account-info")
+
+        self._tracker = ConfirmationTracker.for_client(client)
+        self._tracker.add_listener(self.apply_transaction)
+
+    @classmethod
+    def for_client(cls, client: algod.AlgodClient) -> 'PlayerAccountCache':
+        """
+        Returns the cache shared by everyone that uses the given client.
+        :param client: algorand client.
+        :return:
+        """
+        with cls._caches_lock:
+            cache = cls._caches.get(client)
+            if cache is None:
+                cache = cls._caches[client] = cls(client)
+            return cache
+
+    def close(self):
+        """
+        Stops following the confirmed transactions.
+        """
+        self._tracker.remove_listener(self.apply_transaction)
+        self._executor.shutdown(wait=False)
+
+    def refresh(self, addresses: Iterable[str], force: bool = False):
+        """
+        Fetches the accounts that are missing or older than max_age, all of them at the same time.
+        :param addresses: addresses of the accounts.
+        :param force: fetch every account, even the fresh ones.
+        """
+        now = time.monotonic()
+        with self._lock:
+            stale = [address for address in set(addresses)
+                     if force or address not in self._accounts
+                     or now - self._accounts[address].fetched_at > self.max_age]
+
+        if not stale:
+            return
+
+        with METRICS.span("account_info_batch"):
+            infos = list(self._executor.map(self.client.account_info, stale))
+
+        with self._lock:
+            for address, info in zip(stale, infos):
+                self._accounts[address] = _Account(info['amount'],
+                                                   account_min_balance(info),
+                                                   info.get('round', 0),
+                                                   time.monotonic())
+        self.fetches += len(stale)
+
+    def spendable(self, address: str) -> Optional[int]:
+        """
+        :param address: address of the account.
+        :return:
+            Returns the microAlgos the account can pay without going below its minimum balance, net of the groups
+            that are still waiting for their confirmation. None if the account is not cached.
+        """
+        with self._lock:
+            return self._spendable(address)
+
+    def shortfalls(self, requirements: Dict[str, int]) -> Dict[str, int]:
+        """
+        Checks that every account can pay what it is required to, the accounts are refreshed first.
+        :param requirements: address -> microAlgos the account has to pay, fees included.
+        :return:
+            Returns address -> missing microAlgos of every account that can not pay.
+        """
+        self.refresh(requirements)
+
+        with self._lock:
+            shortfalls = {}
+            for address, required in requirements.items():
+                spendable = self._spendable(address)
+                if spendable < required:
+                    shortfalls[address] = required - spendable
+
+        if shortfalls:
+            self.refused += 1
+        return shortfalls
+
+    def reserve(self, txid: str, amounts: Dict[str, int], confirmation: Future):
+        """
+        Holds the funds a sent group takes from the accounts until the group is confirmed or rejected.
+        :param txid: id of the group, as tracked by the ConfirmationTracker.
+        :param amounts: address -> microAlgos the group takes from the account, fees included.
+        :param confirmation: future of the confirmation of the group.
+        """
+        with self._lock:
+            self._reservations[txid] = dict(amounts)
+        confirmation.add_done_callback(lambda done: self._release(txid, done))
+
+    def apply_transaction(self, txinfo: dict):
+        """
+        Applies a confirmed transaction to the balances of the cached accounts it touches.
+        :param txinfo: pending transaction info of a confirmed transaction.
+        """
+        txn = txinfo.get('txn', {}).get('txn', {})
+        round_num = txinfo.get('confirmed-round', 0)
+
+        with self._lock:
+            self._apply(txn.get('snd'), -(txn.get('amt', 0) + txn.get('fee', 0)), round_num)
+            if txn.get('type') == 'pay':
+                self._apply(txn.get('rcv'), txn.get('amt', 0), round_num)
+
+    def _release(self, txid: str, confirmation: Future):
+        with self._lock:
+            amounts = self._reservations.pop(txid, None)
+            if amounts is None or confirmation.cancelled() or confirmation.exception() is not None:
+                return
+
+            # the group is part of the ledger now, the payments of a group are not reported to the listeners
+            round_num = confirmation.result().get('confirmed-round', 0)
+            for address, amount in amounts.items():
+                self._apply(address, -amount, round_num)
+
+    def _apply(self, address: Optional[str], amount: int, round_num: int):
+        account = self._accounts.get(address)
+        # fetched after the round, the balance already includes the transaction
+        if account is not None and round_num > account.round:
+            account.amount += amount
+
+    def _spendable(self, address: str) -> Optional[int]:
+        account = self._accounts.get(address)
+        if account is None:
+            return None
+
+        reserved = sum(amounts.get(address, 0) for amounts in self._reservations.values())
+        return account.amount - account.min_balance - reserved
+
@@ -0,0 +1,121 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+from src.smart_contracts.cornhole_asc1 import MAX_BATCH
+
+
+class _Batch:
+    """
+    Throws of a single player that will be submitted with one ActionMoveBatch call.
+    """
+
+    def __init__(self, player_id: str):
+        self.player_id = player_id
+        self.points: List[int] = []
+        self.future = Future()
+        self.timer = None
+
+
+class ThrowAccumulator:
+    """
+    Collects the throws of a table into rounds, so that every round of a player is submitted with a single application
+    call instead of one call per throw. The open batch is flushed when the other player starts throwing, when it holds
+    max_batch throws, or when window_seconds have passed since its first throw.
+    """
+
+    def __init__(self,
+                 flush: Callable[[str, List[int]], Future],
+                 window_seconds: float = 5.0,
+                 max_batch: int = MAX_BATCH):
+        """
+        :param flush: function that submits the throws of a player and returns the future of the submission.
+        :param window_seconds: maximum time a throw waits in the open batch.
+        :param max_batch: maximum number of throws per batch.
+        """
+        if not 1 <= max_batch <= MAX_BATCH:
+            raise ValueError(f'The batch size should be between 1 and {MAX_BATCH}.')
+
+        self.flush_fn = flush
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+
+        self.throws_added = 0
+        self.batches_flushed = 0
+
+        self._batch: Optional[_Batch] = None
+        self._lock = threading.Lock()
+
+    def add(self, player_id: str, points: int) -> Future:
+        """
+        Adds a throw to the open batch.
+        :param player_id: "X" or "O".
+        :param points: points of the throw.
+        :return:
+            Returns the future of the submission of the batch the throw ends up in.
+        """
+        with self._lock:
+            if self._batch is not None and self._batch.player_id != player_id:
+                self._flush_locked()
+
+            if self._batch is None:
+                self._batch = _Batch(player_id)
+                if self.window_seconds is not None:
+                    self._batch.timer = threading.Timer(self.window_seconds, self._flush_expired, args=(self._batch,))
+                    self._batch.timer.daemon = True
+                    self._batch.timer.start()
+
+            batch = self._batch
+            batch.points.append(points)
+            self.throws_added += 1
+
+            if len(batch.points) >= self.max_batch:
+                self._flush_locked()
+
+            return batch.future
+
+    def flush(self) -> Optional[Future]:
+        """
+        Submits the open batch right away.
+        :return:
+            Returns the future of the submission, None if there was no open batch.
+        """
+        with self._lock:
+            batch = self._batch
+            self._flush_locked()
+            return batch.future if batch is not None else None
+
+    def _flush_expired(self, batch: _Batch):
+        with self._lock:
+            # The batch may have been flushed in the meantime, a new batch has a timer of its own.
+            if self._batch is batch:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        batch = self._batch
+        if batch is None:
+            return
+
+        self._batch = None
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        self.batches_flushed += 1
+
+        # Submitted under the lock, so the batches of the table reach the chain in the order of their throws.
+        try:
+            submission = self.flush_fn(batch.player_id, batch.points)
+        except Exception as e:
+            batch.future.set_exception(e)
+            return
+
+        submission.add_done_callback(lambda done: _copy_outcome(done, batch.future))
+
+
+def _copy_outcome(source: Future, target: Future):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
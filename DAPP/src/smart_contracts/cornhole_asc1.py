@@ -27,6 +27,9 @@ class AppVariables:
 
 WIN_PTS = 3
 
+# maximum number of throws that can be applied with a single ActionMoveBatch call
+MAX_BATCH = 8
+
 class DefaultValues:
     """
     The default values for the global variables initialized on the transaction that creates the application.
@@ -44,6 +47,7 @@ class AppActions:
     """
     SetupPlayers = Bytes("SetupPlayers")
     ActionMove = Bytes("ActionMove")
+    ActionMoveBatch = Bytes("ActionMoveBatch")
     MoneyRefund = Bytes("MoneyRefund")
 
 
@@ -59,6 +63,8 @@ def application_start():
         [Txn.application_args[0] == AppActions.SetupPlayers, initialize_players_logic()],
         [And(Txn.application_args[0] == AppActions.ActionMove,
              Global.group_size() == Int(1)), play_action_logic()],
+        [And(Txn.application_args[0] == AppActions.ActionMoveBatch,
+             Global.group_size() == Int(1)), play_action_batch_logic()],
         [Txn.application_args[0] == AppActions.MoneyRefund, money_refund_logic()]
     )
 
@@ -133,15 +139,55 @@ def play_action_logic():
     is passed as an argument to the application call.
     :return:
     """
-
-    player = Txn.application_args[0]
     point = Btoi(Txn.application_args[1])
 
+    return Seq([
+        Assert(point >= Int(0)),
+        Assert(point <= Int(WIN_PTS)),
+        player_move_logic(point),
+        Return(Int(1))
+    ])
+
+
+def play_action_batch_logic():
+    """
+    Executes a whole round of throws of the current player with a single application call. The throws are passed as a
+    packed byte array in the second argument, one byte with the points of every throw. The loop over the throws is
+    unrolled, so the cost of the call does not depend on the number of throws.
+    :return:
+    """
+    throws = Txn.application_args[1]
+    total = ScratchVar(TealType.uint64)
+
+    add_throws = [total.store(Int(0))]
+    for idx in range(MAX_BATCH):
+        point = GetByte(throws, Int(idx))
+        add_throws.append(If(Len(throws) > Int(idx), Seq([
+            Assert(point <= Int(WIN_PTS)),
+            total.store(total.load() + point)
+        ])))
+
+    return Seq([
+        Assert(Len(throws) >= Int(1)),
+        Assert(Len(throws) <= Int(MAX_BATCH)),
+        Seq(add_throws),
+        player_move_logic(total.load()),
+        Return(Int(1))
+    ])
+
+
+def player_move_logic(points):
+    """
+    Adds the points to the state of the player whose turn it is, checks whether the player has won and passes the turn
+    to the other player.
+    :param points: points scored by the player.
+    :return:
+    """
     state_x = App.globalGet(AppVariables.PlayerXState)
     state_o = App.globalGet(AppVariables.PlayerOState)
 
     player_x_move = Seq([
-        App.globalPut(AppVariables.PlayerXState, Add(state_x, point)),
+        App.globalPut(AppVariables.PlayerXState, Add(state_x, points)),
 
         If(has_player_won(App.globalGet(AppVariables.PlayerXState)),
            App.globalPut(AppVariables.GameStatus, Int(1))),
@@ -150,7 +196,7 @@ def play_action_logic():
     ])
 
     player_o_move = Seq([
-        App.globalPut(AppVariables.PlayerOState, Add(state_o, point)),
+        App.globalPut(AppVariables.PlayerOState, Add(state_o, points)),
 
         If(has_player_won(App.globalGet(AppVariables.PlayerOState)),
            App.globalPut(AppVariables.GameStatus, Int(2))),
@@ -159,8 +205,6 @@ def play_action_logic():
     ])
 
     return Seq([
-        Assert(point >= Int(0)),
-        Assert(point <= Int(WIN_PTS)),
         Assert(Global.latest_timestamp() <= App.globalGet(AppVariables.ActionTimeout)),
         Assert(App.globalGet(AppVariables.GameStatus) == DefaultValues.GameStatus),
         Assert(Txn.sender() == App.globalGet(AppVariables.PlayerTurnAddress)),
@@ -169,8 +213,7 @@ def play_action_logic():
         Cond(
             [Txn.sender() == App.globalGet(AppVariables.PlayerXAddress), player_x_move],
             [Txn.sender() == App.globalGet(AppVariables.PlayerOAddress), player_o_move],
-        ),
-        Return(Int(1))
+        )
     ])
 
 
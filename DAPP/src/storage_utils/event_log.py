@@ -0,0 +1,266 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import msgpack
+
+# file header: magic and format version
+LOG_MAGIC = b"CHWAL\x00\x00\x01"
+
+# every record: payload length and crc32 of the payload, followed by the msgpack encoded payload
+_RECORD_HEADER = struct.Struct("<II")
+
+# record types
+DEPLOY = "deploy"
+ESCROW = "escrow"
+SERIAL = "serial"
+TRANSACTION = "txn"
+CONFIRMED = "confirmed"
+REJECTED = "rejected"
+
+# transaction kinds whose confirmation adds points to a player
+PLAY_ACTION = "play_action"
+PLAY_ACTION_BATCH = "play_action_batch"
+
+
+class EventLog:
+    """
+    Append-only binary log of a game table: serial events, sent transactions with their encoded bytes, and the
+    confirmation or rejection of every transaction. The file is memory-mapped and grows in steps of grow_bytes, every
+    record is length-prefixed and checksummed, so a record torn by a crash is detected and dropped when the log is
+    opened again.
+
+    Appends only copy the record into the map. The map is flushed to disk in batches: by a background thread every
+    sync_interval seconds, and right away once sync_every records are waiting.
+    """
+
+    def __init__(self,
+                 path: Path,
+                 sync_interval: float = 0.05,
+                 sync_every: int = 256,
+                 grow_bytes: int = 1 << 20):
+        """
+        :param path: location of the log, it is created if it does not exist.
+        :param sync_interval: maximum time in seconds a record waits to be flushed.
+        :param sync_every: number of waiting records that triggers a flush right away.
+        :param grow_bytes: size the file grows by when it is full.
+        """
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self.sync_every = sync_every
+        self.grow_bytes = grow_bytes
+
+        self.records_dropped = 0
+        self.records_discarded = 0
+        self.syncs = 0
+
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._stop = threading.Event()
+        self._flusher = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, "w+b" if is_new else "r+b")
+
+        if is_new:
+            self._file.truncate(grow_bytes)
+            self._file.seek(0)
+            self._file.write(LOG_MAGIC)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        if self._mmap[:len(LOG_MAGIC)] != LOG_MAGIC:
+            self._mmap.close()
+            self._file.close()
+            raise ValueError(f"{self.path} is not an event log.")
+
+        self._offset = self._recover()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    @property
+    def size(self) -> int:
+        """
+        :return:
+            Returns the number of bytes used by the records.
+        """
+        return self._offset
+
+    def append(self, record: dict):
+        """
+        Appends a record to the log. Records appended once the log is closed, e.g. by late confirmation callbacks, are
+        counted in records_discarded and otherwise ignored, a restore follows their transactions again.
+        :param record: msgpack serializable record, the "t" key holds its type.
+        """
+        payload = msgpack.packb(record, use_bin_type=True)
+        length = _RECORD_HEADER.size + len(payload)
+
+        with self._lock:
+            if self._mmap.closed:
+                self.records_discarded += 1
+                return
+
+            if self._offset + length > len(self._mmap):
+                self._grow(self._offset + length)
+
+            _RECORD_HEADER.pack_into(self._mmap, self._offset, len(payload), zlib.crc32(payload))
+            self._mmap[self._offset + _RECORD_HEADER.size:self._offset + length] = payload
+            self._offset += length
+
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync()
+            elif self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_periodically, name="event-log", daemon=True)
+                self._flusher.start()
+
+    def records(self) -> Iterator[dict]:
+        """
+        :return:
+            Returns an iterator over the records of the log, oldest first. Records appended while iterating are
+            included, the iteration ends early if the log is closed.
+        """
+        offset = len(LOG_MAGIC)
+        while True:
+            # appends may remap the file at any time, every record is copied out of the map under the lock
+            with self._lock:
+                if self._mmap.closed or offset >= self._offset:
+                    return
+                length, _ = _RECORD_HEADER.unpack_from(self._mmap, offset)
+                start = offset + _RECORD_HEADER.size
+                payload = self._mmap[start:start + length]
+
+            yield msgpack.unpackb(payload, raw=False)
+            offset = start + length
+
+    def sync(self):
+        """
+        Flushes every appended record to disk.
+        """
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """
+        Flushes the log and closes the file.
+        """
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+
+        with self._lock:
+            if self._mmap.closed:
+                return
+            self._sync()
+            self._mmap.close()
+            self._file.close()
+
+    def _sync(self):
+        if self._unsynced:
+            self._mmap.flush()
+            self._unsynced = 0
+            self.syncs += 1
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.sync_interval):
+            with self._lock:
+                if self._mmap.closed:
+                    return
+                self._sync()
+
+    def _grow(self, required: int):
+        self._mmap.flush()
+        size = len(self._mmap)
+        while size < required:
+            size += self.grow_bytes
+
+        self._mmap.close()
+        self._file.truncate(size)
+        os.fsync(self._file.fileno())
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+
+    def _recover(self) -> int:
+        """
+        Finds the end of the last complete record. A torn record and everything after it is zeroed, so that new
+        records are never followed by leftovers of the torn one.
+        """
+        offset = len(LOG_MAGIC)
+        size = len(self._mmap)
+
+        while offset + _RECORD_HEADER.size <= size:
+            length, checksum = _RECORD_HEADER.unpack_from(self._mmap, offset)
+            if length == 0:
+                return offset
+
+            start = offset + _RECORD_HEADER.size
+            if start + length > size or zlib.crc32(self._mmap[start:start + length]) != checksum:
+                break
+            offset = start + length
+        else:
+            return offset
+
+        self.records_dropped += 1
+        self._mmap[offset:size] = bytes(size - offset)
+        self._mmap.flush()
+        return offset
+
+
+class GameLogState:
+    """
+    State of the last game of an EventLog, the game starts at its last deploy record.
+    """
+
+    def __init__(self):
+        self.app_id: Optional[int] = None
+        self.escrow_fund_program_bytes: Optional[bytes] = None
+        self.action_count = 0
+
+        # txid -> transaction record of every transaction that was sent but is neither confirmed nor rejected
+        self.pending: Dict[str, dict] = {}
+        # txid -> (kind, status) of every transaction of the game, status is "pending", "confirmed" or "rejected"
+        self.transactions: Dict[str, Tuple[str, str]] = {}
+        # (txid, player_id, points) of every play action of the game, a batch counts as one with the sum of its throws
+        self.throws: List[Tuple[str, str, int]] = []
+        self.records = 0
+
+    @classmethod
+    def from_log(cls, event_log: EventLog) -> 'GameLogState':
+        state = cls()
+        for record in event_log.records():
+            state.apply(record)
+        return state
+
+    def apply(self, record: dict):
+        self.records += 1
+        record_type = record["t"]
+
+        if record_type == DEPLOY:
+            records = self.records
+            self.__init__()
+            self.records = records
+            self.app_id = record["app_id"]
+        elif record_type == ESCROW:
+            self.escrow_fund_program_bytes = record["program"]
+        elif record_type == TRANSACTION:
+            self.pending[record["txid"]] = record
+            self.action_count = max(self.action_count, record.get("action_count", 0))
+            self.transactions[record["txid"]] = (record["kind"], "pending")
+            if record["kind"] in (PLAY_ACTION, PLAY_ACTION_BATCH):
+                self.throws.append((record["txid"], record["player_id"], record["points"]))
+        elif record_type in (CONFIRMED, REJECTED):
+            sent = self.pending.pop(record["txid"], None)
+            if sent is None:
+                return
+
+            self.transactions[record["txid"]] = (sent["kind"], "confirmed" if record_type == CONFIRMED else "rejected")
@@ -0,0 +1,55 @@
+import pytest
+from algosdk import account
+from algosdk.future import transaction as algo_txn
+from algosdk.v2client import algod
+
+from src.blockchain_utils.local_node import GENESIS_HASH, MIN_FEE, LocalNetwork, LocalNodeServer
+from src.services.game_engine_service import GameEngineService
+
+
+@pytest.fixture
+def local_network():
+    network = LocalNetwork(block_time=0.05)
+    server = LocalNodeServer(network, port=0)
+    server.start()
+    network.client = algod.AlgodClient("local", server.address)
+    yield network
+    server.stop()
+
+
+@pytest.fixture
+def params() -> algo_txn.SuggestedParams:
+    """
+    Suggested params that are valid on a fresh LocalNetwork for its first 500 rounds.
+    """
+    return algo_txn.SuggestedParams(fee=MIN_FEE, first=1, last=500, gh=GENESIS_HASH, flat_fee=True)
+
+
+@pytest.fixture
+def deploy_engine(local_network):
+    """
+    Deploys the application of a new game with new accounts on the local network, as often as it is called.
+    """
+    def deploy() -> GameEngineService:
+        (creator_pk, creator_address), (x_pk, x_address), (o_pk, o_address) = [account.generate_account()
+                                                                               for _ in range(3)]
+        engine = GameEngineService(creator_pk, creator_address, x_pk, x_address, o_pk, o_address)
+        engine.deploy_application(local_network.client)
+        return engine
+
+    return deploy
+
+
+@pytest.fixture
+def sandbox_versions():
+    """
+    Builds the /versions answer of a sandbox node with the given build number.
+    """
+    def versions(build_number: int) -> dict:
+        return {"genesis_id": "sandnet-v1",
+                "genesis_hash_b64": "c2FuZG5ldA==",
+                "build": {"major": 3, "minor": 0, "build_number": build_number, "commit_hash": "abc", "branch": "rel",
+                          "channel": "stable"},
+                "versions": ["v2"]}
+
+    return versions
@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+from algosdk import account
+from algosdk.future import transaction as algo_txn
+from algosdk.future.transaction import SuggestedParams
+
+from src.blockchain_utils.async_client import AsyncAlgodClient
+from src.blockchain_utils.async_network_interaction import AsyncConfirmationTracker, AsyncNetworkInteraction, \
+    AsyncSuggestedParamsCache
+from src.blockchain_utils.confirmation_tracker import TransactionRejected
+from src.services.game_engine_service import GameEngineService
+from src.services.game_state_reader import GameStateReader
+
+
+def _async_client(local_network) -> AsyncAlgodClient:
+    return AsyncAlgodClient("local", local_network.client.algod_address)
+
+
+def _signed_payment(params) -> tuple:
+    sender_pk, sender = account.generate_account()
+    _, receiver = account.generate_account()
+    return algo_txn.PaymentTxn(sender, params, receiver, 1000).sign(sender_pk), sender
+
+
+class _SlowAlgod:
+    """
+    Async algod client whose suggested params take a while to arrive.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    async def suggested_params(self) -> SuggestedParams:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return SuggestedParams(1000, 10, 1010, "gh")
+
+
+class _Indexer:
+    """
+    Async indexer client that processes one round per health check.
+    """
+
+    def __init__(self):
+        self.round = 0
+
+    async def health(self) -> dict:
+        self.round += 1
+        return {"round": self.round}
+
+
+def test_game_is_played_from_a_single_event_loop(local_network):
+    (creator_pk, creator), (x_pk, x_address), (o_pk, o_address) = [account.generate_account() for _ in range(3)]
+    engine = GameEngineService(creator_pk, creator, x_pk, x_address, o_pk, o_address)
+
+    async def play():
+        async with _async_client(local_network) as client:
+            await engine.deploy_application_async(client)
+            await engine.start_game_async(client)
+            descriptions = [await engine.play_action_async(client, "X", 1),
+                            await engine.play_action_async(client, "O", 2)]
+            return descriptions, AsyncConfirmationTracker.for_client(client).pending_count
+
+    descriptions, pending_count = asyncio.run(play())
+
+    assert [description.split(" in transaction")[0] for description in descriptions] == \
+        ["X has point(s) 1", "O has point(s) 2"]
+    assert pending_count == 0
+
+    snapshot = GameStateReader(local_network.client, engine.app_id).snapshot()
+    assert (snapshot.player_x_state, snapshot.player_o_state, snapshot.player_turn_address) == (1, 2, x_address)
+
+
+def test_waiters_of_a_transaction_share_its_confirmation(local_network, params):
+    stx, _ = _signed_payment(params)
+
+    async def confirm():
+        async with _async_client(local_network) as client:
+            tracker = AsyncConfirmationTracker.for_client(client)
+            assert AsyncConfirmationTracker.for_client(client) is tracker
+
+            txid = await client.send_transaction(stx)
+            waiters = [asyncio.ensure_future(tracker.wait(txid, timeout_seconds=5.0)) for _ in range(3)]
+            await asyncio.sleep(0)
+
+            # a cancelled waiter leaves the others waiting for the same confirmation
+            waiters[0].cancel()
+            txinfos = await asyncio.gather(*waiters[1:])
+            return txid, txinfos, tracker.pending_count
+
+    txid, txinfos, pending_count = asyncio.run(confirm())
+
+    assert all(txinfo["confirmed-round"] > 0 for txinfo in txinfos)
+    assert txinfos[0] is txinfos[1]
+    assert pending_count == 0
+    assert local_network.pending_transaction_info(txid)["confirmed-round"] == txinfos[0]["confirmed-round"]
+
+
+def test_rejected_and_unknown_transactions(local_network, params):
+    stx, sender = _signed_payment(params)
+
+    async def confirm():
+        async with _async_client(local_network) as client:
+            tracker = AsyncConfirmationTracker(client, timeout_seconds=5.0)
+
+            # the sender is emptied before the block, the node drops the transaction from its pool
+            txid = await client.send_transaction(stx)
+            local_network.set_balance(sender, 0)
+            with pytest.raises(TransactionRejected):
+                await tracker.wait(txid)
+
+            with pytest.raises(TimeoutError):
+                await tracker.wait("A" * 52, timeout_seconds=0.2)
+            return tracker.pending_count
+
+    assert asyncio.run(confirm()) == 0
+
+
+def test_concurrent_callers_share_one_fetch_of_the_params():
+    client = _SlowAlgod()
+    cache = AsyncSuggestedParamsCache(client)
+
+    async def get_many():
+        return await asyncio.gather(*(cache.get() for _ in range(10)))
+
+    params = asyncio.run(get_many())
+    assert (client.calls, cache.fetches) == (1, 1)
+    assert len({id(suggested_params) for suggested_params in params}) == 10
+
+    # every caller gets a copy, changing it leaves the cached params alone
+    params[0].fee = 5
+    assert asyncio.run(cache.get()).fee == 1000
+    assert cache.hits == 1
+
+    cache.invalidate()
+    asyncio.run(cache.get())
+    assert cache.fetches == 2
+
+
+def test_default_suggested_params_use_a_flat_fee(local_network):
+    async def get_twice():
+        async with _async_client(local_network) as client:
+            first = await AsyncNetworkInteraction.get_default_suggested_params(client)
+            second = await AsyncNetworkInteraction.get_default_suggested_params(client)
+            return first, second, AsyncSuggestedParamsCache.for_client(client).fetches
+
+    first, second, fetches = asyncio.run(get_twice())
+    assert (first.flat_fee, first.fee) == (True, 1000)
+    assert first.first == second.first
+    assert fetches == 1
+
+
+def test_wait_for_indexer():
+    indexer = _Indexer()
+    asyncio.run(AsyncNetworkInteraction.wait_for_indexer(indexer, 3, poll_interval=0.01))
+    assert indexer.round == 3
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(AsyncNetworkInteraction.wait_for_indexer(_Indexer(), 1000, timeout_seconds=0.05,
+                                                             poll_interval=0.01))
+
+
+def test_group_is_submitted_and_confirmed(local_network, params):
+    (first_pk, first), (second_pk, second) = account.generate_account(), account.generate_account()
+    group = [algo_txn.PaymentTxn(first, params, second, 1000), algo_txn.PaymentTxn(second, params, first, 2000)]
+    algo_txn.assign_group_id(group)
+    signed = [group[0].sign(first_pk), group[1].sign(second_pk)]
+
+    async def send():
+        async with _async_client(local_network) as client:
+            return await AsyncNetworkInteraction.submit_transactions(client, signed, log=False)
+
+    assert asyncio.run(send()) == signed[0].get_txid()
+    assert local_network.pending_transaction_info(signed[1].get_txid())["confirmed-round"] > 0
@@ -0,0 +1,67 @@
+import base64
+import time
+
+import pytest
+from algosdk import account, encoding
+from algosdk.future import transaction as algo_txn
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker, TransactionRejected
+
+
+def _send_payment(network, params, amount: int = 1000):
+    sender_pk, sender = account.generate_account()
+    _, receiver = account.generate_account()
+    stx = algo_txn.PaymentTxn(sender, params, receiver, amount, note=b"cornhole").sign(sender_pk)
+    network.client.send_raw_transaction(encoding.msgpack_encode(stx))
+    return stx, sender, receiver
+
+
+def test_confirmations_are_read_from_the_block(local_network, params):
+    tracker = ConfirmationTracker(local_network.client, timeout_seconds=5.0)
+    stxs = [_send_payment(local_network, params) for _ in range(5)]
+
+    futures = [tracker.track(stx.get_txid()) for stx, _, _ in stxs]
+    txinfos = [future.result(5.0) for future in futures]
+
+    for (stx, sender, receiver), txinfo in zip(stxs, txinfos):
+        assert txinfo["confirmed-round"] > 0
+        assert txinfo["txn"]["txn"]["snd"] == sender
+        assert txinfo["txn"]["txn"]["rcv"] == receiver
+        assert base64.b64decode(txinfo["txn"]["txn"]["note"]) == b"cornhole"
+    assert tracker.transactions_polled == 0
+
+
+def test_application_calls_are_read_from_the_block(local_network, params):
+    tracker = ConfirmationTracker(local_network.client, timeout_seconds=5.0)
+    creator_pk, creator = account.generate_account()
+    # a NoOp call, whose zero on_complete is left out of the block like any other zero value
+    stx = algo_txn.ApplicationCallTxn(creator, params, 0, algo_txn.OnComplete.NoOpOC,
+                                      approval_program=b"\x04\x81\x01", clear_program=b"\x04\x81\x01",
+                                      app_args=[b"SetupPlayers"]).sign(creator_pk)
+    local_network.client.send_raw_transaction(encoding.msgpack_encode(stx))
+
+    assert tracker.track(stx.get_txid()).result(5.0)["application-index"] > 0
+    assert tracker.transactions_polled == 0
+
+
+def test_rejected_transaction_is_asked_for(local_network, params):
+    tracker = ConfirmationTracker(local_network.client, timeout_seconds=5.0)
+    stx, sender, _ = _send_payment(local_network, params)
+
+    # the sender is emptied before the block, the node drops the transaction from its pool
+    local_network.set_balance(sender, 0)
+    with pytest.raises(TransactionRejected):
+        tracker.track(stx.get_txid()).result(5.0)
+    assert tracker.transactions_polled >= 1
+
+
+def test_shorter_timeout_of_a_tracked_transaction(local_network):
+    tracker = ConfirmationTracker(local_network.client, timeout_seconds=60.0)
+    txid = "A" * 52
+
+    first = tracker.track(txid)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        tracker.track(txid, timeout_seconds=0.2).result(5.0)
+    assert time.monotonic() - started < 5.0
+    assert first.done()
@@ -0,0 +1,64 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import yaml
+
+from src.blockchain_utils import credentials
+from src.blockchain_utils.keystore import Keystore
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    config_location = tmp_path / "config.yml"
+    with open(config_location, "w") as file:
+        yaml.safe_dump({"accounts": {"total": 1,
+                                     "account_1": {"private_key": "pk", "address": "CONFIG", "mnemonic": "m"}}},
+                       file)
+
+    monkeypatch.setattr(credentials, "get_config_location", lambda: str(config_location))
+    monkeypatch.setattr(credentials, "_keystore",
+                        Keystore(tmp_path / "keystore.json", credentials.config_account_numbers))
+    credentials.invalidate_config()
+    yield
+    credentials.invalidate_config()
+
+
+def test_keystore_numbers_follow_the_config_accounts(project):
+    assert credentials.get_keystore().provision(2, workers=1) == range(2, 4)
+
+    assert credentials.get_account_credentials(1) == ("pk", "CONFIG", "m")
+    assert credentials.get_account_credentials(2) == credentials.get_keystore().get(2)
+    assert credentials.get_keystore().get(1) is None
+
+    with pytest.raises(ValueError):
+        credentials.get_account_credentials(4)
+
+
+def test_concurrent_keystores_do_not_reuse_numbers(project, tmp_path):
+    keystores = [Keystore(tmp_path / "keystore.json", credentials.config_account_numbers) for _ in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        numbers = list(executor.map(lambda keystore: keystore.provision(5, workers=1), keystores))
+
+    assert sorted(number for added in numbers for number in added) == list(range(2, 22))
+    assert len(Keystore(tmp_path / "keystore.json")) == 20
+
+
+def test_version_1_keystore_keeps_its_numbers(tmp_path):
+    path = tmp_path / "keystore.json"
+    path.write_text(json.dumps({"version": 1, "accounts": [["pk1", "A1", "m1"], ["pk2", "A2", "m2"]]}))
+    keystore = Keystore(path, lambda: {1, 2, 3})
+
+    assert keystore.get(2) == ("pk2", "A2", "m2")
+    assert keystore.add([("pk4", "A4", "m4")]) == range(4, 5)
+    assert Keystore(path).account_id("A2") == 2
+
+
+def test_add_account_to_config_is_deprecated(project):
+    with pytest.warns(DeprecationWarning):
+        credentials.add_account_to_config()
+
+    # the new account is written to the keystore with the number after the account of the config.yml
+    assert len(credentials.get_keystore()) == 1
+    assert credentials.get_account_credentials(2) == credentials.get_keystore().get(2)
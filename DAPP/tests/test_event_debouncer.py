@@ -0,0 +1,64 @@
+from src.metrics_utils.metrics import MILLIS_WRAP
+from src.serial_utils.event_debouncer import EventDebouncer
+from src.serial_utils.frame_parser import BoardEvent, QrEvent
+
+ADDRESS = "GD64YIY3TWGDMCNPP553DZPPR6LDUSFQOIJVFDPPXWEG3FVOJCCDBBHU5A"
+
+
+def _throw(tick: int, score: int = 1, node_name: str = "X") -> BoardEvent:
+    return BoardEvent("dev", node_name, tick, score, 0.0)
+
+
+def test_duplicates_and_bounces():
+    debouncer = EventDebouncer(window_ms=1000)
+
+    assert debouncer.accept(_throw(5000))
+    assert not debouncer.accept(_throw(5000))           # the same line again
+    assert not debouncer.accept(_throw(5040, score=3))  # the lock flag bouncing
+    assert debouncer.accept(_throw(5100, node_name="O"))
+    assert debouncer.accept(_throw(6000))
+
+    # a line sent again after a newer one is not a restart of the board
+    assert not debouncer.accept(_throw(5000))
+    assert debouncer.accept(_throw(7500))
+
+    assert (debouncer.accepted, debouncer.duplicates, debouncer.bounces, debouncer.resets) == (4, 2, 1, 0)
+
+
+def test_millis_wrap_is_unwrapped():
+    debouncer = EventDebouncer(window_ms=1000)
+
+    assert debouncer.accept(_throw(MILLIS_WRAP - 200))
+    # 300 ms later, after millis() wrapped around: still a bounce
+    assert not debouncer.accept(_throw(100))
+    assert debouncer.accept(_throw(2000))
+    # the throw from before the wrap is remembered at its unwrapped tick
+    assert not debouncer.accept(_throw(MILLIS_WRAP - 200))
+
+    assert debouncer.wraps == 1
+    assert debouncer.resets == 0
+    assert debouncer.bounces == 1
+
+
+def test_restart_of_the_board_drops_its_history():
+    debouncer = EventDebouncer(window_ms=1000)
+
+    assert debouncer.accept(_throw(600000))
+    # the board restarted, millis() counts from 0 again and the first throw is not a bounce
+    assert debouncer.accept(_throw(1500))
+    assert not debouncer.accept(_throw(1600))
+    # its old lines are forgotten with the history, a repeat of the first tick is only a jump forward
+    assert debouncer.accept(_throw(600000, score=2))
+
+    assert debouncer.resets == 1
+    assert debouncer.wraps == 0
+
+
+def test_registrations():
+    debouncer = EventDebouncer()
+
+    assert debouncer.accept(QrEvent("dev", "X", 1633000000, ADDRESS, 0.0))
+    assert not debouncer.accept(QrEvent("dev", "X", 1633000000, ADDRESS, 0.0))
+    assert debouncer.accept(QrEvent("dev", "O", 1633000000, ADDRESS, 0.0))
+    assert debouncer.accept(QrEvent("dev", "X", 1633000005, ADDRESS, 0.0))
+    assert debouncer.duplicates == 1
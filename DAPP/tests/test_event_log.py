@@ -0,0 +1,81 @@
+import threading
+
+from src.storage_utils.event_log import CONFIRMED, DEPLOY, PLAY_ACTION, PLAY_ACTION_BATCH, TRANSACTION, EventLog, \
+    GameLogState
+
+
+def test_records_survive_a_reopen(tmp_path):
+    with EventLog(tmp_path / "table.wal") as event_log:
+        event_log.append({"t": DEPLOY, "app_id": 7})
+        event_log.append({"t": TRANSACTION, "kind": PLAY_ACTION, "txid": "A", "player_id": "X", "points": 3})
+
+    with EventLog(tmp_path / "table.wal") as event_log:
+        assert [record["t"] for record in event_log.records()] == [DEPLOY, TRANSACTION]
+        assert event_log.records_dropped == 0
+
+
+def test_torn_tail_is_dropped_and_overwritten(tmp_path):
+    path = tmp_path / "table.wal"
+    with EventLog(path) as event_log:
+        event_log.append({"t": DEPLOY, "app_id": 7})
+        end_of_first = event_log.size
+        event_log.append({"t": TRANSACTION, "kind": PLAY_ACTION, "txid": "A", "player_id": "X", "points": 3})
+        end_of_second = event_log.size
+
+    # a crash in the middle of the second record: its last bytes never reached the disk
+    with open(path, "r+b") as file:
+        file.seek(end_of_second - 4)
+        file.write(b"\x00" * 4)
+
+    with EventLog(path) as event_log:
+        assert event_log.records_dropped == 1
+        assert event_log.size == end_of_first
+        assert [record["t"] for record in event_log.records()] == [DEPLOY]
+
+        event_log.append({"t": CONFIRMED, "txid": "B", "round": 3})
+
+    with EventLog(path) as event_log:
+        assert event_log.records_dropped == 0
+        assert [record["t"] for record in event_log.records()] == [DEPLOY, CONFIRMED]
+
+
+def test_records_while_the_log_grows(tmp_path):
+    with EventLog(tmp_path / "table.wal", grow_bytes=4096) as event_log:
+        event_log.append({"t": DEPLOY, "app_id": 7})
+
+        def append_many():
+            for idx in range(2000):
+                event_log.append({"t": CONFIRMED, "txid": str(idx), "round": idx})
+
+        writer = threading.Thread(target=append_many)
+        writer.start()
+        while writer.is_alive():
+            assert next(event_log.records())["t"] == DEPLOY
+            sum(1 for _ in event_log.records())
+        writer.join()
+
+        assert sum(1 for _ in event_log.records()) == 2001
+
+
+def test_append_after_close_is_discarded(tmp_path):
+    event_log = EventLog(tmp_path / "table.wal")
+    event_log.append({"t": DEPLOY, "app_id": 7})
+    event_log.close()
+
+    event_log.append({"t": CONFIRMED, "txid": "A", "round": 3})
+    assert event_log.records_discarded == 1
+    assert list(event_log.records()) == []
+
+
+def test_game_state_keeps_pending_batches():
+    state = GameLogState()
+    for record in [{"t": DEPLOY, "app_id": 7},
+                   {"t": TRANSACTION, "kind": PLAY_ACTION, "txid": "A", "player_id": "X", "points": 1},
+                   {"t": TRANSACTION, "kind": PLAY_ACTION_BATCH, "txid": "B", "player_id": "O", "points": 4},
+                   {"t": CONFIRMED, "txid": "A", "round": 3}]:
+        state.apply(record)
+
+    assert state.throws == [("A", "X", 1), ("B", "O", 4)]
+    assert state.transactions == {"A": (PLAY_ACTION, "confirmed"), "B": (PLAY_ACTION_BATCH, "pending")}
+    assert list(state.pending) == ["B"]
+    assert state.pending["B"]["kind"] == PLAY_ACTION_BATCH
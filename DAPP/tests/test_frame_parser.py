@@ -0,0 +1,110 @@
+from src.serial_utils.frame_parser import DECODE_BLOCK_SIZE, MAX_FRAME_LENGTH, BoardEvent, FrameParser, QrEvent, \
+    encode_registration
+
+ADDRESS = "GD64YIY3TWGDMCNPP553DZPPR6LDUSFQOIJVFDPPXWEG3FVOJCCDBBHU5A"
+# same public key, last character of the checksum changed
+WRONG_CHECKSUM = ADDRESS[:-1] + "Q"
+
+STREAM = (b"BRD,X,1,1\r\n"
+          b"BRD,O,2,3\r\n"
+          + f"QR,X,1633000000,{ADDRESS}\r\n".encode('ascii')
+          + b"BRD,X,3,0\n"
+          + encode_registration("O", 1633000001, ADDRESS)
+          + b"BRD,O,4,2\r\n")
+
+
+def _decoded(events):
+    return [(type(event), event.node_name, getattr(event, 'tick', None), getattr(event, 'score', None),
+             getattr(event, 'address', None)) for event in events]
+
+
+def test_frames_split_at_every_byte():
+    expected = _decoded(FrameParser().feed(STREAM))
+    assert len(expected) == 6
+
+    for cut in range(1, len(STREAM)):
+        parser = FrameParser()
+        events = parser.feed(STREAM[:cut]) + parser.feed(memoryview(STREAM[cut:]))
+        assert _decoded(events) == expected, cut
+        assert parser.frames_malformed == 0
+
+
+def test_malformed_lines_are_counted_in_order():
+    parser = FrameParser('dev')
+    events = parser.feed(b"BRD,X,1,1\r\n"
+                         b"BRD,X,2,4\r\n"        # score out of range
+                         b"BRD,X,3\r\n"          # missing field
+                         b"BRD,X,4,1,1\r\n"      # extra field
+                         b"BRD,X,t5,1\r\n"       # tick is not a number
+                         b"BRD,X!,6,1\r\n"       # node name is not alphanumeric
+                         b"\r\n"
+                         + f"QR,O,7,{WRONG_CHECKSUM}\r\n".encode('ascii')
+                         + f"QR,O,8,{ADDRESS.lower()}\r\n".encode('ascii')
+                         + b"BRD,O,9,2\r\n")
+
+    assert [(event.node_name, event.tick, event.score) for event in events] == [("X", 1, 1), ("O", 9, 2)]
+    assert all(isinstance(event, BoardEvent) and event.device == 'dev' for event in events)
+    assert parser.frames_decoded == 2
+    assert parser.frames_malformed == 8
+
+
+def test_malformed_lines_with_four_fields_are_counted_in_order():
+    # every line has four fields, the board lines around the malformed ones are decoded column by column
+    parser = FrameParser('dev')
+    events = parser.feed(b"BRD,X,1,1\r\n"
+                         b"BRD,X,2,4\r\n"        # score out of range
+                         b"BRD,O,3,3\r\n"
+                         b"BRD,X,t4,1\r\n"       # tick is not a number
+                         b"BRD,X!,5,1\r\n"       # node name is not alphanumeric
+                         b"QRX,O,6,1\r\n"        # unknown node type
+                         + f"QR,O,7,{WRONG_CHECKSUM}\r\n".encode('ascii')
+                         + f"QR,O,8,{ADDRESS}\r\n".encode('ascii')
+                         + b"BRD,O,9,2\n")
+
+    assert [(event.node_name, getattr(event, 'tick', None)) for event in events] == [("X", 1), ("O", 3), ("O", None),
+                                                                                     ("O", 9)]
+    assert parser.frames_decoded == 4
+    assert parser.frames_malformed == 5
+
+
+def test_chunks_larger_than_a_block():
+    lines = [f"BRD,{'XO'[idx % 2]},{idx},{idx % 4}\r\n" for idx in range(3 * DECODE_BLOCK_SIZE // 10)]
+    lines[len(lines) // 2] = "BRD,X,1\r\n"
+    chunk = "".join(lines).encode('ascii')
+
+    parser = FrameParser()
+    events = parser.feed(chunk + b"BRD,O")
+    assert parser.frames_malformed == 1
+    assert len(events) == len(lines) - 1
+    assert [event.tick for event in events] == [idx for idx in range(len(lines)) if idx != len(lines) // 2]
+
+    assert _decoded(parser.feed(b",1,2\n")) == [(BoardEvent, "O", 1, 2, None)]
+
+
+def test_overlong_line_without_newline_is_dropped():
+    parser = FrameParser()
+    assert parser.feed(b"BRD,X," + b"1" * MAX_FRAME_LENGTH) == []
+    assert parser.frames_malformed == 1
+
+    # the rest of the garbage line is malformed as well, the next line is decoded again
+    events = parser.feed(b"1,1\r\nBRD,O,2,3\r\n")
+    assert [(event.node_name, event.tick) for event in events] == [("O", 2)]
+    assert parser.frames_malformed == 2
+
+
+def test_registrations():
+    parser = FrameParser()
+    events = parser.feed(b"\x02" + encode_registration("X", 1633000000, ADDRESS)
+                         + encode_registration("O", 1633000000, ADDRESS)[:-1] + b"\x00")
+
+    assert [(type(event), event.node_name, event.address) for event in events] == [(QrEvent, "X", ADDRESS)]
+    # the stray STX and the registration with a wrong checksum
+    assert parser.frames_malformed == 2
+
+
+def test_reset_drops_the_partial_frame():
+    parser = FrameParser()
+    assert parser.feed(b"BRD,X,1") == []
+    parser.reset()
+    assert _decoded(parser.feed(b"BRD,O,2,1\n")) == [(BoardEvent, "O", 2, 1, None)]
+    assert parser.frames_malformed == 0
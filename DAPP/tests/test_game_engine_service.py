@@ -0,0 +1,37 @@
+import pytest
+from algosdk.error import AlgodHTTPError
+
+from src.services.game_engine_service import GameEngineService
+
+
+def test_games_after_a_failed_send_are_not_started(local_network, deploy_engine):
+    client = local_network.client
+    engines = [deploy_engine() for _ in range(3)]
+
+    # the pool rejects the group of the second game, player O can not pay the bet
+    local_network.set_balance(engines[1].player_o_address, 0)
+
+    with pytest.raises(AlgodHTTPError):
+        GameEngineService.start_games(client, engines, preflight=False)
+
+    assert engines[0].escrow_fund_address is not None
+    assert engines[1].escrow_fund_address is None
+    assert engines[2].escrow_fund_address is None
+
+    # once player O has the funds, the games that were not started can be started again
+    local_network.set_balance(engines[1].player_o_address, 10 ** 9)
+    GameEngineService.start_games(client, engines[1:], preflight=False)
+    assert engines[1].escrow_fund_address is not None
+
+
+def test_preflight_counts_the_minimum_balance(local_network, deploy_engine):
+    client = local_network.client
+    engine = deploy_engine()
+
+    # exactly the bet and the fee, but nothing left for the minimum balance
+    params = client.suggested_params()
+    local_network.set_balance(engine.player_x_address, 1000000 + params.min_fee)
+
+    with pytest.raises(ValueError, match="Not enough funds"):
+        engine.start_game(client)
+    assert engine.escrow_fund_address is None
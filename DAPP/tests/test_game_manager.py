@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+
+from src.serial_utils.frame_parser import BoardEvent, QrEvent
+from src.services.game_engine_service import GameEngineService
+from src.services.game_manager import GameManager
+
+ADDRESS = "GD64YIY3TWGDMCNPP553DZPPR6LDUSFQOIJVFDPPXWEG3FVOJCCDBBHU5A"
+OTHER_ADDRESS = "7ZUECA7HFLZTXENRV24SHLU4AVPUTMTTDUFUBNBD64C73F3UHRTHAIOF6Q"
+
+
+class _RecordingEngine:
+    """
+    Stands in for the GameEngineService of a table and records the play actions it is asked for.
+    """
+
+    def __init__(self, release: threading.Event = None):
+        self.release = release
+        self.calls = []
+
+    def play_action(self, client, player_id: str, action_position: int):
+        if self.release is not None:
+            assert self.release.wait(5.0)
+        self.calls.append((player_id, action_position))
+        return f"{player_id}:{action_position}"
+
+    def play_action_batch(self, client, player_id: str, action_positions):
+        self.calls.append((player_id, list(action_positions)))
+        return f"{player_id}:{list(action_positions)}"
+
+
+@pytest.fixture
+def manager():
+    manager = GameManager(client=None, max_workers=4)
+    yield manager
+    manager.shutdown()
+
+
+def _throw(node_name: str, score: int = 1) -> BoardEvent:
+    return BoardEvent("dev", node_name, 1, score, 0.0)
+
+
+def test_events_are_routed_by_node_type_and_name(manager):
+    first, second = _RecordingEngine(), _RecordingEngine()
+    manager.add_table("first", first, board_nodes={"A": "X", "B": "O"}, qr_nodes={"A": "O"})
+    manager.add_table("second", second, board_nodes={"C": "X"})
+
+    # the board and the QR code station named A belong to different players
+    assert manager.route(_throw("A")) == ("first", "X")
+    assert manager.route(QrEvent("dev", "A", 1633000000, ADDRESS, 0.0)) == ("first", "O")
+    assert manager.route(_throw("C")) == ("second", "X")
+
+    assert manager.route_event(_throw("B", 3)).result(timeout=5.0) == "O:3"
+    assert manager.route_event(_throw("C", 2), player_id="O").result(timeout=5.0) == "O:2"
+    assert (first.calls, second.calls) == ([("O", 3)], [("O", 2)])
+
+
+def test_events_of_unknown_nodes_are_ignored(manager):
+    engine = _RecordingEngine()
+    manager.add_table("table", engine, board_nodes={"X": "X"})
+
+    assert manager.route(_throw("Z")) is None
+    assert manager.route_event(_throw("Z")) is None
+    assert manager.route_event(QrEvent("dev", "X", 1633000000, ADDRESS, 0.0)) is None
+    assert engine.calls == []
+    assert manager.registrations == {"table": {}}
+
+
+def test_first_registration_of_a_station_is_kept(manager):
+    manager.add_table("table", _RecordingEngine(), board_nodes={"X": "X"}, qr_nodes={"Q": "X"})
+
+    assert manager.route_event(QrEvent("dev", "Q", 1633000000, ADDRESS, 0.0)) is None
+    manager.route_event(QrEvent("dev", "Q", 1633000005, OTHER_ADDRESS, 0.0))
+    assert manager.registrations["table"] == {"X": ADDRESS}
+
+
+def test_invalid_tables_are_not_added(manager):
+    manager.add_table("table", _RecordingEngine(), board_nodes={"X": "X"})
+
+    with pytest.raises(ValueError, match="already exists"):
+        manager.add_table("table", _RecordingEngine(), board_nodes={"Y": "X"})
+    with pytest.raises(ValueError, match="already used by the table table"):
+        manager.add_table("other", _RecordingEngine(), board_nodes={"Y": "X", "X": "O"})
+    with pytest.raises(ValueError, match="Invalid player id"):
+        manager.add_table("other", _RecordingEngine(), board_nodes={"Y": "Z"})
+    with pytest.raises(ValueError, match="either batches or pipelines"):
+        manager.add_table("other", _RecordingEngine(), board_nodes={"Y": "X"}, batch_window=1.0, pipelined=True)
+
+    # none of the rejected tables left a route behind
+    assert manager.route(_throw("Y")) is None
+    assert list(manager.engines) == ["table"]
+
+
+def test_removed_table_no_longer_receives_events(manager):
+    manager.add_table("table", _RecordingEngine(), board_nodes={"X": "X"})
+    manager.remove_table("table")
+
+    assert manager.route_event(_throw("X")) is None
+
+    # its nodes can be used by a new table
+    manager.add_table("other", _RecordingEngine(), board_nodes={"X": "O"})
+    assert manager.route(_throw("X")) == ("other", "O")
+
+
+def test_slow_table_only_holds_up_its_own_throws(manager):
+    release = threading.Event()
+    slow, fast = _RecordingEngine(release), _RecordingEngine()
+    manager.add_table("slow", slow, board_nodes={"A": "X"})
+    manager.add_table("fast", fast, board_nodes={"B": "X"})
+
+    slow_futures = [manager.route_event(_throw("A", score)) for score in (1, 2, 3)]
+    assert manager.route_event(_throw("B")).result(timeout=5.0) == "X:1"
+    assert not any(future.done() for future in slow_futures)
+
+    release.set()
+    assert [future.result(timeout=5.0) for future in slow_futures] == ["X:1", "X:2", "X:3"]
+    assert slow.calls == [("X", 1), ("X", 2), ("X", 3)]
+
+
+def test_throws_of_a_batching_table_are_submitted_per_round(manager):
+    engine = _RecordingEngine()
+    manager.add_table("table", engine, board_nodes={"X": "X", "O": "O"}, batch_window=60.0)
+
+    first_round = [manager.route_event(_throw("X", score)) for score in (1, 3)]
+    # the other player starts throwing, the round of X is submitted
+    second_round = manager.route_event(_throw("O", 2))
+    assert {future.result(timeout=5.0) for future in first_round} == {"X:[1, 3]"}
+    assert not second_round.done()
+
+    manager.shutdown()
+    assert second_round.result(timeout=5.0) == "O:[2]"
+    assert engine.calls == [("X", [1, 3]), ("O", [2])]
+
+
+def test_pipelined_table_resolves_its_throws_once_they_are_confirmed(local_network, deploy_engine):
+    client = local_network.client
+    engine = deploy_engine()
+    GameEngineService.start_game(engine, client)
+
+    manager = GameManager(client, max_workers=4)
+    manager.add_table("table", engine, board_nodes={"X": "X", "O": "O"}, pipelined=True)
+
+    futures = [manager.route_event(_throw(player_id, score)) for player_id, score in (("X", 1), ("O", 2), ("X", 1))]
+    descriptions = [future.result(timeout=10.0) for future in futures]
+    manager.shutdown()
+
+    assert [description.split(" in transaction")[0] for description in descriptions] == \
+        ["X has point(s) 1", "O has point(s) 2", "X has point(s) 1"]
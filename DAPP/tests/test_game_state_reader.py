@@ -0,0 +1,83 @@
+import base64
+
+from algosdk.v2client import algod
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.services.game_engine_service import GameEngineService
+from src.services.game_state_reader import GameStateReader, GameStateSnapshot
+
+
+def _entry(key: bytes, **value) -> dict:
+    return {"key": base64.b64encode(key).decode('ascii'), "value": value}
+
+
+def _started_game(local_network, deploy_engine) -> GameEngineService:
+    engine = deploy_engine()
+    description = GameEngineService.start_game(engine, local_network.client)
+    ConfirmationTracker.for_client(local_network.client).wait(description.rsplit(" ", 1)[1], timeout_seconds=5.0)
+    return engine
+
+
+def _play(local_network, engine: GameEngineService, player_id: str, points: int) -> dict:
+    txid = engine.send_play_action(local_network.client, player_id, points)
+    return ConfirmationTracker.for_client(local_network.client).wait(txid, timeout_seconds=5.0)
+
+
+def test_snapshot_decodes_state_and_delta_entries():
+    snapshot = GameStateSnapshot(3)
+    snapshot.apply([_entry(b"PlayerXState", type=2, uint=2),
+                    _entry(b"PlayerTurnAddress", type=1, bytes=base64.b64encode(bytes(32)).decode('ascii')),
+                    _entry(b"Unknown", type=2, uint=9)], 3)
+    assert (snapshot.player_x_state, snapshot.player_turn_address, snapshot.round) == \
+        (2, "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAY5HFKQ", 3)
+
+    # deltas carry an action instead of a type
+    snapshot.apply([_entry(b"PlayerXState", action=2, uint=3), _entry(b"PlayerTurnAddress", action=3)], 5)
+    assert (snapshot.player_x_state, snapshot.player_turn_address, snapshot.round) == (3, None, 5)
+
+
+def test_deltas_of_confirmed_transactions_keep_the_snapshot_current(local_network, deploy_engine):
+    engine = _started_game(local_network, deploy_engine)
+    other = _started_game(local_network, deploy_engine)
+    reader = GameStateReader(local_network.client, engine.app_id)
+    assert reader.snapshot().player_turn_address == engine.player_x_address
+
+    _play(local_network, engine, "X", 2)
+    # a throw of another game leaves the snapshot alone
+    _play(local_network, other, "X", 1)
+
+    snapshot = reader.snapshot()
+    assert (snapshot.player_x_state, snapshot.player_turn_address) == (2, engine.player_o_address)
+    assert (reader.reads, reader.deltas_applied) == (1, 1)
+    reader.close()
+
+
+def test_delta_of_an_older_round_does_not_overwrite_newer_scores(local_network, deploy_engine):
+    engine = _started_game(local_network, deploy_engine)
+    first_throw = _play(local_network, engine, "X", 1)
+    _play(local_network, engine, "O", 1)
+    _play(local_network, engine, "X", 1)
+
+    # the tracker of a new client has not followed any block yet
+    reader = GameStateReader(algod.AlgodClient("local", local_network.client.algod_address), engine.app_id)
+    assert reader.snapshot().player_x_state == 2
+
+    # the confirmation of the first throw arrives late, its PlayerXState is older than the one that was read
+    reader.apply_transaction(first_throw)
+    snapshot = reader.snapshot()
+    assert (snapshot.player_x_state, snapshot.player_o_state) == (2, 1)
+    assert snapshot.round >= first_throw["confirmed-round"]
+    assert reader.deltas_applied == 0
+    reader.close()
+
+
+def test_invalidated_snapshot_is_read_again(local_network, deploy_engine):
+    engine = _started_game(local_network, deploy_engine)
+    reader = GameStateReader(local_network.client, engine.app_id)
+    reader.snapshot()
+
+    reader.invalidate()
+    assert reader.snapshot().player_x_address == engine.player_x_address
+    assert reader.snapshot(refresh=True).game_status == 0
+    assert reader.reads == 3
+    reader.close()
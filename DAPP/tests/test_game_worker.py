@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import Future
+
+from src.blockchain_utils.confirmation_tracker import ConfirmationTracker
+from src.serial_utils.frame_parser import BoardEvent, QrEvent
+from src.serial_utils.ingest_hub import SerialIngestHub
+from src.services.game_engine_service import GameEngineService
+from src.services.game_worker import GameWorker
+from src.storage_utils.event_log import EventLog
+
+
+def _wait_until_settled(worker: GameWorker, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while worker.scoreboard.in_flight_count and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+
+def _started_worker(client, engine: GameEngineService) -> GameWorker:
+    GameEngineService.start_game(engine, client)
+
+    worker = GameWorker(client, engine, SerialIngestHub([]))
+    worker.application_deployed()
+    while worker.game_state_reader.snapshot(refresh=True).player_turn_address is None:
+        time.sleep(0.02)
+    return worker
+
+
+def test_throws_are_played_in_turn_whatever_board_reports_them(local_network, deploy_engine):
+    worker = _started_worker(local_network.client, deploy_engine())
+
+    # both throws come from the board of X, the second one is played for O whose turn it is
+    worker._handle_event(BoardEvent("dev", "X", 1, 1, time.perf_counter()))
+    worker._handle_event(BoardEvent("dev", "X", 2, 1, time.perf_counter()))
+    _wait_until_settled(worker)
+
+    game = worker.snapshot()
+    assert worker.scoreboard.rejected == 0
+    assert (game["player_x_local_score"], game["player_o_local_score"]) == (1, 1)
+    assert game["player_turn"] == "X"
+
+
+def test_rejected_throw_is_logged_and_the_turn_taken_from_the_chain(local_network, deploy_engine):
+    worker = _started_worker(local_network.client, deploy_engine())
+
+    # the worker believes it is the turn of O, the application still waits for X
+    worker.player_turn = "O"
+    worker._handle_event(BoardEvent("dev", "O", 1, 3, time.perf_counter()))
+    _wait_until_settled(worker)
+
+    game = worker.snapshot()
+    assert worker.scoreboard.rejected == 1
+    assert (game["player_x_local_score"], game["player_o_local_score"]) == (0, 0)
+    assert any("rejected" in message for message in game["local_log"])
+    assert game["player_turn"] == "X"
+
+
+def test_registrations_of_the_qr_code_stations_are_shown(local_network, deploy_engine):
+    worker = _started_worker(local_network.client, deploy_engine())
+    engine = worker.engine
+
+    worker._handle_event(QrEvent("dev", "X", 1633000000, engine.player_x_address, time.perf_counter()))
+    # a second scan at the station does not replace the registered player
+    worker._handle_event(QrEvent("dev", "X", 1633000005, engine.player_o_address, time.perf_counter()))
+
+    game = worker.snapshot()
+    assert game["registrations"] == {"X": engine.player_x_address}
+    assert f"Player X: {engine.player_x_address} Registered" in game["local_log"]
+
+
+def test_restore_finds_throws_confirmed_while_the_worker_was_down(local_network, deploy_engine, tmp_path):
+    client = local_network.client
+    local_network.pending_cache_rounds = 2
+    engine = deploy_engine()
+    GameEngineService.start_game(engine, client)
+    engine.event_log = EventLog(tmp_path / "table.wal")
+    engine._application_deployed(engine.app_id)
+    engine._escrow_created(engine.escrow_fund_program_bytes)
+
+    # the worker crashes right after the throw is sent, its confirmation never reaches the log
+    txid = engine.send_play_action(client, "X", 2)
+    engine.event_log.close()
+    ConfirmationTracker.for_client(client).wait(txid, timeout_seconds=5.0)
+    local_network.status_after_block(local_network.round + 3, timeout=5.0)
+    assert local_network.pending_transaction_info(txid) is None
+
+    restarted = GameEngineService(engine.app_creator_pk, engine.app_creator_address,
+                                  engine.player_x_pk, engine.player_x_address,
+                                  engine.player_o_pk, engine.player_o_address,
+                                  event_log=EventLog(tmp_path / "table.wal"))
+    worker = GameWorker(client, restarted, SerialIngestHub([]))
+    assert worker.restore()
+
+    game = worker.snapshot()
+    assert worker.scoreboard.in_flight_count == 0
+    assert worker.scoreboard.rejected == 0
+    assert game["local_log"] == ["Player X Scored: 2"]
+    assert game["submitted_transactions"][-1] == f"play_action transaction {txid}: confirmed"
+    assert (game["player_x_local_score"], game["player_turn"]) == (2, "O")
+    restarted.event_log.close()
+
+
+def test_unknown_outcome_of_a_throw_is_not_a_rejection(local_network, deploy_engine):
+    worker = _started_worker(local_network.client, deploy_engine())
+
+    future = Future()
+    future.set_exception(TimeoutError("not confirmed in time"))
+    token = worker.scoreboard.add("X", 3)
+    worker._pending_throw_done(future, "LOST", {"kind": "play_action", "player_id": "X", "points": 3}, token)
+
+    game = worker.snapshot()
+    assert (worker.scoreboard.rejected, worker.scoreboard.unknown) == (0, 1)
+    assert not any("Rejected transaction." in description for description in game["submitted_transactions"])
+    assert game["player_x_local_score"] == 0
+    assert game["player_turn"] == "X"
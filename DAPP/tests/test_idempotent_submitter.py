@@ -0,0 +1,59 @@
+import pytest
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction as algo_txn
+
+from src.blockchain_utils.idempotent_submitter import IdempotentSubmitter, action_lease
+
+
+def _payment(params, lease: bytes = None, note: bytes = None):
+    sender_pk, sender = account.generate_account()
+    _, receiver = account.generate_account()
+    return sender_pk, algo_txn.PaymentTxn(sender, params, receiver, 1000, note=note, lease=lease)
+
+
+def test_lost_response_is_sent_again_once(local_network, params):
+    submitter = IdempotentSubmitter(local_network.client, base_delay=0.0)
+    sender_pk, txn = _payment(params)
+    stx = txn.sign(sender_pk)
+
+    # the node applies the first send but its answer is lost, the resend finds the transaction in the pool
+    local_network.response_loss_probability = 1.0
+    txid = submitter.submit(stx)
+    local_network.response_loss_probability = 0.0
+
+    assert txid == stx.get_txid()
+    assert (submitter.sent, submitter.retries, submitter.deduplicated) == (2, 1, 1)
+    assert local_network.stats()["responses_lost"] == 1
+
+    # submitted again, the transaction is not sent a third time
+    assert submitter.submit(stx) == txid
+    assert submitter.sent == 2
+
+
+def test_transaction_already_in_ledger(local_network, params):
+    sender_pk, txn = _payment(params)
+    stx = txn.sign(sender_pk)
+    txid = IdempotentSubmitter(local_network.client).submit(stx)
+    local_network.status_after_block(local_network.round, timeout=5.0)
+
+    # a new submitter, e.g. after a restart, sends the confirmed transaction again
+    restarted = IdempotentSubmitter(local_network.client)
+    assert restarted.submit(stx) == txid
+    assert restarted.deduplicated == 1
+    assert local_network.stats()["confirmed"] == 1
+
+
+def test_action_rebuilt_with_the_same_lease_resolves_to_the_first(local_network, params):
+    submitter = IdempotentSubmitter(local_network.client)
+    lease = action_lease(1, "play_action", 3)
+    sender_pk, first = _payment(params, lease=lease, note=b"first")
+    second = algo_txn.PaymentTxn(first.sender, params, first.receiver, 1000, note=b"second", lease=lease)
+
+    first_txid = submitter.submit(first.sign(sender_pk))
+    assert submitter.submit(second.sign(sender_pk)) == first_txid
+    assert submitter.deduplicated == 1
+
+    # a lease held by a transaction of someone else is a plain rejection
+    with pytest.raises(AlgodHTTPError, match="overlapping lease"):
+        IdempotentSubmitter(local_network.client).submit(second.sign(sender_pk))
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+import tty
+
+import serial
+
+from src.serial_utils.frame_parser import BoardEvent
+from src.serial_utils.ingest_hub import SerialIngestHub, open_serial_device
+
+
+def _pty_pair():
+    controller, device = os.openpty()
+    tty.setraw(device)
+    return controller, os.ttyname(device), device
+
+
+class _Opener:
+    """
+    Opens the devices for the hub and lets the test wait until they are open, pyserial drops what was written before.
+    """
+
+    def __init__(self, devices, failures: int = 0):
+        self.failures = failures
+        self.opens = []
+        self._waiting = set(devices)
+        self._open = threading.Event()
+
+    def __call__(self, path):
+        self.opens.append(path)
+        if self.failures:
+            self.failures -= 1
+            raise serial.SerialException("device not ready")
+
+        port = open_serial_device(path)
+        self._waiting.discard(path)
+        if not self._waiting:
+            self._open.set()
+        return port
+
+    def wait(self):
+        assert self._open.wait(5.0)
+        # the reader threads get to their first read
+        time.sleep(0.05)
+
+
+def _events(hub, count):
+    events = []
+    while len(events) < count:
+        event = hub.get_event(timeout=5.0)
+        assert event is not None, f"only {len(events)} of {count} events arrived"
+        events.append(event)
+    return events
+
+
+def test_every_device_is_read_while_one_is_quiet():
+    pairs = [_pty_pair() for _ in range(8)]
+    opener = _Opener([name for _, name, _ in pairs])
+    hub = SerialIngestHub([name for _, name, _ in pairs], serial_factory=opener, debounce_window_ms=None)
+    hub.start()
+    try:
+        opener.wait()
+        # the first board never sends anything
+        for idx, (controller, _, _) in enumerate(pairs[1:], start=1):
+            os.write(controller, b"".join(b"BRD,B%d,%d,1\r\n" % (idx, tick) for tick in range(50)))
+
+        events = _events(hub, 7 * 50)
+    finally:
+        hub.stop()
+        for controller, _, device in pairs:
+            os.close(controller)
+            os.close(device)
+
+    assert all(isinstance(event, BoardEvent) for event in events)
+    for idx, (_, name, _) in enumerate(pairs[1:], start=1):
+        ticks = [event.tick for event in events if event.device == name]
+        assert ticks == list(range(50)), name
+    assert hub.frames_decoded == 7 * 50
+    assert hub.events_suppressed == 0
+
+
+def test_failed_device_is_reopened():
+    controller, name, device = _pty_pair()
+    opener = _Opener([name], failures=1)
+
+    hub = SerialIngestHub([name], reconnect_delay=0.05, serial_factory=opener)
+    hub.start()
+    try:
+        opener.wait()
+        os.write(controller, b"BRD,X,1000,1\r\nBRD,X,3000,2\r\n")
+        events = _events(hub, 2)
+    finally:
+        hub.stop()
+        os.close(controller)
+        os.close(device)
+
+    assert [(event.tick, event.score) for event in events] == [(1000, 1), (3000, 2)]
+    assert opener.opens == [name, name]
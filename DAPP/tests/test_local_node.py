@@ -0,0 +1,51 @@
+import base64
+
+from algosdk import account, encoding
+from algosdk.future import transaction as algo_txn
+
+from src.blockchain_utils.local_node import MIN_FEE, LocalNetwork
+
+
+def _raw_group(*signed) -> bytes:
+    return b"".join(base64.b64decode(encoding.msgpack_encode(stx)) for stx in signed)
+
+
+def test_failed_group_leaves_no_partial_state(params):
+    network = LocalNetwork(block_time=0.05, initial_balance=10 ** 9)
+    (a_pk, a_address), (b_pk, b_address), (_, receiver) = [account.generate_account() for _ in range(3)]
+
+    first = algo_txn.PaymentTxn(a_address, params, receiver, 1000)
+    second = algo_txn.PaymentTxn(b_address, params, receiver, 1000)
+    group_id = algo_txn.calculate_group_id([first, second])
+    first.group = group_id
+    second.group = group_id
+    txid = network.send_raw_transaction(_raw_group(first.sign(a_pk), second.sign(b_pk)))["txId"]
+
+    # the second sender is emptied after the group entered the pool, so the group fails when the block is made
+    network.set_balance(b_address, 0)
+    network.start()
+    try:
+        network.status_after_block(network.round, timeout=5.0)
+    finally:
+        network.stop()
+
+    assert network.pending_transaction_info(txid)["pool-error"]
+    assert network.account_info(a_address)["amount"] == 10 ** 9
+    assert network.account_info(receiver)["amount"] == 10 ** 9
+
+
+def test_confirmed_group_is_applied(params):
+    network = LocalNetwork(block_time=0.05, initial_balance=10 ** 9)
+    (a_pk, a_address), (_, receiver) = [account.generate_account() for _ in range(2)]
+
+    txid = network.send_raw_transaction(
+        _raw_group(algo_txn.PaymentTxn(a_address, params, receiver, 5000).sign(a_pk)))["txId"]
+    network.start()
+    try:
+        network.status_after_block(network.round, timeout=5.0)
+    finally:
+        network.stop()
+
+    assert network.pending_transaction_info(txid)["confirmed-round"] > 0
+    assert network.account_info(a_address)["amount"] == 10 ** 9 - 5000 - MIN_FEE
+    assert network.account_info(receiver)["amount"] == 10 ** 9 + 5000
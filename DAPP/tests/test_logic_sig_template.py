@@ -0,0 +1,113 @@
+import asyncio
+import base64
+import re
+
+import pytest
+from algosdk import logic as algo_logic
+from pyteal import Expr, Int, Mode, Txn
+
+from src.blockchain_utils.logic_sig_template import LogicSigTemplate, encode_varuint
+from src.blockchain_utils.teal_artifact_cache import TealArtifactCache
+from src.services.game_engine_service import TEAL_VERSION
+from src.smart_contracts.game_funds_escrow import game_funds_escorw
+
+
+def app_id_check(app_id: int) -> Expr:
+    return Txn.application_id() == Int(app_id)
+
+
+def app_id_check_program(app_id: int) -> bytes:
+    # what algod assembles app_id_check into: intcblock 1 app_id, txn ApplicationID, intc_0, ==, return
+    return bytes([0x04, 0x20, 0x01]) + encode_varuint(app_id) + bytes([0x31, 0x18, 0x22, 0x12, 0x43])
+
+
+class _Assembler:
+    """
+    Algod client that assembles app_id_check like algod does.
+    """
+
+    algod_address = "http://localhost:4001"
+
+    def __init__(self, versions: dict):
+        self._versions = versions
+        self.compiles = 0
+
+    def versions(self) -> dict:
+        return self._versions
+
+    def compile(self, source: str) -> dict:
+        self.compiles += 1
+        assert re.sub(r'int \d+', 'int N', source) == "#pragma version 4\ntxn ApplicationID\nint N\n==\nreturn"
+        app_id = int(re.search(r'int (\d+)', source).group(1))
+        return {"hash": "", "result": base64.b64encode(app_id_check_program(app_id)).decode('ascii')}
+
+
+@pytest.mark.parametrize("app_id", [0, 42, 127, 128, 43000, 16384 * 128 - 1, 2 ** 32, 2 ** 64 - 1])
+def test_substituted_program_is_the_compiled_program(tmp_path, sandbox_versions, app_id):
+    client = _Assembler(sandbox_versions(1))
+    template = LogicSigTemplate(app_id_check, Mode.Signature, 4, TealArtifactCache(tmp_path))
+
+    assert template.program_bytes(client, app_id) == app_id_check_program(app_id)
+    assert template.address(client, app_id) == algo_logic.address(app_id_check_program(app_id))
+    # the two sentinel programs of the length of the value
+    assert client.compiles == 2
+
+
+def test_template_is_compiled_once_per_length(tmp_path, sandbox_versions):
+    client = _Assembler(sandbox_versions(1))
+    template = LogicSigTemplate(app_id_check, Mode.Signature, 4, TealArtifactCache(tmp_path))
+
+    for app_id in range(40000, 40100):
+        assert template.program_bytes(client, app_id) == app_id_check_program(app_id)
+    assert client.compiles == 2
+
+
+def test_program_without_a_slot_is_refused(tmp_path, sandbox_versions):
+    template = LogicSigTemplate(lambda app_id: Txn.application_id() == Int(7), Mode.Signature, 4,
+                                TealArtifactCache(tmp_path))
+
+    with pytest.raises(ValueError, match="single integer slot"):
+        template.program_bytes(_Assembler(sandbox_versions(1)), 40000)
+
+
+def test_escrow_template_matches_the_node(local_network, tmp_path):
+    teal_cache = TealArtifactCache(tmp_path)
+    template = LogicSigTemplate(game_funds_escorw, Mode.Signature, TEAL_VERSION, teal_cache)
+
+    for app_id in (5, 1000, 123456789):
+        compiled = teal_cache.compile_program(local_network.client, game_funds_escorw, Mode.Signature, TEAL_VERSION,
+                                              app_id)
+        assert template.program_bytes(local_network.client, app_id) == compiled
+
+
+def test_values_outside_of_uint64_are_refused():
+    with pytest.raises(ValueError):
+        encode_varuint(-1)
+    with pytest.raises(ValueError):
+        encode_varuint(2 ** 64)
+
+
+class _AsyncAssembler(_Assembler):
+    """
+    Async algod client that assembles app_id_check like algod does, a compile takes a while.
+    """
+
+    async def versions(self) -> dict:
+        return super().versions()
+
+    async def compile(self, source: str) -> dict:
+        await asyncio.sleep(0.01)
+        return super().compile(source)
+
+
+def test_concurrent_async_callers_compile_once(tmp_path, sandbox_versions):
+    client = _AsyncAssembler(sandbox_versions(1))
+    template = LogicSigTemplate(app_id_check, Mode.Signature, 4, TealArtifactCache(tmp_path))
+
+    async def instantiate():
+        return await asyncio.gather(*(template.program_bytes_async(client, app_id) for app_id in range(40000, 40010)))
+
+    programs = asyncio.run(instantiate())
+
+    assert programs == [app_id_check_program(app_id) for app_id in range(40000, 40010)]
+    assert client.compiles == 2
@@ -0,0 +1,86 @@
+from concurrent.futures import Future
+
+import pytest
+from algosdk import account
+
+from src.blockchain_utils.confirmation_tracker import TransactionRejected
+from src.services.player_account_cache import MIN_BALANCE, PlayerAccountCache, account_min_balance
+
+
+@pytest.fixture
+def cache(local_network):
+    cache = PlayerAccountCache(local_network.client)
+    yield cache
+    cache.close()
+
+
+def _funded_account(local_network, amount: int) -> str:
+    _, address = account.generate_account()
+    local_network.set_balance(address, amount)
+    return address
+
+
+def test_min_balance_reported_by_algod_is_used():
+    assert account_min_balance({"amount": 5, "min-balance": 321000}) == 321000
+
+
+def test_min_balance_without_min_balance_field():
+    # algod of the pinned SDK's era does not report min-balance
+    assert account_min_balance({"amount": 10 ** 6}) == MIN_BALANCE
+
+    info = {"amount": 10 ** 7,
+            "assets": [{"asset-id": 1}, {"asset-id": 2}],
+            "created-apps": [{"id": 10}],
+            "apps-local-state": [{"id": 11}],
+            "apps-total-schema": {"num-uint": 5, "num-byte-slice": 4},
+            "apps-total-extra-pages": 1}
+    assert account_min_balance(info) == 100000 + 2 * 100000 + 2 * 100000 + 5 * 28500 + 4 * 50000 + 100000
+
+
+def test_reservation_is_held_until_the_group_is_confirmed(local_network, cache):
+    address = _funded_account(local_network, MIN_BALANCE + 5000)
+    cache.refresh([address])
+    fetched_round = local_network.round
+
+    confirmation = Future()
+    cache.reserve("GROUP", {address: 3000}, confirmation)
+    assert cache.spendable(address) == 2000
+    assert cache.shortfalls({address: 3000}) == {address: 1000}
+
+    # confirmed after the fetch, the reservation turns into the payment it was held for
+    confirmation.set_result({"confirmed-round": fetched_round + 1})
+    assert cache.spendable(address) == 2000
+
+
+def test_reservation_of_a_rejected_group_is_released(local_network, cache):
+    address = _funded_account(local_network, MIN_BALANCE + 5000)
+    cache.refresh([address])
+
+    confirmation = Future()
+    cache.reserve("GROUP", {address: 3000}, confirmation)
+    confirmation.set_exception(TransactionRejected("GROUP", "overspend"))
+    assert cache.spendable(address) == 5000
+
+    # a group whose outcome is unknown releases its reservation too, the balance is fetched again later
+    confirmation = Future()
+    cache.reserve("LOST", {address: 3000}, confirmation)
+    confirmation.set_exception(TimeoutError())
+    assert cache.spendable(address) == 5000
+
+
+def test_transactions_already_in_the_fetched_balance_are_not_applied_again(local_network, cache):
+    sender = _funded_account(local_network, MIN_BALANCE + 5000)
+    receiver = _funded_account(local_network, MIN_BALANCE)
+    cache.refresh([sender, receiver])
+    fetched_round = local_network.round
+
+    def payment(round_num: int) -> dict:
+        return {"confirmed-round": round_num,
+                "txn": {"txn": {"type": "pay", "snd": sender, "rcv": receiver, "amt": 2000, "fee": 1000}}}
+
+    # confirmed in or before the round of the fetch, account_info already counted it
+    cache.apply_transaction(payment(fetched_round))
+    assert (cache.spendable(sender), cache.spendable(receiver)) == (5000, 0)
+
+    cache.apply_transaction(payment(fetched_round + 1))
+    assert (cache.spendable(sender), cache.spendable(receiver)) == (2000, 2000)
@@ -0,0 +1,97 @@
+import time
+
+from src.serial_utils.frame_parser import BoardEvent
+from src.serial_utils.ingest_hub import SerialIngestHub
+from src.serial_utils.session_replay import SessionRecorder, SessionReplayer
+
+BOARD_X = "/dev/ttyBoardX"
+BOARD_O = "/dev/ttyBoardO"
+
+# chunks as read from the two boards, a line cut between two reads and a garbled line included
+CHUNKS = [(BOARD_X, b"BRD,X,100,1\r\n", 0.0),
+          (BOARD_O, b"BRD,O,200,3\r\nBRD,O,2", 0.2),
+          (BOARD_O, b"10,1\r\n", 0.25),
+          (BOARD_X, b"BRD,X,300,\r\n", 0.5),
+          (BOARD_X, b"BRD,X,400,2\r\n", 0.75)]
+
+
+def _record(path) -> SessionRecorder:
+    hub = SerialIngestHub([BOARD_X, BOARD_O])
+    recorder = SessionRecorder(path)
+    recorder.attach(hub)
+
+    started = recorder._started
+    for device, chunk, at in CHUNKS:
+        recorder.record(device, chunk, started + at)
+    recorder.detach(hub)
+    recorder.close()
+    return recorder
+
+
+def _replay(hub: SerialIngestHub, replayer: SessionReplayer) -> list:
+    hub.start()
+    try:
+        assert replayer.wait(5.0)
+        events = []
+        while True:
+            event = hub.get_event(timeout=0.3)
+            if event is None:
+                return events
+            events.append(event)
+    finally:
+        hub.stop()
+
+
+def test_recording_keeps_the_raw_chunks_and_their_timing(tmp_path):
+    recorder = _record(tmp_path / "session.wal")
+    assert (recorder.chunks, recorder.bytes) == (len(CHUNKS), sum(len(chunk) for _, chunk, _ in CHUNKS))
+
+    replayer = SessionReplayer(tmp_path / "session.wal")
+    assert replayer.devices == [BOARD_X, BOARD_O]
+    assert [data for _, _, data in replayer.chunks[BOARD_O]] == [CHUNKS[1][1], CHUNKS[2][1]]
+    assert abs(replayer.duration - 0.75) < 1e-6
+
+
+def test_replay_timing_is_scaled_by_speed(tmp_path):
+    _record(tmp_path / "session.wal")
+
+    replayer = SessionReplayer(tmp_path / "session.wal", speed=100)
+    started = replayer.due(0.0)
+    assert abs(replayer.due(0.75) - started - 0.0075) < 1e-9
+
+    as_fast_as_possible = SessionReplayer(tmp_path / "session.wal", speed=None)
+    assert as_fast_as_possible.due(0.75) == as_fast_as_possible.due(0.0)
+
+
+def test_replay_through_the_hub_decodes_what_was_recorded(tmp_path):
+    _record(tmp_path / "session.wal")
+    replayer = SessionReplayer(tmp_path / "session.wal", speed=10, read_timeout=0.02)
+    hub = SerialIngestHub(replayer.devices, serial_factory=replayer.serial_factory, debounce_window_ms=None)
+
+    started = time.perf_counter()
+    events = _replay(hub, replayer)
+    # the recording is 0.75 s long
+    assert time.perf_counter() - started >= 0.075
+
+    assert all(isinstance(event, BoardEvent) for event in events)
+    assert [(event.device, event.tick, event.score) for event in events if event.device == BOARD_X] == \
+        [(BOARD_X, 100, 1), (BOARD_X, 400, 2)]
+    assert [(event.device, event.tick, event.score) for event in events if event.device == BOARD_O] == \
+        [(BOARD_O, 200, 3), (BOARD_O, 210, 1)]
+    assert hub.frames_malformed == 1
+
+
+def test_replay_through_pseudo_terminals(tmp_path):
+    _record(tmp_path / "session.wal")
+    replayer = SessionReplayer(tmp_path / "session.wal", speed=None)
+    paths = replayer.play_to_ptys(lead_in=0.5)
+
+    hub = SerialIngestHub([paths[BOARD_X], paths[BOARD_O]], debounce_window_ms=None)
+    try:
+        events = _replay(hub, replayer)
+    finally:
+        replayer.close()
+
+    assert sorted((event.node_name, event.tick) for event in events) == [("O", 200), ("O", 210), ("X", 100),
+                                                                         ("X", 400)]
+    assert {event.device for event in events} == {paths[BOARD_X], paths[BOARD_O]}
@@ -0,0 +1,78 @@
+import base64
+import io
+
+import msgpack
+import pytest
+from algosdk import account, encoding
+from algosdk.future import transaction as algo_txn
+
+from src.blockchain_utils.signing_service import SigningService, sign_jobs
+
+# #pragma version 1, int 1
+ALWAYS_APPROVE = b"\x01\x20\x01\x01\x22"
+
+
+def _payment_jobs(params, count: int) -> list:
+    jobs = []
+    for idx in range(count):
+        sender_pk, sender = account.generate_account()
+        jobs.append((algo_txn.PaymentTxn(sender, params, sender, idx), sender_pk))
+    return jobs
+
+
+@pytest.fixture
+def pool():
+    service = SigningService(workers=2, inline_jobs=4)
+    yield service
+    service.shutdown()
+
+
+def test_small_batches_are_signed_in_the_calling_thread(params):
+    service = SigningService(workers=2, inline_jobs=4)
+    jobs = _payment_jobs(params, 3)
+
+    future = service.submit(jobs)
+    assert future.done()
+    assert future.result() == [base64.b64decode(encoding.msgpack_encode(txn.sign(pk))) for txn, pk in jobs]
+    assert service._executor is None
+
+    # with a single worker nothing is worth sending to a pool
+    single = SigningService(workers=1, inline_jobs=4)
+    jobs = _payment_jobs(params, 10)
+    assert single.sign(jobs) == sign_jobs(jobs)
+    assert single._executor is None
+
+
+def test_large_batches_are_signed_in_the_pool_in_order(pool, params):
+    jobs = _payment_jobs(params, 9)
+    jobs.append((algo_txn.PaymentTxn(jobs[0][0].sender, params, jobs[0][0].sender, 0),
+                 algo_txn.LogicSig(ALWAYS_APPROVE)))
+
+    encoded = pool.sign(jobs)
+    assert pool._executor is not None
+    # ed25519 signatures are deterministic, the pool returns the same bytes as signing inline
+    assert encoded == sign_jobs(jobs)
+    assert "lsig" in msgpack.unpackb(encoded[-1], raw=False)
+
+    # a shut down pool is started again by the next batch
+    pool.shutdown()
+    assert pool.sign(jobs) == encoded
+
+
+def test_groups_are_concatenated_per_group(pool, params):
+    jobs = _payment_jobs(params, 6)
+    groups = [jobs[:2], jobs[2:]]
+
+    raw_groups = pool.sign_groups(groups)
+    assert raw_groups == [b"".join(sign_jobs(group)) for group in groups]
+    assert [len(list(msgpack.Unpacker(io.BytesIO(raw_group)))) for raw_group in raw_groups] == [2, 4]
+
+
+def test_failed_job_fails_the_batch(pool, params):
+    jobs = _payment_jobs(params, 6)
+    jobs[4] = (jobs[4][0], "not a private key")
+
+    with pytest.raises(ValueError):
+        pool.sign(jobs)
+    with pytest.raises(ValueError):
+        SigningService(workers=2, inline_jobs=100).sign(jobs)
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from algosdk.future.transaction import SuggestedParams
+
+from src.blockchain_utils.suggested_params_cache import SuggestedParamsCache
+
+
+class _SlowAlgod:
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = 0
+
+    def suggested_params(self) -> SuggestedParams:
+        self.calls += 1
+        self.release.wait(5.0)
+        return SuggestedParams(1000, 10, 1010, "gh", flat_fee=True)
+
+
+def test_hits_do_not_wait_for_a_refresh_in_flight():
+    client = _SlowAlgod()
+    cache = SuggestedParamsCache(client, background_refresh=False)
+    cache.get()
+
+    client.release.clear()
+    refresh = threading.Thread(target=cache._fetch)
+    refresh.start()
+    while client.calls < 2:
+        time.sleep(0.01)
+
+    started = time.perf_counter()
+    params = cache.get()
+    assert time.perf_counter() - started < 0.5
+    assert params.first == 10
+
+    client.release.set()
+    refresh.join()
+
+
+def test_concurrent_misses_fetch_once():
+    client = _SlowAlgod()
+    cache = SuggestedParamsCache(client, background_refresh=False)
+
+    client.release.clear()
+    callers = [threading.Thread(target=cache.get) for _ in range(8)]
+    for caller in callers:
+        caller.start()
+    time.sleep(0.1)
+    client.release.set()
+    for caller in callers:
+        caller.join()
+
+    assert client.calls == 1
+    assert cache.fetches == 1
@@ -0,0 +1,52 @@
+import base64
+
+from pyteal import Mode
+
+from src.blockchain_utils.local_node import LocalNetwork
+from src.blockchain_utils.teal_artifact_cache import TealArtifactCache
+from src.smart_contracts.cornhole_asc1 import clear_program
+
+
+class _Node:
+    """
+    Minimal algod client that answers /versions and /teal/compile, every node behind the same address.
+    """
+
+    algod_address = "http://localhost:4001"
+
+    def __init__(self, versions: dict, program: bytes):
+        self._versions = versions
+        self._program = program
+        self.compiles = 0
+
+    def versions(self) -> dict:
+        return self._versions
+
+    def compile(self, source: str) -> dict:
+        self.compiles += 1
+        return {"hash": "", "result": base64.b64encode(self._program).decode('ascii')}
+
+
+def test_stand_in_artifacts_are_not_served_to_a_real_node(tmp_path, sandbox_versions):
+    cache = TealArtifactCache(tmp_path)
+    stand_in = _Node(LocalNetwork().versions(), b"\x04fake")
+    sandbox = _Node(sandbox_versions(1), b"\x04real")
+
+    assert cache.compile_program(stand_in, clear_program, Mode.Application, 4) == b"\x04fake"
+    assert cache.compile_program(sandbox, clear_program, Mode.Application, 4) == b"\x04real"
+    assert sandbox.compiles == 1
+
+
+def test_artifacts_are_reused_until_the_node_is_upgraded(tmp_path, sandbox_versions):
+    cache = TealArtifactCache(tmp_path)
+
+    assert cache.compile_program(_Node(sandbox_versions(1), b"\x04v1"), clear_program, Mode.Application, 4) == \
+        b"\x04v1"
+
+    same_build = _Node(sandbox_versions(1), b"\x04other")
+    assert cache.compile_program(same_build, clear_program, Mode.Application, 4) == b"\x04v1"
+    assert same_build.compiles == 0
+
+    upgraded = _Node(sandbox_versions(2), b"\x04v2")
+    assert cache.compile_program(upgraded, clear_program, Mode.Application, 4) == b"\x04v2"
+    assert cache.stats()["artifacts_on_disk"] == 2
@@ -1,71 +1,306 @@
-from imutils.video import VideoStream
+# QR code station: reads the player's Algorand address from a QR code, checks the checksum of the address and sends
+# it to the host over serial as a binary registration (see REGISTRATION_FRAME), or with --text as the CSV line
+# QR,<player>,<unix time>,<address>
+#
+# The scanner is pipelined: a capture thread grabs and shrinks the frames, skips the ones that did not change since
+# the last decoded frame, and hands the others to a pool of decode workers (pyzbar and OpenCV release the GIL). The
+# main thread takes the results in frame order and writes to serial only when the decoded address changes.
+#
+#   python3 qrcode.py                                  # Pi camera, /dev/ttyS0, headless (as started by cron)
+#   python3 qrcode.py --webcam 0 --show                # webcam with the annotated preview
+#   python3 qrcode.py --video scan.mp4 --serial ''     # benchmark on a recorded video, prints fps and CPU use
+#   taskset -c 0 python3 qrcode.py --video scan.mp4 --serial '' --workers 1   # ... on a single Pi-class core
+from concurrent.futures import ThreadPoolExecutor
 from pyzbar import pyzbar
-import RPi.GPIO as GPIO
 import argparse
-import datetime
-import imutils
+import base64
+import binascii
+import hashlib
+import os
+import queue
+import threading
 import time
+import struct
 import cv2
 import serial
- 
-# video setup
-#vs = VideoStream(src=0).start()  #Uncomment this if you are using Webcam
-vs = VideoStream(usePiCamera=True).start() # For Pi Camera
-time.sleep(2.0)
+
+try:
+  import RPi.GPIO as GPIO
+except ImportError:  # benchmarking recorded videos off the Pi
+  GPIO = None
+
+LED_PIN = 12
+NODE_TYPE = 'QR'
+
+# STX, b'R', player, unix time, 32 byte public key and 4 byte checksum of the address: 43 bytes instead of the 75 of
+# the CSV line, must match REGISTRATION_FRAME of DAPP/src/serial_utils/frame_parser.py
+STX = b'\x02'
+REGISTRATION_FRAME = struct.Struct('>1s1s1sI32s4s')
+REGISTRATION_TYPE = b'R'
+ALGORAND_ADDRESS_LENGTH = 58
+
+# size of the thumbnail the change check compares, and the mean gray level difference that counts as a change
+THUMBNAIL_SIZE = (32, 24)
+CHANGE_THRESHOLD = 2.0
+
+# pixels around the code of the last frame that are decoded first, before falling back to the whole frame
+ROI_PADDING = 40
+
+
+class FileSource:
+  """
+  Frames of a recorded video, read as fast as they are decoded.
+  """
+  is_live = False
+
+  def __init__(self, path):
+    self.capture = cv2.VideoCapture(path)
+    if not self.capture.isOpened():
+      raise ValueError('Can not open video ' + path)
+
+  def read(self):
+    ok, frame = self.capture.read()
+    return frame if ok else None
+
+  def stop(self):
+    self.capture.release()
+
+
+class CameraSource:
+  """
+  Latest frame of the Pi camera or of a webcam, read returns the same frame until the camera delivers the next one.
+  """
+  is_live = True
+
+  def __init__(self, webcam=None, framerate=32):
+    from imutils.video import VideoStream
+    if webcam is None:
+      self.stream = VideoStream(usePiCamera=True, framerate=framerate).start()
+    else:
+      self.stream = VideoStream(src=webcam, framerate=framerate).start()
+    self.frame_interval = 1.0 / framerate
+    time.sleep(2.0)
+
+  def read(self):
+    return self.stream.read()
+
+  def stop(self):
+    self.stream.stop()
+
+
+def decode_address(address):
+  """
+  Returns (public key, checksum) of a valid Algorand address, None for anything else, e.g. a different QR code or a
+  misread one.
+  """
+  if len(address) != ALGORAND_ADDRESS_LENGTH:
+    return None
+  try:
+    key_and_checksum = base64.b32decode(address + '======')
+  except (binascii.Error, ValueError):
+    return None
+  public_key, checksum = key_and_checksum[:32], key_and_checksum[32:]
+  if hashlib.new('sha512_256', public_key).digest()[-4:] != checksum:
+    return None
+  return public_key, checksum
+
+
+def shrink(frame, width):
+  height = int(frame.shape[0] * width / frame.shape[1])
+  return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def decode(gray, roi):
+  """
+  Decodes the QR codes of a frame, trying the region of the code of the previous frame first.
+  Returns (data, rect) of every QR code, rect in the coordinates of the frame.
+  """
+  if roi is not None:
+    (x, y, w, h) = roi
+    x0, y0 = max(x - ROI_PADDING, 0), max(y - ROI_PADDING, 0)
+    found = [(barcode.data, barcode.rect) for barcode in pyzbar.decode(gray[y0:y + h + ROI_PADDING,
+                                                                           x0:x + w + ROI_PADDING])
+             if barcode.type == 'QRCODE']
+    if found:
+      return [(data, (rx + x0, ry + y0, rw, rh)) for data, (rx, ry, rw, rh) in found]
+
+  return [(barcode.data, tuple(barcode.rect)) for barcode in pyzbar.decode(gray) if barcode.type == 'QRCODE']
+
+
+class Scanner:
+
+  def __init__(self, source, workers, width, show, queue_size):
+    self.source = source
+    self.width = width
+    self.show = show
+    self.pool = ThreadPoolExecutor(max_workers=workers)
+    # (frame to annotate or None, future of the decode) in frame order, bounded so the workers can not fall behind
+    self.results = queue.Queue(maxsize=queue_size)
+    self.stop_event = threading.Event()
+    self.roi = None
+
+    self.frames_captured = 0
+    self.frames_unchanged = 0
+    self.frames_dropped = 0
+    self.frames_decoded = 0
+
+  def capture(self):
+    last_frame = None
+    last_thumbnail = None
+
+    while not self.stop_event.is_set():
+      frame = self.source.read()
+      if frame is None:
+        if not self.source.is_live:
+          break
+        time.sleep(0.01)
+        continue
+
+      # a live camera hands out the same frame until the next one arrives
+      if frame is last_frame:
+        time.sleep(self.source.frame_interval / 2)
+        continue
+      last_frame = frame
+      self.frames_captured += 1
+
+      frame = shrink(frame, self.width)
+      gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+      thumbnail = cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+      if last_thumbnail is not None and cv2.mean(cv2.absdiff(thumbnail, last_thumbnail))[0] < CHANGE_THRESHOLD:
+        self.frames_unchanged += 1
+        continue
+
+      if self.source.is_live and self.results.full():
+        # the decoders are behind, the next frame is more recent anyway
+        self.frames_dropped += 1
+        continue
+
+      last_thumbnail = thumbnail
+      self.results.put((frame if self.show else None, self.pool.submit(decode, gray, self.roi)))
+
+    self.results.put(None)
+
+  def run(self, emit, set_led, rearm):
+    capture_thread = threading.Thread(target=self.capture, name='capture', daemon=True)
+    capture_thread.start()
+
+    sent_address = None
+    last_seen = 0.0
+    led = None
+
+    while True:
+      item = self.results.get()
+      if item is None:
+        break
+
+      frame, future = item
+      codes = future.result()
+      self.frames_decoded += 1
+      now = time.time()
+
+      if codes:
+        data, rect = codes[0]
+        self.roi = rect
+        last_seen = now
+        address = data.decode('utf-8', errors='replace')
+        if address != sent_address:
+          emit(address, now)
+          sent_address = address
+      else:
+        self.roi = None
+        # the same player can register again once the code has been out of view for a while
+        if sent_address is not None and now - last_seen > rearm:
+          sent_address = None
+
+      if bool(codes) != led:
+        led = bool(codes)
+        set_led(led)
+
+      if frame is not None:
+        for data, (x, y, w, h) in codes:
+          cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
+          cv2.putText(frame, data.decode('utf-8', errors='replace') + ' (QRCODE)', (x, y - 10),
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+        cv2.imshow('Barcode Reader', frame)
+        # if the `s` key is pressed, break from the loop
+        if cv2.waitKey(1) & 0xFF == ord('s'):
+          break
+
+    self.stop_event.set()
+    # unblock the capture thread if it waits for room in the queue
+    while capture_thread.is_alive():
+      try:
+        self.results.get(timeout=0.1)
+      except queue.Empty:
+        pass
+    self.pool.shutdown()
+
+
+parser = argparse.ArgumentParser(description='QR code station of a CornHole table.')
+parser.add_argument('--player', default='X', help='player of the station, X or O')
+parser.add_argument('--serial', default='/dev/ttyS0', help="serial port to the host, '' prints the payloads only")
+parser.add_argument('--video', default=None, help='decode a recorded video instead of the camera and report fps')
+parser.add_argument('--webcam', type=int, default=None, help='index of a webcam to use instead of the Pi camera')
+parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='decode workers')
+parser.add_argument('--width', type=int, default=400, help='width the frames are shrunk to before decoding')
+parser.add_argument('--rearm', type=float, default=10.0,
+                    help='seconds without a code after which the same address is sent again')
+parser.add_argument('--show', action='store_true', help='annotate the frames and show them')
+parser.add_argument('--text', action='store_true', help='send the CSV line instead of the binary registration')
+args = parser.parse_args()
 
 # serial setup
-ser = serial.Serial('/dev/ttyS0')  # open serial port
+ser = serial.Serial(args.serial) if args.serial else None  # open serial port
 
 # gpio setup
-GPIO.setwarnings(False)    # Ignore warning for now
-GPIO.setmode(GPIO.BOARD)  
-GPIO.setup(12, GPIO.OUT, initial=GPIO.LOW)  
-
-# variables
-flag = False
-node_type = 'QR'
-player = 'X'
-send_payload = ''
- 
-while True:
-  frame = vs.read()
-  frame = imutils.resize(frame, width=400)
-  barcodes = pyzbar.decode(frame)
-
-  if len(barcodes) == 0:
-    flag = False
-
-  for barcode in barcodes:
-    (x, y, w, h) = barcode.rect
-    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
-    barcodeData = barcode.data.decode("utf-8")
-    barcodeType = barcode.type
-    text = "{} ({})".format(barcodeData, barcodeType)
-    #print (text)
-    cv2.putText(frame, text, (x, y - 10),
-    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-
-    if barcodeType == 'QRCODE':
-      flag = True
-      send_payload = node_type + ',' + player + ',' + str(int(time.time())) + ',' + barcodeData + '\r\n'
-      print(send_payload)
-      ser.write(send_payload.encode('ascii'))
-
-  if flag:
-    GPIO.output(12, GPIO.HIGH)
+if GPIO is not None:
+  GPIO.setwarnings(False)    # Ignore warning for now
+  GPIO.setmode(GPIO.BOARD)
+  GPIO.setup(LED_PIN, GPIO.OUT, initial=GPIO.LOW)
+
+
+def emit(address, scanned_at):
+  decoded = decode_address(address)
+  if decoded is None:
+    print('[WARN] not an Algorand address: ' + address, flush=True)
+    return
+
+  if args.text:
+    send_payload = (NODE_TYPE + ',' + args.player + ',' + str(int(scanned_at)) + ',' + address + '\r\n').encode('ascii')
   else:
-    GPIO.output(12, GPIO.LOW)
- 
-  # cv2.imshow("Barcode Reader", frame)
-  key = cv2.waitKey(1) & 0xFF
- 
-  # if the `s` key is pressed, break from the loop
-  if key == ord("s"):
-    break
+    send_payload = REGISTRATION_FRAME.pack(STX, REGISTRATION_TYPE, args.player.encode('ascii'), int(scanned_at),
+                                           *decoded)
+  print(NODE_TYPE + ',' + args.player + ',' + str(int(scanned_at)) + ',' + address, flush=True)
+  if ser is not None:
+    ser.write(send_payload)
+
+
+def set_led(on):
+  if GPIO is not None:
+    GPIO.output(LED_PIN, GPIO.HIGH if on else GPIO.LOW)
+
+
+# video setup
+source = FileSource(args.video) if args.video else CameraSource(webcam=args.webcam)
+scanner = Scanner(source, args.workers, args.width, args.show, queue_size=2 * args.workers)
+
+started, cpu_started = time.perf_counter(), time.process_time()
+try:
+  scanner.run(emit, set_led, args.rearm)
+except KeyboardInterrupt:
+  pass
+elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+print('[INFO] {} frames in {:.1f} s: {:.1f} fps, {} unchanged, {} dropped, {} decoded, CPU {:.0%} of a core, '
+      '{:.1f} ms CPU per frame'.format(scanner.frames_captured, elapsed, scanner.frames_captured / max(elapsed, 1e-9),
+                                       scanner.frames_unchanged, scanner.frames_dropped, scanner.frames_decoded,
+                                       cpu / max(elapsed, 1e-9), 1000 * cpu / max(scanner.frames_captured, 1)))
 
 print("[INFO] cleaning up...")
 
-ser.close()
-csv.close()
-cv2.destroyAllWindows()
-vs.stop()
\ No newline at end of file
+if ser is not None:
+  ser.close()
+if args.show:
+  cv2.destroyAllWindows()
+source.stop()